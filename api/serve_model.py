@@ -4,11 +4,11 @@ import pandas as pd
 import mlflow.pyfunc
 from mlflow.tracking import MlflowClient
 from typing import List, Union
-from supabase import create_client, Client
 from mlpipeline.preprocessing_utils import load_and_prepare_data
+from mlpipeline.storage import get_log_store
 from api.schemas import RawInputData
 from dotenv import load_dotenv
-from config import get_mlflow_config, get_s3_config, get_supabase_config
+from config import get_mlflow_config, get_s3_config
 from pydantic import ValidationError
 from functools import lru_cache
 
@@ -17,7 +17,6 @@ load_dotenv()
 # Config
 mlflow_config = get_mlflow_config()
 s3_config = get_s3_config()
-supabase_config = get_supabase_config()
 RELOAD_SECRET = os.getenv("RELOAD_SECRET", "default_secret")
 
 mlflow.set_tracking_uri(mlflow_config["tracking_uri"])
@@ -51,16 +50,17 @@ def get_model():
     return mlflow.pyfunc.load_model(model_uri)
 
 
-def get_supabase():
+def get_prediction_log():
     """
-    Creates and returns a Supabase client.
+    Returns the prediction log store: Supabase, or a local SQLite file
+    (see PREDICTION_LOG_BACKEND).
     """
-    return create_client(supabase_config["url"], supabase_config["key"])
+    return get_log_store()
 
 
-def log_to_supabase(supabase: Client, data: dict, prediction: float):
+def log_prediction(prediction_log, data: dict, prediction: float):
     """
-    Log input data and prediction to the Supabase table 'model_logs'.
+    Log input data and prediction to the 'model_logs' table.
     """
     record = {
         "UNIXTime": data.get("UNIXTime"),
@@ -76,11 +76,11 @@ def log_to_supabase(supabase: Client, data: dict, prediction: float):
         "datetime": data.get("datetime"),
         "Radiation": prediction,
     }
-    response = supabase.table("model_logs").insert(record).execute()
-    if not response.data:
+    inserted = prediction_log.insert([record])
+    if not inserted:
         print("Insert failed or returned no data")
     else:
-        print("Insert succeeded:", response.data)
+        print("Insert succeeded:", inserted)
 
 
 @app.get("/")
@@ -95,7 +95,7 @@ async def root():
 async def predict_json(
     data: Union[RawInputData, List[RawInputData]] = Body(...),
     model=Depends(get_model),
-    supabase=Depends(get_supabase),
+    prediction_log=Depends(get_prediction_log),
 ):
     """
     Predict endpoint for JSON input. Accepts a single or list of RawInputData objects.
@@ -116,9 +116,9 @@ async def predict_json(
 
     preds = model.predict(df_preprocessed)
 
-    # Log each prediction to Supabase
+    # Log each prediction
     for input_dict, pred in zip(data_list, preds):
-        log_to_supabase(supabase, input_dict, float(pred))
+        log_prediction(prediction_log, input_dict, float(pred))
 
     return {"predictions": preds.tolist()}
 
@@ -127,7 +127,7 @@ async def predict_json(
 async def predict_csv(
     file: UploadFile = File(...),
     model=Depends(get_model),
-    supabase=Depends(get_supabase),
+    prediction_log=Depends(get_prediction_log),
 ):
     """
     Predict endpoint for CSV file upload. Validates each row and returns predictions.
@@ -155,9 +155,9 @@ async def predict_csv(
 
     preds = model.predict(df_preprocessed)
 
-    # Log each prediction to Supabase
+    # Log each prediction
     for idx, row in enumerate(validated_rows):
-        log_to_supabase(supabase, row, float(preds[idx]))
+        log_prediction(prediction_log, row, float(preds[idx]))
 
     return {"predictions": preds.tolist()}
 
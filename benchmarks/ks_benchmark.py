@@ -0,0 +1,99 @@
+"""
+Benchmark batched two-sample KS tests (monitoring.ks_engine) against a
+per-feature scipy.stats.ks_2samp loop, for growing feature counts and
+recent windows, and check that both agree.
+
+Usage:
+    python -m benchmarks.ks_benchmark --features 10 100 1000 --rows 1000 1000000
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp
+from monitoring.ks_engine import presort_reference, ks_2samp_batch
+
+
+def benchmark_case(n_features, n_rows, baseline_rows, scipy_features, rng):
+    """
+    Time ks_2samp_batch on n_features drifted features of n_rows values, and
+    a scipy loop on the first scipy_features of them.
+    """
+    baseline = rng.normal(0, 1, (baseline_rows, n_features))
+    recent = rng.normal(0.05, 1, (n_rows, n_features))
+    recent[rng.random(recent.shape) < 0.01] = np.nan
+    reference = presort_reference(list(baseline.T))
+
+    start = time.perf_counter()
+    statistics, p_values = ks_2samp_batch(reference, recent)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [
+        ks_2samp(baseline[:, j], recent[:, j], method="asymp", nan_policy="omit")
+        for j in range(scipy_features)
+    ]
+    scipy_s = time.perf_counter() - start
+
+    return {
+        "features": n_features,
+        "rows": n_rows,
+        "batch_s": batch_s,
+        # Extrapolated from the features actually tested with scipy
+        "scipy_loop_s": scipy_s * n_features / scipy_features,
+        "max_stat_diff": max(
+            abs(statistics[j] - result.statistic) for j, result in enumerate(expected)
+        ),
+        "max_p_diff": max(
+            abs(p_values[j] - result.pvalue) for j, result in enumerate(expected)
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--features", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument(
+        "--rows", nargs="+", type=int, default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--baseline-rows", type=int, default=5000)
+    parser.add_argument(
+        "--scipy-features",
+        type=int,
+        default=10,
+        help="features tested with the scipy loop, extrapolated to the rest",
+    )
+    parser.add_argument(
+        "--max-cells",
+        type=int,
+        default=100_000_000,
+        help="skip cases with more recent values (features x rows)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for n_features in args.features:
+        for n_rows in args.rows:
+            if n_features * n_rows > args.max_cells:
+                print(f"Skipping {n_features} features x {n_rows} rows")
+                continue
+            results.append(
+                benchmark_case(
+                    n_features,
+                    n_rows,
+                    args.baseline_rows,
+                    min(args.scipy_features, n_features),
+                    rng,
+                )
+            )
+
+    df = pd.DataFrame(results)
+    df["speedup"] = df["scipy_loop_s"] / df["batch_s"]
+    print(df.to_string(index=False, float_format="%.3g"))
+
+
+if __name__ == "__main__":
+    main()
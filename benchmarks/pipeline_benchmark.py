@@ -0,0 +1,181 @@
+"""
+Benchmark the full training pipeline (pipeline.main) on synthetic HI-SEAS
+data of increasing size, against the local storage backend and an MLflow
+store in local files, and report per-stage time and memory.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --rows 10000 1000000 10000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import pandas as pd
+from benchmarks.synthetic_data import write_csv
+from mlpipeline.storage import LocalStorage
+
+BUCKET = "benchmark-bucket"
+RAW_KEY = "raw-data/hiseas.csv"
+PROCESSED_KEY = "processed-data/hiseas.csv"
+STAGE_COLUMNS = ["wall_s", "cpu_s", "peak_rss_mb", "rss_growth_mb", "input_rows"]
+
+
+def run_pipeline(n_rows, work_dir):
+    """
+    Generate n_rows of raw data into the local bucket, run pipeline.main
+    and return the per-stage profile records plus totals.
+    """
+    raw_path = LocalStorage(work_dir).path(BUCKET, RAW_KEY)
+    os.makedirs(os.path.dirname(raw_path))
+    start = time.perf_counter()
+    write_csv(raw_path, n_rows)
+    generate_s = time.perf_counter() - start
+
+    # Cold runs: no cached data preparation or training results. Set
+    # before importing the pipeline, which reads the cache config on import.
+    os.environ.update(
+        {
+            "S3_BUCKET_NAME": BUCKET,
+            "STORAGE_BACKEND": "local",
+            "LOCAL_STORAGE_ROOT": work_dir,
+            "MLFLOW_TRACKING_URI": f"sqlite:///{os.path.join(work_dir, 'mlflow.db')}",
+            "MLFLOW_EXPERIMENT_NAME": "pipeline_benchmark",
+            "PIPELINE_CACHE_ENABLED": "false",
+            "TRAINING_CACHE_ENABLED": "false",
+            "PROFILING_ENABLED": "true",
+            "PREFECT_HOME": os.path.join(work_dir, "prefect"),
+        }
+    )
+    # Model artifacts go below the working directory
+    os.chdir(work_dir)
+
+    import mlflow
+    from pipeline import main
+
+    start = time.perf_counter()
+    main(bucket_name=BUCKET, raw_key=RAW_KEY, processed_key=PROCESSED_KEY)
+    pipeline_s = time.perf_counter() - start
+
+    # The pipeline logs its profile on every run it trained, each tagged
+    # with the best run's ID
+    profiled_run = mlflow.search_runs(
+        filter_string="tags.best_run_id LIKE '%'",
+        order_by=["attributes.start_time DESC"],
+        max_results=1,
+        output_format="list",
+    )[0]
+    best_run_id = profiled_run.data.tags["best_run_id"]
+    records = mlflow.artifacts.load_dict(f"runs:/{best_run_id}/profile.json")[
+        "stages"
+    ]
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "rows": n_rows,
+        "generate_s": generate_s,
+        "pipeline_s": pipeline_s,
+        # ru_maxrss is in KB on Linux
+        "max_rss_mb": max(usage.ru_maxrss, children.ru_maxrss) / 1024,
+        "stages": records,
+    }
+
+
+def run_isolated(n_rows, timeout=None):
+    """
+    Run one benchmark size in a fresh interpreter, so peak memory and
+    imported state do not carry over between sizes. Returns its result, or
+    None if it failed or timed out.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, "result.json")
+        work_dir = os.path.join(tmp_dir, "work")
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.pipeline_benchmark",
+            "--worker",
+            "--rows",
+            str(n_rows),
+            "--work-dir",
+            work_dir,
+            "--output",
+            output,
+        ]
+        try:
+            subprocess.run(command, check=True, timeout=timeout)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"Benchmark with {n_rows} rows failed: {e}", file=sys.stderr)
+            return None
+        with open(output) as f:
+            return json.load(f)
+
+
+def summarize(results):
+    """
+    Return a stage table (one row per size and stage) and a totals table.
+    """
+    stages = pd.DataFrame(
+        [
+            {"rows": result["rows"], **record}
+            for result in results
+            for record in result["stages"]
+        ]
+    )
+    if not stages.empty:
+        stages = stages.groupby(["rows", "stage"], sort=False)[STAGE_COLUMNS].agg(
+            {
+                "wall_s": "sum",
+                "cpu_s": "sum",
+                "peak_rss_mb": "max",
+                "rss_growth_mb": "max",
+                "input_rows": "sum",
+            }
+        )
+    totals = pd.DataFrame(
+        [{k: v for k, v in result.items() if k != "stages"} for result in results]
+    )
+    return stages, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Seconds allowed per size"
+    )
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_pipeline(args.rows[0], args.work_dir)
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        return
+
+    results = []
+    for n_rows in args.rows:
+        result = run_isolated(n_rows, args.timeout)
+        if result is not None:
+            results.append(result)
+
+    stages, totals = summarize(results)
+    print(stages.to_string(float_format="%.2f"))
+    print()
+    print(totals.to_string(index=False, float_format="%.2f"))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
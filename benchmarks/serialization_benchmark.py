@@ -0,0 +1,107 @@
+"""
+Benchmark model artifact size, save time and load time for every model
+family in PARAM_GRIDS and every supported serialization format.
+
+Usage:
+    python -m benchmarks.serialization_benchmark --data data/training_data.csv
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+import mlflow.pyfunc
+from prefect.logging import disable_run_logger
+from mlpipeline.data_preparation import clean_data, feature_engineer
+from mlpipeline.model_training import PARAM_GRIDS, get_model_instance, split_data
+from mlpipeline.serialization import (
+    SERIALIZATION_FORMATS,
+    save_sklearn_model,
+    load_sklearn_model,
+)
+
+
+def directory_size_mb(path):
+    """
+    Return the total size of the files below a directory in MB.
+    """
+    return (
+        sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(path)
+            for name in files
+        )
+        / 1024**2
+    )
+
+
+def benchmark_family(model, formats, tmp_dir, compression_level=3):
+    """
+    Save and reload one fitted model in every format.
+    Returns one result row per format.
+    """
+    rows = []
+    for serialization_format in formats:
+        path = os.path.join(tmp_dir, serialization_format)
+        start = time.perf_counter()
+        save_sklearn_model(
+            model,
+            path,
+            serialization_format=serialization_format,
+            compression_level=compression_level,
+        )
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_sklearn_model(path)
+        load_time = time.perf_counter() - start
+
+        # Cold start of the API, which loads models through pyfunc
+        start = time.perf_counter()
+        mlflow.pyfunc.load_model(path)
+        pyfunc_load_time = time.perf_counter() - start
+
+        rows.append(
+            {
+                "format": serialization_format,
+                "size_mb": directory_size_mb(path),
+                "save_s": save_time,
+                "load_s": load_time,
+                "pyfunc_load_s": pyfunc_load_time,
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default="data/training_data.csv")
+    parser.add_argument("--compression-level", type=int, default=3)
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=[fmt for fmt in SERIALIZATION_FORMATS if fmt != "skops"],
+        choices=SERIALIZATION_FORMATS,
+    )
+    args = parser.parse_args()
+
+    # Run the preparation tasks as plain functions, outside of a flow
+    with disable_run_logger():
+        df = feature_engineer.fn(clean_data.fn(pd.read_csv(args.data)))
+    X_train, _, _, y_train, _, _ = split_data(df)
+
+    results = []
+    for model_name, param_list in PARAM_GRIDS.items():
+        model = get_model_instance(model_name, param_list[0]).fit(X_train, y_train)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for row in benchmark_family(
+                model, args.formats, tmp_dir, args.compression_level
+            ):
+                results.append({"model": model_name, **row})
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
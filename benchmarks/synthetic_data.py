@@ -0,0 +1,169 @@
+"""
+Generate synthetic HI-SEAS weather station rows in the raw schema of
+data/training_data.csv, streamed to a CSV file at any row count.
+
+Usage:
+    python -m benchmarks.synthetic_data --rows 1000000 --out data/synthetic.csv
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+RAW_COLUMNS = [
+    "UNIXTime",
+    "Data",
+    "Time",
+    "Radiation",
+    "Temperature",
+    "Pressure",
+    "Humidity",
+    "WindDirection_Degrees",
+    "Speed",
+    "TimeSunRise",
+    "TimeSunSet",
+]
+
+# HI-SEAS habitat on Mauna Loa; station clock is Hawaii time (UTC-10)
+LATITUDE = np.radians(19.6)
+UTC_OFFSET_S = -10 * 3600
+# Local clock time of solar noon (longitude 155.5W vs the 150W meridian)
+SOLAR_NOON_H = 12 + 22 / 60
+# 2016-09-01 00:00:00 Hawaii time, where the original measurements start
+START_UNIXTIME = 1472724000
+# Measurements are roughly 5 minutes apart
+INTERVAL_S = 300
+
+# "HH:MM:SS" for every second of the day, indexed by seconds since midnight
+_CLOCK = np.array(
+    [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)],
+    dtype=object,
+)
+
+
+def solar_declination(day_of_year):
+    """
+    Solar declination in radians for a day of the year.
+    """
+    return np.radians(23.44) * np.sin(2 * np.pi * (284 + day_of_year) / 365)
+
+
+def sun_times(day_of_year):
+    """
+    Local sunrise and sunset clock times in hours for a day of the year.
+    """
+    declination = solar_declination(day_of_year)
+    hour_angle = np.arccos(-np.tan(LATITUDE) * np.tan(declination))
+    half_day = np.degrees(hour_angle) / 15
+    return SOLAR_NOON_H - half_day, SOLAR_NOON_H + half_day
+
+
+def _generate_chunk(unix_time, rng):
+    local = pd.to_datetime(unix_time + UTC_OFFSET_S, unit="s")
+    seconds = (unix_time + UTC_OFFSET_S) % 86400
+    hours = seconds / 3600
+    day_of_year = local.dayofyear.to_numpy()
+    days = (unix_time + UTC_OFFSET_S) // 86400
+    n = len(unix_time)
+
+    # Clear-sky irradiance from the solar elevation, dimmed by clouds that
+    # vary from day to day and within the day
+    declination = solar_declination(day_of_year)
+    hour_angle = np.radians(15 * (hours - SOLAR_NOON_H))
+    cos_zenith = np.sin(LATITUDE) * np.sin(declination) + np.cos(LATITUDE) * np.cos(
+        declination
+    ) * np.cos(hour_angle)
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    day_clearness = rng.beta(5, 2, len(unique_days))[day_index]
+    clearness = np.clip(day_clearness * rng.lognormal(0, 0.25, n), 0.05, 1.3)
+    daylight = 1250 * clearness * np.clip(cos_zenith, 0, None) ** 1.15
+    radiation = np.round(rng.uniform(1.17, 3.0, n) + daylight, 2)
+
+    # Temperature (F) follows the sun with a lag of about two hours and
+    # cools slightly towards winter; humidity moves the other way
+    seasonal = 2.5 * np.cos(2 * np.pi * (day_of_year - 240) / 365)
+    warming = np.cos(2 * np.pi * (hours - 14) / 24)
+    temperature = 50 + seasonal + 7 * warming + 6 * day_clearness * (warming > 0)
+    temperature = np.clip(np.rint(temperature + rng.normal(0, 2, n)), 34, 71)
+    humidity = 100 - 2.2 * (temperature - 45) + rng.normal(0, 14, n)
+    humidity = np.clip(np.rint(humidity), 8, 103)
+
+    # Semi-diurnal pressure tide around 30.44 inHg
+    pressure = 30.44 + 0.03 * np.cos(4 * np.pi * (hours - 10) / 24)
+    pressure = np.round(pressure + rng.normal(0, 0.02, n), 2)
+
+    # Prevailing south-easterly wind with occasional shifts
+    prevailing = rng.random(n) < 0.65
+    direction = np.where(
+        prevailing, rng.normal(160, 35, n), rng.uniform(0, 360, n)
+    ) % 360
+    speed = np.clip(rng.gamma(3, 1.7, n), 0, 25)
+
+    sunrise, sunset = sun_times(day_of_year)
+    sunrise_s = np.rint(sunrise * 60).astype(int) * 60
+    sunset_s = np.rint(sunset * 60).astype(int) * 60
+    date_labels = np.array(
+        [
+            f"{d.month}/{d.day}/{d.year} 12:00:00 AM"
+            for d in pd.to_datetime(unique_days * 86400, unit="s")
+        ],
+        dtype=object,
+    )
+
+    return pd.DataFrame(
+        {
+            "UNIXTime": unix_time,
+            "Data": date_labels[day_index],
+            "Time": _CLOCK[seconds],
+            "Radiation": radiation,
+            "Temperature": temperature.astype(np.int64),
+            "Pressure": pressure,
+            "Humidity": humidity.astype(np.int64),
+            "WindDirection_Degrees": np.round(direction, 2) % 360,
+            "Speed": np.round(speed, 2),
+            "TimeSunRise": _CLOCK[sunrise_s],
+            "TimeSunSet": _CLOCK[sunset_s],
+        },
+        columns=RAW_COLUMNS,
+    )
+
+
+def generate_chunks(n_rows, chunk_size=500_000, seed=0, start=START_UNIXTIME):
+    """
+    Yield DataFrames of synthetic raw rows, n_rows in total, in chunks of
+    at most chunk_size rows. Timestamps advance by about INTERVAL_S seconds
+    per row, so the rows cover consecutive days and seasons.
+    """
+    rng = np.random.default_rng(seed)
+    next_time = start
+    for offset in range(0, n_rows, chunk_size):
+        n = min(chunk_size, n_rows - offset)
+        steps = INTERVAL_S + rng.integers(-3, 4, n)
+        unix_time = next_time + np.cumsum(steps) - steps[0]
+        next_time = int(unix_time[-1]) + INTERVAL_S
+        yield _generate_chunk(unix_time.astype(np.int64), rng)
+
+
+def write_csv(path, n_rows, chunk_size=500_000, seed=0):
+    """
+    Stream n_rows synthetic raw rows to a CSV file without holding them
+    all in memory. Returns the path.
+    """
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(generate_chunks(n_rows, chunk_size, seed)):
+            chunk.to_csv(f, header=i == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_csv(args.out, args.rows, args.chunk_size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
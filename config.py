@@ -25,6 +25,13 @@ def get_mlflow_config():
         "tracking_uri": tracking_uri,
         "model_name": os.getenv("MLFLOW_MODEL_NAME", "MyTopModel"),
         "experiment_name": os.getenv("MLFLOW_EXPERIMENT_NAME", "My_Model_Experiment"),
+        # Upload model artifacts concurrently in a thread pool
+        "async_logging": os.getenv("MLFLOW_ASYNC_LOGGING", "false").lower() == "true",
+        "logging_workers": int(os.getenv("MLFLOW_LOGGING_WORKERS", "4")),
+        # Model artifact format: pickle, cloudpickle, skops or joblib
+        # (zlib-compressed, served through a pyfunc wrapper)
+        "serialization_format": os.getenv("MODEL_SERIALIZATION_FORMAT", "pickle"),
+        "compression_level": int(os.getenv("MODEL_COMPRESSION_LEVEL", "3")),
     }
 
 
@@ -50,6 +57,27 @@ def get_s3_config():
     }
 
 
+# ----------------- Storage Config -----------------
+
+
+def get_storage_config():
+    """
+    Return a dictionary selecting the object storage backend (S3 or a local
+    directory) and the prediction log backend (Supabase or a local SQLite
+    file), so everything can run on one machine without cloud services.
+    """
+    return {
+        # "s3" or "local"; local objects are files under local_root/<bucket>/
+        "backend": os.getenv("STORAGE_BACKEND", "s3"),
+        "local_root": os.getenv("LOCAL_STORAGE_ROOT", "local-storage"),
+        # "supabase" or "sqlite"
+        "log_backend": os.getenv("PREDICTION_LOG_BACKEND", "supabase"),
+        "sqlite_path": os.getenv(
+            "PREDICTION_LOG_SQLITE_PATH", "local-storage/model_logs.db"
+        ),
+    }
+
+
 # ----------------- Supabase Config -----------------
 
 
@@ -78,7 +106,152 @@ def get_monitoring_config():
     return {
         "port": int(os.getenv("MONITORING_PORT", "8080")),
         "interval": int(os.getenv("MONITORING_INTERVAL", "300")),
+        # Bounds of the adaptive interval, the new logs per cycle that count
+        # as a burst, and the idle backoff factor and random jitter
+        "min_interval": int(os.getenv("MONITORING_MIN_INTERVAL", "30")),
+        "max_interval": int(os.getenv("MONITORING_MAX_INTERVAL", "3600")),
+        "busy_rows": int(os.getenv("MONITORING_BUSY_ROWS", "500")),
+        "backoff": float(os.getenv("MONITORING_BACKOFF", "2.0")),
+        "jitter": float(os.getenv("MONITORING_JITTER", "0.1")),
+        # Processes for per-feature drift analysis (1 = serial), used only
+        # from this many features on
+        "workers": int(os.getenv("MONITORING_WORKERS", "1")),
+        "parallel_min_features": int(
+            os.getenv("MONITORING_PARALLEL_MIN_FEATURES", "32")
+        ),
         "distance_feature_threshold": float(
             os.getenv("DISTANCE_FEATURE_THRESHOLD", "0.3")
         ),
+        # Most recent prediction logs analysed per cycle
+        "window_rows": int(os.getenv("MONITORING_WINDOW_ROWS", "1200")),
+        # Rows fetched per request when reading new prediction logs
+        "fetch_page_size": int(os.getenv("MONITORING_FETCH_PAGE_SIZE", "1000")),
+        # Binned detectors: PSI levels for WARNING and CRITICAL drift, and
+        # the Jensen-Shannon distance for WARNING
+        "psi_warning_threshold": float(os.getenv("PSI_WARNING_THRESHOLD", "0.1")),
+        "psi_critical_threshold": float(os.getenv("PSI_CRITICAL_THRESHOLD", "0.25")),
+        "js_distance_threshold": float(os.getenv("JS_DISTANCE_THRESHOLD", "0.15")),
+        # Seconds between Evidently reports, and the minimum gap between
+        # reports triggered early by drift status changes
+        "report_interval": int(os.getenv("EVIDENTLY_REPORT_INTERVAL", "3600")),
+        "report_min_gap": int(os.getenv("EVIDENTLY_REPORT_MIN_GAP", "300")),
+        # Seconds each monitoring stage may take before the loop moves on
+        "ingest_timeout": float(os.getenv("MONITORING_INGEST_TIMEOUT", "60")),
+        "drift_timeout": float(os.getenv("MONITORING_DRIFT_TIMEOUT", "120")),
+        "rmse_timeout": float(os.getenv("MONITORING_RMSE_TIMEOUT", "60")),
+    }
+
+
+# ----------------- Data Cache Config -----------------
+
+
+def get_cache_config():
+    """
+    Return a dictionary with result caching settings for the data
+    preparation tasks.
+    """
+    return {
+        "enabled": os.getenv("PIPELINE_CACHE_ENABLED", "true").lower() == "true",
+        # Local directory, or the slug of a Prefect storage block
+        # (e.g. "s3-bucket/pipeline-cache"); defaults to Prefect's local storage
+        "storage": os.getenv("PIPELINE_CACHE_STORAGE") or None,
+        "expiration_hours": float(os.getenv("PIPELINE_CACHE_EXPIRATION_HOURS", "24")),
+        # Recompute and overwrite cached results
+        "refresh": os.getenv("PIPELINE_CACHE_REFRESH", "false").lower() == "true",
+    }
+
+
+# ----------------- Training Config -----------------
+
+
+def get_training_config():
+    """
+    Return a dictionary with CPU budget, shared-data, hyperparameter
+    search, incremental retraining and compression settings for model
+    training.
+    """
+    return {
+        "cpu_budget": int(os.getenv("TRAINING_CPU_BUDGET", str(os.cpu_count() or 1))),
+        # Directory for memory-mapped training matrices (e.g. /dev/shm);
+        # defaults to the system temp directory
+        "shared_dir": os.getenv("TRAINING_SHARED_DIR") or None,
+        # Successive-halving hyperparameter search (replaces PARAM_GRIDS)
+        "search_enabled": os.getenv("TRAINING_SEARCH_ENABLED", "false").lower()
+        == "true",
+        "search_configs": int(os.getenv("TRAINING_SEARCH_CONFIGS", "9")),
+        "search_eta": int(os.getenv("TRAINING_SEARCH_ETA", "3")),
+        "search_min_fraction": float(os.getenv("TRAINING_SEARCH_MIN_FRACTION", "0.1")),
+        "search_time_budget": float(os.getenv("TRAINING_SEARCH_TIME_BUDGET", "600")),
+        "search_warm_start": os.getenv("TRAINING_SEARCH_WARM_START", "true").lower()
+        == "true",
+        # Retrain mode: "full", "incremental" (warm start when allowed by the
+        # staleness rules below) or "compare" (run both and log the results)
+        "retrain_mode": os.getenv("RETRAIN_MODE", "full"),
+        "incremental_growth": float(os.getenv("INCREMENTAL_GROWTH", "0.2")),
+        "incremental_replace_trees": os.getenv(
+            "INCREMENTAL_REPLACE_TREES", "true"
+        ).lower()
+        == "true",
+        "incremental_max_new_fraction": float(
+            os.getenv("INCREMENTAL_MAX_NEW_FRACTION", "0.3")
+        ),
+        "incremental_max_updates": int(os.getenv("INCREMENTAL_MAX_UPDATES", "5")),
+        "incremental_max_age_days": int(os.getenv("INCREMENTAL_MAX_AGE_DAYS", "30")),
+        # Reuse logged runs whose dataset, params and code fingerprint match
+        "cache_enabled": os.getenv("TRAINING_CACHE_ENABLED", "true").lower() == "true",
+        # Post-training compression of forests: "prune" keeps the best
+        # 1/factor of the trees, "distill" trains a 1/factor-sized forest on
+        # the teacher's predictions
+        "compression_enabled": os.getenv("COMPRESSION_ENABLED", "false").lower()
+        == "true",
+        "compression_method": os.getenv("COMPRESSION_METHOD", "prune"),
+        "compression_factor": float(os.getenv("COMPRESSION_FACTOR", "4")),
+    }
+
+
+# ----------------- Profiling Config -----------------
+
+
+def get_profiling_config():
+    """
+    Return a dictionary with the settings of the per-stage resource profiler.
+    """
+    return {
+        "enabled": os.getenv("PROFILING_ENABLED", "true").lower() == "true",
+        # Seconds between RSS samples while a stage runs
+        "interval": float(os.getenv("PROFILING_INTERVAL", "0.05")),
+    }
+
+
+# ----------------- Serving Config -----------------
+
+
+def _optional_float(name):
+    """
+    Read a float environment variable, returning None if it is unset or empty.
+    """
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def get_serving_config():
+    """
+    Return a dictionary with the serving budgets used to select the model
+    to register, and the settings of the prediction benchmark.
+    Unset budgets are not enforced.
+    """
+    return {
+        "max_latency_ms": _optional_float("SERVING_MAX_LATENCY_MS"),
+        "max_batch_latency_ms": _optional_float("SERVING_MAX_BATCH_LATENCY_MS"),
+        "max_model_size_mb": _optional_float("SERVING_MAX_MODEL_SIZE_MB"),
+        "max_load_time_s": _optional_float("SERVING_MAX_LOAD_TIME_S"),
+        # Register the lowest test RMSE model when none fits the budgets,
+        # instead of failing
+        "allow_over_budget": os.getenv("SERVING_ALLOW_OVER_BUDGET", "false").lower()
+        == "true",
+        "benchmark_repeats": int(os.getenv("SERVING_BENCHMARK_REPEATS", "20")),
+        "benchmark_batch_size": int(os.getenv("SERVING_BENCHMARK_BATCH_SIZE", "1000")),
+        # Reload the selected model from MLflow before registering it
+        "verify_logged_model": os.getenv("SERVING_VERIFY_LOGGED_MODEL", "false").lower()
+        == "true",
     }
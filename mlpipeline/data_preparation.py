@@ -1,33 +1,108 @@
 import pandas as pd  # type: ignore
 import numpy as np  # type: ignore
-import boto3  # type: ignore
-from io import StringIO
 from prefect import task, flow, get_run_logger  # type: ignore
 from typing import Optional
+from datetime import timedelta
+from pathlib import Path
+import hashlib
+import inspect
+import json
 import os
 from dotenv import load_dotenv  # type: ignore
+from config import get_cache_config
+from mlpipeline.profiling import profiled
+from mlpipeline.storage import get_storage, read_csv, write_csv
 
 # Load environment variables from .env if present
 load_dotenv()
 
 
+def _cache_key(context, *parts):
+    """
+    Hash a task's name and source code together with the given parts, so
+    editing a task invalidates its cached results.
+    """
+    digest = hashlib.sha256(context.task.name.encode())
+    digest.update(inspect.getsource(context.task.fn).encode())
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+    return digest.hexdigest()
+
+
+def s3_object_cache_key(context, parameters):
+    """
+    Cache key for loading a stored object: its location and ETag, which
+    changes whenever the object is rewritten with different content.
+    Returns None (no caching) if the object cannot be inspected.
+    """
+    try:
+        etag = get_storage(parameters.get("aws_profile")).etag(
+            parameters["bucket_name"], parameters["file_key"]
+        )
+    except Exception:
+        return None
+    return _cache_key(context, parameters["bucket_name"], parameters["file_key"], etag)
+
+
+def dataframe_cache_key(context, parameters):
+    """
+    Cache key for a task taking a DataFrame: a content hash of its column
+    names, dtypes, index and values.
+    """
+    df = parameters["df"]
+    return _cache_key(
+        context,
+        json.dumps([(str(c), str(t)) for c, t in df.dtypes.items()]),
+        pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes(),
+    )
+
+
+def cache_options(cache_key_fn):
+    """
+    Prefect task options that persist results and reuse them for inputs
+    with the same cache key, or no options if caching is disabled.
+    Reads the cache config when called.
+    """
+    config = get_cache_config()
+    if not config["enabled"]:
+        return {}
+    storage = config["storage"]
+    if storage and (os.path.isabs(storage) or storage.startswith(".")):
+        storage = Path(storage).resolve()
+    return {
+        "cache_key_fn": cache_key_fn,
+        "cache_expiration": timedelta(hours=config["expiration_hours"]),
+        "persist_result": True,
+        "result_storage": storage,
+        "refresh_cache": config["refresh"],
+    }
+
+
+def cached(task, cache_key_fn, refresh_cache=False):
+    """
+    Return task with the caching options of the current cache config,
+    resolved at call time so config changes apply to the next run.
+    refresh_cache recomputes and overwrites the cached result.
+    """
+    options = cache_options(cache_key_fn)
+    if options and refresh_cache:
+        options["refresh_cache"] = True
+    return task.with_options(**options)
+
+
 @task(name="Load Data from S3", retries=1, retry_delay_seconds=10)
+@profiled
 def load_data_s3(bucket_name, file_key, aws_profile=None):
     """
-    Loads a CSV file from S3 into a pandas DataFrame.
+    Loads a CSV file from S3 (or the local storage backend, see
+    STORAGE_BACKEND) into a pandas DataFrame.
     Optionally uses a specific AWS profile.
     """
     logger = get_run_logger()
     logger.info(f"Loading data from S3 bucket: {bucket_name}, key: {file_key}")
 
-    # Create a boto3 session, optionally with a specific AWS profile
-    session = (
-        boto3.Session(profile_name=aws_profile) if aws_profile else boto3.Session()
-    )
-    s3 = session.client("s3")
-    # Download the object and read it into a DataFrame
-    obj = s3.get_object(Bucket=bucket_name, Key=file_key)
-    df = pd.read_csv(StringIO(obj["Body"].read().decode("utf-8")))
+    # Stream the object straight into the CSV parser
+    df = read_csv(bucket_name, file_key, aws_profile)
 
     logger.info(f"Data loaded from S3: {df.shape[0]} rows, {df.shape[1]} columns")
     return df
@@ -36,17 +111,14 @@ def load_data_s3(bucket_name, file_key, aws_profile=None):
 @task(name="Upload processed data to S3", retries=1, retry_delay_seconds=10)
 def upload_df_to_s3(df: pd.DataFrame, bucket: str, key: str):
     """
-    Uploads a DataFrame as a CSV to the specified S3 bucket and key.
+    Uploads a DataFrame as a CSV to the specified S3 bucket and key
+    (or the local storage backend, see STORAGE_BACKEND).
     """
-    # Convert DataFrame to CSV in memory
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False)
-    # Upload to S3
-    s3 = boto3.client("s3")
-    s3.put_object(Bucket=bucket, Key=key, Body=csv_buffer.getvalue())
+    write_csv(df, bucket, key)
 
 
 @task(name="Clean Data")
+@profiled
 def clean_data(df):
     """
     Removes duplicate rows and drops rows where all values are NA.
@@ -63,6 +135,7 @@ def clean_data(df):
 
 
 @task(name="Feature Engineering")
+@profiled
 def feature_engineer(df):
     """
     Adds time-based and cyclical features to the DataFrame for modeling.
@@ -134,10 +207,14 @@ def feature_engineer(df):
 
 
 @flow(name="Load and Preprocess Data")
-def load_and_prepare_data(file_key: str, bucket_name: Optional[str] = None):
+@profiled
+def load_and_prepare_data(
+    file_key: str, bucket_name: Optional[str] = None, refresh_cache: bool = False
+):
     """
     Loads data from S3, cleans it, performs feature engineering, and uploads
-    the processed data back to S3.
+    the processed data back to S3. Each stage reuses its cached result for
+    unchanged inputs unless refresh_cache is set.
     Returns the processed DataFrame.
     """
     logger = get_run_logger()
@@ -153,11 +230,14 @@ def load_and_prepare_data(file_key: str, bucket_name: Optional[str] = None):
              Only S3 loading is supported."""
         )
     logger.info(f"Loading data from S3: bucket={bucket}, key={key}")
-    df = load_data_s3(bucket, key)
+    load = cached(load_data_s3, s3_object_cache_key, refresh_cache)
+    clean = cached(clean_data, dataframe_cache_key, refresh_cache)
+    engineer = cached(feature_engineer, dataframe_cache_key, refresh_cache)
+    df = load(bucket, key)
 
     # Clean and engineer features
-    df = clean_data(df)
-    df = feature_engineer(df)
+    df = clean(df)
+    df = engineer(df)
 
     # Save processed data to S3
     if key.startswith("raw-data/"):
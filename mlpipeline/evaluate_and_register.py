@@ -1,7 +1,23 @@
+import os
+import tempfile
+import time
+import numpy as np
 import mlflow
 from mlflow.tracking import MlflowClient
 from sklearn.metrics import root_mean_squared_error, r2_score
+from mlpipeline.serialization import load_sklearn_model, save_sklearn_model
+from mlpipeline.model_logging import wait_for_model_artifact
 from prefect import task, flow, get_run_logger
+from config import get_serving_config
+from mlpipeline.profiling import profiled
+
+# Serving benchmark results checked against the budgets of get_serving_config
+SERVING_BUDGETS = {
+    "single_row_latency_ms": "max_latency_ms",
+    "batch_latency_ms": "max_batch_latency_ms",
+    "model_size_mb": "max_model_size_mb",
+    "load_time_s": "max_load_time_s",
+}
 
 
 @task(name="Evaluate Model on Test Set")
@@ -22,6 +38,132 @@ def evaluate_model_on_test(model, X_test, y_test):
     return {"test_rmse": test_rmse, "test_r2": test_r2}
 
 
+@task(name="Benchmark Model Serving")
+def benchmark_serving(
+    model,
+    X_test,
+    repeats=20,
+    batch_size=1000,
+    serialization_format="pickle",
+    compression_level=3,
+):
+    """
+    Measure the serving cost of a model: median single-row and batch
+    prediction latency, plus the size and load time of the model directory
+    saved in the serialization format it is logged and deployed with.
+    """
+    logger = get_run_logger()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "model")
+        save_sklearn_model(
+            model,
+            path,
+            serialization_format=serialization_format,
+            compression_level=compression_level,
+        )
+        model_size = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(path)
+            for name in files
+        )
+        start = time.perf_counter()
+        load_sklearn_model(path)
+        load_time = time.perf_counter() - start
+
+    row = X_test.iloc[:1]
+    batch = X_test.iloc[:batch_size]
+    model.predict(row)  # warm-up, not timed
+    single_times, batch_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        single_times.append(time.perf_counter() - start)
+    for _ in range(max(1, repeats // 5)):
+        start = time.perf_counter()
+        model.predict(batch)
+        batch_times.append(time.perf_counter() - start)
+
+    costs = {
+        "single_row_latency_ms": float(np.median(single_times)) * 1000,
+        "batch_latency_ms": float(np.median(batch_times)) * 1000,
+        "model_size_mb": model_size / 1024**2,
+        "load_time_s": load_time,
+    }
+    logger.info(
+        f"Single-row latency: {costs['single_row_latency_ms']:.2f}ms, "
+        f"batch latency ({len(batch)} rows): {costs['batch_latency_ms']:.2f}ms, "
+        f"size: {costs['model_size_mb']:.2f}MB, load: {costs['load_time_s']:.3f}s"
+    )
+    return costs
+
+
+def exceeded_budgets(result, serving_config):
+    """
+    Return the names of the serving budgets a test result exceeds.
+    """
+    return [
+        name
+        for name, budget in SERVING_BUDGETS.items()
+        if serving_config.get(budget) is not None
+        and result[name] > serving_config[budget]
+    ]
+
+
+def budgets_enabled(serving_config):
+    """
+    Return whether any serving budget is set.
+    """
+    return any(
+        serving_config.get(budget) is not None for budget in SERVING_BUDGETS.values()
+    )
+
+
+def select_best_run(test_results, serving_config, logger=None):
+    """
+    Pick the run with the lowest test RMSE among those within every
+    serving budget. When no run fits the budgets, raises a RuntimeError,
+    unless allow_over_budget is set: then the lowest test RMSE overall
+    is picked.
+    """
+    eligible = []
+    for result in test_results:
+        exceeded = exceeded_budgets(result, serving_config)
+        if exceeded and logger:
+            logger.info(
+                f"{result['model_name']} ({result['run_id']}) exceeds "
+                f"serving budgets: {', '.join(exceeded)}"
+            )
+        if not exceeded:
+            eligible.append(result)
+
+    if not eligible:
+        if not serving_config.get("allow_over_budget"):
+            raise RuntimeError(
+                f"None of the {len(test_results)} models fits the serving budgets"
+            )
+        if logger:
+            logger.warning(
+                "No model fits the serving budgets; selecting by test RMSE only"
+            )
+        eligible = test_results
+    return min(eligible, key=lambda x: x["test_rmse"])
+
+
+@task(name="Verify Logged Model")
+def verify_logged_model(run_id, model, X_sample):
+    """
+    Load a logged model back from MLflow and check that it predicts the
+    same values as the in-memory model it was logged from.
+    """
+    logger = get_run_logger()
+    logger.info(f"Verifying logged model for run_id: {run_id}")
+    loaded = load_sklearn_model(f"runs:/{run_id}/model")
+    if not np.allclose(loaded.predict(X_sample), model.predict(X_sample)):
+        raise ValueError(
+            f"Model logged for run {run_id} does not match the trained model"
+        )
+
+
 @task(name="Log Test Metrics to MLflow")
 def log_test_metrics_to_mlflow(run_id, test_metrics):
     """
@@ -49,16 +191,29 @@ def register_best_model(best_run, registry_model_name="MyTopModel"):
     )
 
     client = MlflowClient()
+    # A cached run may already be the production version
+    for mv in client.search_model_versions(f"run_id='{best_run['run_id']}'"):
+        if mv.name == registry_model_name and mv.tags.get("status") == "production":
+            logger.info(f"Run is already registered as production version {mv.version}")
+            return mv.version
+
     # Build the model URI for MLflow
     model_uri = f"runs:/{best_run['run_id']}/model"
     # Register the model in the MLflow Model Registry
     registered_model = mlflow.register_model(model_uri, registry_model_name)
     version = registered_model.version
 
-    # Set tags for the registered model and version
+    # Set tags for the registered model and version, including the
+    # training lineage (training mode, incremental update count)
+    # Serving costs from benchmark_serving are recorded next to test RMSE
+    serving = {
+        name: f"{best_run[name]:.4f}" for name in SERVING_BUDGETS if name in best_run
+    }
     tags = {
+        **best_run.get("tags", {}),
         "model_type": best_run["model_name"],
         "test_rmse": str(best_run["test_rmse"]),
+        **serving,
         "model_framework": best_run["model_name"],
         "status": "production",  # mark this version as production
     }
@@ -87,39 +242,79 @@ def register_best_model(best_run, registry_model_name="MyTopModel"):
     retries=1,
     retry_delay_seconds=10,
 )
-def evaluate_and_register(logged_runs, X_test, y_test):
+@profiled
+def evaluate_and_register(
+    logged_runs, X_test, y_test, serialization_format="pickle", compression_level=3
+):
     """
     Evaluate the models on the test set, log their metrics,
-    and register the best one in the model registry.
+    and register the best one in the model registry. Each model's serving
+    latency, size and load time are benchmarked, the latter two in the
+    serialization format the models are logged with, and the best model
+    within the serving budgets of get_serving_config is registered.
+    Without budgets, the top 3 models by validation RMSE are evaluated;
+    with budgets, every model is, since the cheaper ones that fit them
+    often rank lower.
     Returns the best run and all test results.
     """
     logger = get_run_logger()
-    logger.info("Evaluating top 3 models on the test set")
+    serving_config = get_serving_config()
 
     # Select runs based on validation RMSE
-    top_3_runs = sorted(logged_runs, key=lambda x: x["val_rmse"])[:3]
+    candidates = sorted(logged_runs, key=lambda x: x["val_rmse"])
+    if not budgets_enabled(serving_config):
+        candidates = candidates[:3]
+    logger.info(f"Evaluating {len(candidates)} models on the test set")
     test_results = []
 
-    # Evaluate each of the models on the test set
-    for run in top_3_runs:
-        logger.info(f"Loading model for run_id: {run['run_id']}")
-        # Load the model from MLflow using the run ID
-        model_uri = f"runs:/{run['run_id']}/model"
-        model = mlflow.sklearn.load_model(model_uri)
+    # Evaluate the models on the test set in parallel, reusing the fitted
+    # models in memory instead of downloading them from MLflow
+    futures = []
+    for run in candidates:
+        model = run.get("model")
+        if model is None:
+            logger.info(f"Loading model for run_id: {run['run_id']}")
+            model = load_sklearn_model(f"runs:/{run['run_id']}/model")
+            run = {**run, "model": model}
         # Use only the features used during training
         X_test_subset = X_test[run["features"]]
+        future = evaluate_model_on_test.submit(model, X_test_subset, y_test)
+        futures.append((run, future))
 
-        # Evaluate and log test metrics
-        test_metrics = evaluate_model_on_test(model, X_test_subset, y_test)
+    for run, future in futures:
+        test_metrics = future.result()
+        # Benchmark serially so parallel work does not distort latencies
+        test_metrics.update(
+            benchmark_serving(
+                run["model"],
+                X_test[run["features"]],
+                repeats=serving_config["benchmark_repeats"],
+                batch_size=serving_config["benchmark_batch_size"],
+                serialization_format=serialization_format,
+                compression_level=compression_level,
+            )
+        )
         test_results.append(
-            {"run_id": run["run_id"], "model_name": run["model_name"], **test_metrics}
+            {
+                "run_id": run["run_id"],
+                "model_name": run["model_name"],
+                "tags": run.get("tags", {}),
+                **test_metrics,
+            }
         )
 
         # Log test metrics to MLflow for this run
         log_test_metrics_to_mlflow(run["run_id"], test_metrics)
 
-    # Select the best run based on test RMSE
-    best_run = min(test_results, key=lambda x: x["test_rmse"])
+    # Select the best run based on test RMSE within the serving budgets
+    best_run = select_best_run(test_results, serving_config, logger)
+    best = next(run for run, _ in futures if run["run_id"] == best_run["run_id"])
+    # Registration needs the artifact, so wait for its upload to finish
+    wait_for_model_artifact(best["run_id"])
+    if serving_config["verify_logged_model"]:
+        verify_logged_model(
+            best["run_id"], best["model"], X_test[best["features"]].iloc[:100]
+        )
     # Register the best model in the registry
     version = register_best_model(best_run)
 
@@ -0,0 +1,199 @@
+import ast
+import math
+import random
+import time
+from mlflow.tracking import MlflowClient
+
+# Search spaces for each model family
+SEARCH_SPACES = {
+    "RandomForest": {
+        "n_estimators": [100, 200, 300, 500],
+        "max_depth": [10, 15, 20, None],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": [1.0, 0.5, "sqrt"],
+    },
+    "GradientBoosting": {
+        "n_estimators": [100, 200, 300],
+        "max_depth": [3, 4, 5, 6],
+        "learning_rate": [0.03, 0.05, 0.1],
+        "subsample": [0.8, 1.0],
+    },
+    "KNN": {
+        "n_neighbors": [3, 5, 7, 10, 15],
+        "weights": ["uniform", "distance"],
+    },
+    "HistGradientBoosting": {
+        "max_iter": [300, 500, 1000],
+        "learning_rate": [0.03, 0.05, 0.1],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [10, 20, 40],
+        "l2_regularization": [0.0, 0.1, 1.0],
+        "early_stopping": [True],
+    },
+}
+
+
+def parse_param(value):
+    """
+    Convert an MLflow string parameter back to its Python value.
+    """
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def get_production_params(registry_model_name="MyTopModel"):
+    """
+    Return (model_name, params) of the current production model version,
+    or (None, {}) if there is none.
+    """
+    client = MlflowClient()
+    for mv in client.search_model_versions(f"name='{registry_model_name}'"):
+        if mv.tags.get("status") == "production":
+            run = client.get_run(mv.run_id)
+            params = {k: parse_param(v) for k, v in run.data.params.items()}
+            return mv.tags.get("model_type"), params
+    return None, {}
+
+
+def sample_configs(space, n_configs, rng, seed_params=None):
+    """
+    Sample up to n_configs distinct configurations from a search space.
+    seed_params, if given, is always the first configuration.
+    """
+    configs = [dict(seed_params)] if seed_params else []
+    limit = min(n_configs, math.prod(len(v) for v in space.values()) + len(configs))
+    for _ in range(50 * n_configs):
+        if len(configs) >= limit:
+            break
+        config = {name: rng.choice(values) for name, values in space.items()}
+        if config not in configs:
+            configs.append(config)
+    return configs
+
+
+def successive_halving(
+    configs,
+    train_fn,
+    n_rows,
+    eta=3,
+    min_fraction=0.1,
+    time_budget=None,
+    logger=None,
+):
+    """
+    Run successive halving over every model family at once.
+
+    configs maps model names to lists of params. Each rung trains all
+    surviving candidates on the first fraction of the training rows via
+    train_fn(candidates, n_rows=..., timeout=...), keeps the best 1/eta of each
+    family by validation RMSE and grows the fraction by eta, until one
+    candidate per family is left on the full data or the time budget runs
+    out. train_fn returns (model, train_time, val_rmse, val_r2) per
+    candidate, or None for candidates that did not finish in time.
+
+    Returns a dict mapping each model name to its best result with keys
+    params, model, fraction, train_time, val_rmse and val_r2.
+    """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    survivors = {name: list(params) for name, params in configs.items() if params}
+    best = {}
+
+    # Data fractions per rung, ending on the full training set
+    n_rungs = max(
+        1 + math.ceil(math.log(len(params), eta)) for params in survivors.values()
+    )
+    fractions = [
+        max(min_fraction, float(eta) ** (rung - n_rungs + 1)) for rung in range(n_rungs)
+    ]
+
+    for fraction in fractions:
+        rung_rows = max(1, int(n_rows * fraction))
+        # Interleave families so a budget cut mid-rung still covers each one
+        candidates = [
+            (name, param_list[i])
+            for i in range(max(len(param_list) for param_list in survivors.values()))
+            for name, param_list in survivors.items()
+            if i < len(param_list)
+        ]
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+        if logger:
+            logger.info(
+                f"Search rung: {len(candidates)} candidates on "
+                f"{rung_rows}/{n_rows} rows"
+            )
+
+        results = train_fn(candidates, n_rows=rung_rows, timeout=timeout)
+
+        scored = {}
+        for (name, params), result in zip(candidates, results):
+            if result is None:
+                continue
+            model, train_time, val_rmse, val_r2 = result
+            scored.setdefault(name, []).append(
+                {
+                    "params": params,
+                    "model": model,
+                    "fraction": rung_rows / n_rows,
+                    "train_time": train_time,
+                    "val_rmse": val_rmse,
+                    "val_r2": val_r2,
+                }
+            )
+
+        # Keep the best 1/eta candidates of each family for the next rung
+        for name, entries in scored.items():
+            entries.sort(key=lambda entry: entry["val_rmse"])
+            best[name] = entries[0]
+            keep = max(1, len(survivors[name]) // eta)
+            survivors[name] = [entry["params"] for entry in entries[:keep]]
+
+        # Stop early if the time budget ran out during the rung
+        if any(result is None for result in results):
+            break
+
+    return best
+
+
+def search_models(
+    train_fn,
+    n_rows,
+    n_configs=9,
+    eta=3,
+    min_fraction=0.1,
+    time_budget=None,
+    seed=42,
+    warm_start=None,
+    logger=None,
+):
+    """
+    Sample configurations for every family in SEARCH_SPACES and select the
+    best one per family with successive halving. warm_start is an optional
+    (model_name, params) pair, e.g. the previous production run's best
+    params, which is always evaluated for its family.
+    """
+    rng = random.Random(seed)
+    warm_name, warm_params = warm_start or (None, {})
+    configs = {
+        name: sample_configs(
+            space,
+            n_configs,
+            rng,
+            seed_params=warm_params if name == warm_name else None,
+        )
+        for name, space in SEARCH_SPACES.items()
+    }
+    return successive_halving(
+        configs,
+        train_fn,
+        n_rows,
+        eta=eta,
+        min_fraction=min_fraction,
+        time_budget=time_budget,
+        logger=logger,
+    )
@@ -0,0 +1,220 @@
+import time
+import pandas as pd
+from datetime import datetime, timezone
+from mlflow.tracking import MlflowClient
+from mlpipeline.serialization import load_sklearn_model
+from prefect import task, get_run_logger
+from config import get_training_config, get_mlflow_config
+from mlpipeline.model_training import (
+    split_data,
+    evaluate_model,
+    set_model_n_jobs,
+    measure_model_costs,
+)
+from mlpipeline.preprocessing_utils import new_row_mask
+from mlpipeline.profiling import profiled
+
+# Model families that can be extended in place with warm_start, mapped to
+# the parameter that sets their number of trees or boosting stages.
+# HistGradientBoosting is left out: fit rebuilds its feature bins from the
+# data given, so the old trees would split on bins of the recent rows only.
+WARM_START_FAMILIES = {
+    "RandomForest": "n_estimators",
+    "GradientBoosting": "n_estimators",
+}
+
+
+def load_production_model(registry_model_name="MyTopModel"):
+    """
+    Load the current production model and its registry metadata.
+    Returns None if no production version exists.
+    """
+    client = MlflowClient()
+    for mv in client.search_model_versions(f"name='{registry_model_name}'"):
+        if mv.tags.get("status") == "production":
+            model_uri = f"models:/{registry_model_name}/{mv.version}"
+            model = load_sklearn_model(model_uri)
+            run = client.get_run(mv.run_id)
+            return {
+                "version": mv.version,
+                "model": model,
+                "model_name": mv.tags.get("model_type"),
+                "params": dict(run.data.params),
+                "incremental_updates": int(mv.tags.get("incremental_updates", 0)),
+                "last_full_refit": mv.tags.get(
+                    "last_full_refit",
+                    datetime.fromtimestamp(
+                        mv.creation_timestamp / 1000, tz=timezone.utc
+                    ).isoformat(),
+                ),
+            }
+    return None
+
+
+def needs_full_refit(production, features, n_recent_rows, n_total_rows, config):
+    """
+    Apply staleness rules to decide whether the production model can be
+    updated incrementally. Returns (full_refit_required, reason).
+    """
+    if production is None:
+        return True, "no production model"
+    if production["model_name"] not in WARM_START_FAMILIES:
+        return True, f"{production['model_name']} does not support warm start"
+    if list(getattr(production["model"], "feature_names_in_", features)) != features:
+        return True, "feature set changed"
+    if n_recent_rows <= 0:
+        return True, "no new rows"
+    if n_recent_rows / max(n_total_rows, 1) > config["incremental_max_new_fraction"]:
+        return True, "new data exceeds the incremental fraction"
+    if production["incremental_updates"] >= config["incremental_max_updates"]:
+        return True, "too many incremental updates since the last full refit"
+
+    last_full_refit = datetime.fromisoformat(production["last_full_refit"])
+    age_days = (datetime.now(timezone.utc) - last_full_refit).days
+    if age_days > config["incremental_max_age_days"]:
+        return True, f"last full refit was {age_days} days ago"
+    return False, "incremental update allowed"
+
+
+def incremental_update(model, model_name, X_recent, y_recent, growth, replace):
+    """
+    Extend a fitted ensemble with estimators trained on recent data.
+    RandomForest gets new trees fitted on the recent rows; with replace,
+    the same number of oldest trees is dropped to keep the forest size.
+    Gradient boosting models get additional boosting stages fitted on the
+    residuals of the recent rows. warm_start is restored afterwards.
+    Returns the updated model.
+    """
+    size_param = WARM_START_FAMILIES[model_name]
+    current = model.get_params()[size_param]
+    n_new = max(1, int(current * growth))
+    original_warm_start = model.get_params()["warm_start"]
+    model.set_params(warm_start=True, **{size_param: current + n_new})
+    model.fit(X_recent, y_recent)
+    model.set_params(warm_start=original_warm_start)
+
+    if model_name == "RandomForest" and replace:
+        model.estimators_ = model.estimators_[n_new:]
+        model.n_estimators = len(model.estimators_)
+    return model
+
+
+@task(name="Incremental Retrain")
+@profiled
+def incremental_retrain(df):
+    """
+    Update the production model with the rows of the prepared dataset
+    marked as new (see new_row_mask) instead of refitting from scratch.
+    Only the new rows that fall into the training split are used for the
+    update, so validation and test sets match a full retrain. Returns the
+    same tuple as train_tune_models, or None if the staleness rules
+    require a full refit.
+    """
+    logger = get_run_logger()
+    config = get_training_config()
+
+    X_train, X_val, X_test, y_train, y_val, y_test = split_data(df)
+    features = X_train.columns.tolist()
+    new_rows = new_row_mask(df)
+
+    production = load_production_model(get_mlflow_config()["model_name"])
+    full_refit, reason = needs_full_refit(
+        production, features, int(new_rows.sum()), len(df), config
+    )
+    if full_refit:
+        logger.info(f"Full refit required: {reason}")
+        return None
+
+    recent = new_rows.loc[X_train.index].to_numpy()
+    X_recent, y_recent = X_train[recent], y_train[recent]
+    model_name = production["model_name"]
+    logger.info(
+        f"Incrementally updating {model_name} v{production['version']} "
+        f"with {len(X_recent)} recent rows"
+    )
+
+    model = production["model"]
+    set_model_n_jobs(model, config["cpu_budget"])
+    start = time.perf_counter()
+    model = incremental_update(
+        model,
+        model_name,
+        X_recent,
+        y_recent,
+        growth=config["incremental_growth"],
+        replace=config["incremental_replace_trees"],
+    )
+    train_time = time.perf_counter() - start
+    set_model_n_jobs(model, None)
+
+    val_rmse, val_r2 = evaluate_model(model, X_val, y_val)
+    costs = measure_model_costs(model, X_val)
+    logger.info(
+        f"Incremental {model_name} | Val RMSE: {val_rmse:.4f}, "
+        f"Val R2: {val_r2:.4f} | Train time: {train_time:.2f}s"
+    )
+
+    size_param = WARM_START_FAMILIES[model_name]
+    run = {
+        "model_name": model_name,
+        "params": {**production["params"], size_param: model.get_params()[size_param]},
+        "features": features,
+        "val_rmse": val_rmse,
+        "val_r2": val_r2,
+        "model": model,
+        "metrics": {"train_time_s": train_time, **costs},
+        "tags": {
+            "training_mode": "incremental",
+            "base_version": str(production["version"]),
+            "incremental_updates": str(production["incremental_updates"] + 1),
+            "last_full_refit": production["last_full_refit"],
+        },
+    }
+    return [run], X_val, X_test, y_test
+
+
+def compare_retrain_modes(all_runs, df, logger):
+    """
+    Choose between the incremental and full retrain runs on a holdout of
+    the new rows outside the training split, which no candidate has
+    trained on: the full refit only sees the training split, and the
+    production model being updated never saw the new data. The other
+    validation and test rows cannot be used, since split_data reshuffles
+    the merged data and the production model's old trees may have been
+    trained on them.
+    Returns the runs of the winning mode, so the registry only compares
+    runs trained on the same split. Every run gets its holdout RMSE as
+    new_holdout_rmse and the choice as the compare_selected_mode tag.
+    """
+    _, X_val, X_test, _, y_val, y_test = split_data(df)
+    X_holdout, y_holdout = pd.concat([X_val, X_test]), pd.concat([y_val, y_test])
+    holdout = new_row_mask(df).loc[X_holdout.index].to_numpy()
+    X_holdout, y_holdout = X_holdout[holdout], y_holdout[holdout]
+
+    best = {}
+    for run in all_runs:
+        mode = run["tags"]["training_mode"]
+        rmse = float("nan")
+        if len(X_holdout):
+            rmse, _ = evaluate_model(run["model"], X_holdout, y_holdout)
+            run["metrics"]["new_holdout_rmse"] = rmse
+            best[mode] = min(best.get(mode, rmse), rmse)
+        logger.info(
+            f"[{mode}] {run['model_name']} | Val RMSE: {run['val_rmse']:.4f} | "
+            f"New-row holdout RMSE: {rmse:.4f} | "
+            f"Train time: {run['metrics']['train_time_s']:.2f}s"
+        )
+
+    if "incremental" in best and best["incremental"] < best.get("full", float("inf")):
+        selected = "incremental"
+    else:
+        # Without a holdout, keep the full refit, whose test RMSE is unbiased
+        selected = "full"
+    logger.info(
+        f"Selected the {selected} retrain on {len(X_holdout)} new holdout rows"
+    )
+
+    for run in all_runs:
+        run["tags"]["compare_selected_mode"] = selected
+        run["tags"]["compare_holdout_rows"] = str(len(X_holdout))
+    return [run for run in all_runs if run["tags"]["training_mode"] == selected]
@@ -0,0 +1,192 @@
+import copy
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+from prefect import task, get_run_logger
+from config import get_training_config
+from mlpipeline.model_training import (
+    split_data,
+    evaluate_model,
+    set_model_n_jobs,
+    measure_model_costs,
+)
+from mlpipeline.training_cache import (
+    COMPRESSION_MODULES,
+    code_version,
+    training_fingerprint,
+    find_cached_run,
+)
+from mlpipeline.profiling import profiled
+
+# Model families the compression stage can shrink
+COMPRESSIBLE_FAMILIES = {"RandomForest"}
+
+# Validation rows used to rank trees when pruning
+PRUNE_SELECTION_ROWS = 5000
+
+
+def prune_forest(model, X_select, y_select, factor):
+    """
+    Keep 1/factor of a fitted forest's trees, chosen by greedy forward
+    selection: each step adds the tree that lowers the RMSE of the averaged
+    prediction on the selection rows the most. The selection rows must not
+    have been used to fit the forest: on its own training rows the trees
+    that overfit them most would look best.
+    Returns a pruned copy of the model.
+    """
+    n_keep = max(1, int(len(model.estimators_) / factor))
+    # Trees were fitted on numpy arrays, so skip the feature-name check
+    X = np.asarray(X_select, dtype=np.float32)
+    y = np.asarray(y_select, dtype=np.float64)
+    tree_preds = np.stack([tree.predict(X) for tree in model.estimators_])
+
+    selected = []
+    total = np.zeros(len(y))
+    remaining = list(range(len(model.estimators_)))
+    for k in range(1, n_keep + 1):
+        # Mean squared error of the ensemble after adding each candidate
+        errors = (((total + tree_preds[remaining]) / k - y) ** 2).mean(axis=1)
+        best = remaining.pop(int(np.argmin(errors)))
+        selected.append(best)
+        total += tree_preds[best]
+
+    pruned = copy.deepcopy(model)
+    pruned.estimators_ = [pruned.estimators_[i] for i in sorted(selected)]
+    pruned.n_estimators = n_keep
+    return pruned
+
+
+def distill_forest(model, X_train, factor, random_state=42):
+    """
+    Train a forest with 1/factor of the teacher's trees on the teacher's
+    predictions for the training rows. The smoothed targets let the smaller
+    student match the teacher more closely than refitting on the labels.
+    """
+    params = model.get_params()
+    student = RandomForestRegressor(
+        n_estimators=max(1, int(params["n_estimators"] / factor)),
+        max_depth=params["max_depth"],
+        min_samples_leaf=params["min_samples_leaf"],
+        max_features=params["max_features"],
+        n_jobs=params["n_jobs"],
+        random_state=random_state,
+    )
+    student.fit(X_train, model.predict(X_train))
+    return student
+
+
+@task(name="Compress Models")
+@profiled
+def compress_models(all_runs, df):
+    """
+    Build a lightweight serving model for every compressible run, either by
+    pruning its trees or by distilling it into a smaller forest, as set by
+    the compression method and factor of the training config. Returns the
+    compressed runs, to be logged as siblings of their teachers with the
+    RMSE delta, size and latency of the compressed model. val_rmse covers
+    every validation row, like the other runs it is ranked against. Pruned
+    models also report holdout_rmse, on the half of the validation rows
+    not used for tree selection, and take their RMSE delta against the
+    teacher on it.
+    """
+    logger = get_run_logger()
+    config = get_training_config()
+    method = config["compression_method"]
+    factor = config["compression_factor"]
+    if method not in ("prune", "distill"):
+        raise ValueError(f"Unsupported compression method: {method}")
+
+    X_train, X_val, _, _, y_val, _ = split_data(df)
+    # Pruning ranks trees on one half of the validation rows and is
+    # measured on the other, which neither the forest nor the selection saw
+    X_select, X_check, y_select, y_check = train_test_split(
+        X_val, y_val, test_size=0.5, random_state=42
+    )
+    X_select = X_select[:PRUNE_SELECTION_ROWS]
+    y_select = y_select[:PRUNE_SELECTION_ROWS]
+    code = code_version(COMPRESSION_MODULES)
+    compressed_runs = []
+
+    for run in all_runs:
+        if run["model_name"] not in COMPRESSIBLE_FAMILIES:
+            continue
+        # Compressed runs are cached like training runs, keyed by the
+        # teacher's fingerprint, the compression settings and the
+        # compression code
+        fingerprint = None
+        if "fingerprint" in run.get("tags", {}):
+            fingerprint = training_fingerprint(
+                run["tags"]["fingerprint"],
+                "compressed",
+                {"method": method, "factor": factor},
+                code,
+            )
+            if config["cache_enabled"]:
+                try:
+                    cached = find_cached_run(
+                        fingerprint, run["model_name"], run["features"]
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not look up cached runs in MLflow: {e}")
+                    cached = None
+                if cached is not None:
+                    logger.info(f"Reusing compressed run {cached['run_id']}")
+                    compressed_runs.append(cached)
+                    continue
+
+        teacher = run["model"]
+        set_model_n_jobs(teacher, config["cpu_budget"])
+        start = time.perf_counter()
+        if method == "prune":
+            model = prune_forest(teacher, X_select, y_select, factor)
+        else:
+            model = distill_forest(teacher, X_train, factor)
+        compress_time = time.perf_counter() - start
+        set_model_n_jobs(teacher, None)
+        set_model_n_jobs(model, None)
+
+        val_rmse, val_r2 = evaluate_model(model, X_val, y_val)
+        holdout = {}
+        if method == "prune":
+            holdout_rmse, _ = evaluate_model(model, X_check, y_check)
+            teacher_rmse, _ = evaluate_model(teacher, X_check, y_check)
+            rmse_delta = holdout_rmse - teacher_rmse
+            holdout = {"holdout_rmse": holdout_rmse}
+        else:
+            rmse_delta = val_rmse - run["val_rmse"]
+        costs = measure_model_costs(model, X_val)
+        size_ratio = costs["model_size_mb"] / run["metrics"]["model_size_mb"]
+        logger.info(
+            f"Compressed {run['model_name']} ({method}, factor {factor}) | "
+            f"Val RMSE: {val_rmse:.4f} | RMSE delta: {rmse_delta:+.4f} | "
+            f"Size: {costs['model_size_mb']:.1f}MB ({size_ratio:.0%} of teacher) | "
+            f"Inference time: {costs['inference_time_s']:.3f}s"
+        )
+
+        compressed_runs.append(
+            {
+                "model_name": run["model_name"],
+                "params": {**run["params"], "n_estimators": model.n_estimators},
+                "features": run["features"],
+                "val_rmse": val_rmse,
+                "val_r2": val_r2,
+                "model": model,
+                "metrics": {
+                    "train_time_s": compress_time,
+                    "rmse_delta": rmse_delta,
+                    **holdout,
+                    "size_ratio": size_ratio,
+                    **costs,
+                },
+                "tags": {
+                    **run.get("tags", {}),
+                    "compression_method": method,
+                    "compression_factor": str(factor),
+                    "teacher_params": str(run["params"]),
+                    "code_version": code,
+                    **({"fingerprint": fingerprint} if fingerprint else {}),
+                },
+            }
+        )
+    return compressed_runs
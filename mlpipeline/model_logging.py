@@ -1,19 +1,36 @@
 import mlflow
 import mlflow.sklearn
 from mlflow.models.signature import infer_signature
+from mlflow.tracking import MlflowClient
 from prefect import task, get_run_logger
+from concurrent.futures import ThreadPoolExecutor
 import os
+import tempfile
+import time
 import requests
 from dotenv import load_dotenv
+from mlpipeline.serialization import save_sklearn_model, log_sklearn_model
+from mlpipeline.profiling import profiled
 
 # Load environment variables from .env if present
 load_dotenv()
 
+# Validation rows used to infer the model signature and input example
+SIGNATURE_SAMPLE_ROWS = 100
+
+# Model uploads started by log_models_to_mlflow and not yet waited on,
+# by run ID. Futures stay in this process instead of travelling through
+# task results.
+_pending_uploads = {}
+
 
 def validate_mlflow_connection(tracking_uri, timeout=30):
     """
     Validate MLflow connection with timeout to prevent hanging.
+    Local stores (e.g. sqlite:/// or file:) have no server to check.
     """
+    if not tracking_uri.startswith(("http://", "https://")):
+        return True
     try:
         # Test connection to MLflow server
         response = requests.get(f"{tracking_uri}/health", timeout=timeout)
@@ -61,45 +78,178 @@ def setup_mlflow(tracking_uri=None, experiment_name=None, timeout=30):
         )
 
 
+def upload_model_artifact(
+    run_id,
+    model,
+    signature,
+    input_example,
+    serialization_format="pickle",
+    compression_level=3,
+    retries=3,
+    retry_delay=5,
+):
+    """
+    Save a model locally in the given serialization format and upload it to
+    the "model" artifact path of an existing run, retrying failed uploads.
+    Each upload is verified by comparing the remote file sizes with the
+    local ones.
+    Returns the run ID once the artifact is stored.
+    """
+    client = MlflowClient()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_path = os.path.join(tmp_dir, "model")
+        save_sklearn_model(
+            model,
+            local_path,
+            serialization_format=serialization_format,
+            compression_level=compression_level,
+            signature=signature,
+            input_example=input_example,
+        )
+        local_sizes = {
+            name: os.path.getsize(os.path.join(local_path, name))
+            for name in os.listdir(local_path)
+            if os.path.isfile(os.path.join(local_path, name))
+        }
+
+        for attempt in range(1, retries + 1):
+            try:
+                client.log_artifacts(run_id, local_path, artifact_path="model")
+                remote_sizes = {
+                    os.path.basename(info.path): info.file_size
+                    for info in client.list_artifacts(run_id, "model")
+                    if not info.is_dir
+                }
+                if remote_sizes != local_sizes:
+                    raise IOError(f"Model artifact of run {run_id} is incomplete")
+                return run_id
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(retry_delay * attempt)
+
+
+def wait_for_model_artifact(run_id):
+    """
+    Block until the model artifact of a run logged with asynchronous
+    uploads is stored. Raises if the upload failed after its retries.
+    """
+    future = _pending_uploads.pop(run_id, None)
+    if future is not None:
+        future.result()
+
+
+def wait_for_model_uploads(logger=None):
+    """
+    Wait for every pending model upload. Failed uploads are logged, then
+    reported together in a RuntimeError.
+    """
+    failed = []
+    while _pending_uploads:
+        run_id, future = _pending_uploads.popitem()
+        try:
+            future.result()
+        except Exception as e:
+            if logger:
+                logger.error(f"Model upload for run {run_id} failed: {e}")
+            failed.append(run_id)
+    if failed:
+        raise RuntimeError(f"Model upload failed for runs: {', '.join(failed)}")
+
+
 @task(name="Log Models to MLflow", retries=1, retry_delay_seconds=10)
-def log_models_to_mlflow(all_runs, X_val):
+@profiled
+def log_models_to_mlflow(
+    all_runs,
+    X_val,
+    async_artifacts=False,
+    max_workers=4,
+    serialization_format="pickle",
+    compression_level=3,
+):
     """
     Logs a list of trained models and their parameters/metrics to MLflow.
+    Models are stored in serialization_format (see mlpipeline.serialization).
+    Cached runs reused from an earlier pipeline run are passed through.
+    With async_artifacts, runs are created and their params/metrics logged
+    right away, while the model artifacts are serialized and uploaded
+    concurrently in a thread pool. Use wait_for_model_artifact before a
+    run's artifact is needed, and wait_for_model_uploads before the
+    pipeline finishes.
     Returns a list of run metadata for each logged model.
     """
     logger = get_run_logger()
     logger.info(f"Logging {len(all_runs)} models to MLflow")
 
     logged_runs = []  # Store metadata for each logged run
+    executor = ThreadPoolExecutor(max_workers=max_workers) if async_artifacts else None
 
     for idx, run in enumerate(all_runs, 1):
+        if run.get("cached"):
+            # Reused from an earlier pipeline run, already logged
+            logger.info(f"Model {idx}: reusing logged run {run['run_id']}")
+            logged_runs.append(run)
+            continue
         logger.info(
             f"Logging model {idx}: {run['model_name']} with params {run['params']}"
         )
         # Start a new MLflow run for each model
         with mlflow.start_run(run_name=f"{run['model_name']}_run_{idx}") as mlflow_run:
-            # Log model parameters and validation metrics
+            # Log model parameters, validation metrics and training costs
             mlflow.log_params(run["params"])
-            mlflow.log_metrics({"val_rmse": run["val_rmse"], "val_r2": run["val_r2"]})
+            mlflow.log_metrics(
+                {
+                    "val_rmse": run["val_rmse"],
+                    "val_r2": run["val_r2"],
+                    **run.get("metrics", {}),
+                }
+            )
+            if run.get("tags"):
+                mlflow.set_tags(run["tags"])
 
-            # Prepare input data and signature for model logging
-            input_data = X_val[run["features"]]
+            # Infer the signature from a small sample instead of predicting
+            # on the whole validation set
+            input_data = X_val[run["features"]].iloc[:SIGNATURE_SAMPLE_ROWS]
             predictions = run["model"].predict(input_data)
             signature = infer_signature(input_data, predictions)
 
+            run_id = mlflow_run.info.run_id
+            if executor is not None:
+                # Upload in the background; artifacts can still be added
+                # through the client after the run is ended
+                future = executor.submit(
+                    upload_model_artifact,
+                    run_id,
+                    run["model"],
+                    signature,
+                    input_data.iloc[:5],
+                    serialization_format,
+                    compression_level,
+                )
+                _pending_uploads[run_id] = future
+                logged_runs.append({"run_id": run_id, **run})
+                logger.info(f"Run {run_id} created, model upload started")
+                continue
+
             # Log the model to MLflow with input example and signature
-            mlflow.sklearn.log_model(
-                sk_model=run["model"],
+            log_sklearn_model(
+                run["model"],
                 name="model",
+                serialization_format=serialization_format,
+                compression_level=compression_level,
                 signature=signature,
                 input_example=input_data.iloc[:5],
             )
-
-            run_id = mlflow_run.info.run_id
             logger.info(f"Model logged with MLflow run ID: {run_id}")
 
             # Store run metadata for later use (e.g., evaluation/registration)
             logged_runs.append({"run_id": run_id, **run})
 
-    logger.info("All models logged successfully")
+    if executor is not None:
+        # Let the uploads finish in the background; _pending_uploads
+        # tracks them
+        executor.shutdown(wait=False)
+        logger.info("All runs created, model artifacts uploading")
+    else:
+        logger.info("All models logged successfully")
     return logged_runs
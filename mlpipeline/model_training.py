@@ -1,11 +1,63 @@
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import (
+    RandomForestRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+)
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import make_pipeline
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from functools import partial
+from threadpoolctl import threadpool_limits
 import numpy as np
+import pickle
+import time
 from prefect import task, get_run_logger
+from config import get_training_config, get_mlflow_config
+from mlpipeline.shared_data import SharedDataset, preferred_dtype
+from mlpipeline.preprocessing_utils import NEW_ROW_COLUMN
+from mlpipeline.hyperparameter_search import search_models, get_production_params
+from mlpipeline.training_cache import (
+    dataset_fingerprint,
+    code_version,
+    training_fingerprint,
+    find_cached_run,
+)
+from mlpipeline.profiling import profiled
+
+# Training config entries that determine the outcome of the search
+SEARCH_SETTINGS = (
+    "search_configs",
+    "search_eta",
+    "search_min_fraction",
+    "search_time_budget",
+    "search_warm_start",
+)
+
+# Hyperparameter grids for each model family
+PARAM_GRIDS = {
+    "RandomForest": [
+        {"n_estimators": 300, "max_depth": 15},
+    ],
+    "GradientBoosting": [
+        {"n_estimators": 200, "max_depth": 5, "learning_rate": 0.05},
+    ],
+    "KNN": [
+        {"n_neighbors": 5, "weights": "uniform"},
+    ],
+    "HistGradientBoosting": [
+        {
+            "max_iter": 500,
+            "learning_rate": 0.05,
+            "max_leaf_nodes": 31,
+            "early_stopping": True,
+            "n_iter_no_change": 20,
+        },
+    ],
+}
 
 
 def get_model_instance(model_name, params):
@@ -17,6 +69,8 @@ def get_model_instance(model_name, params):
         return RandomForestRegressor(**params)
     elif model_name == "GradientBoosting":
         return GradientBoostingRegressor(**params)
+    elif model_name == "HistGradientBoosting":
+        return HistGradientBoostingRegressor(**params)
     elif model_name == "KNN":
         # Always apply scaling for KNN
         knn = KNeighborsRegressor(**params)
@@ -25,6 +79,18 @@ def get_model_instance(model_name, params):
         raise ValueError(f"Unsupported model name: {model_name}")
 
 
+def candidate_dtypes(model_names):
+    """
+    Return the sorted dtypes the given model families read their input as.
+    """
+    return sorted(
+        {
+            preferred_dtype(get_model_instance(name, PARAM_GRIDS[name][0]))
+            for name in model_names
+        }
+    )
+
+
 def evaluate_model(model, X_val, y_val):
     """
     Compute RMSE and R2 metrics for a model on validation data.
@@ -35,68 +101,341 @@ def evaluate_model(model, X_val, y_val):
     return rmse, r2
 
 
-@task(name="Train and Tune Models")
-def train_tune_models(df):
+def split_data(df):
     """
-    Train and tune multiple regression models using predefined hyperparameters.
-    Returns all runs and validation/test splits.
+    Split features and target into train, validation, and test sets.
+    The split is deterministic so later stages can reproduce it. The
+    new-row marker is dropped from the features; the returned sets keep
+    df's index, so new_row_mask(df) can be looked up by label.
     """
-    logger = get_run_logger()
-    logger.info("Starting model training and hyperparameter tuning")
-
-    # Define hyperparameter grids for each model
-    param_grids = {
-        "RandomForest": [
-            {"n_estimators": 300, "max_depth": 15},
-        ],
-        "GradientBoosting": [
-            {"n_estimators": 200, "max_depth": 5, "learning_rate": 0.05},
-        ],
-        "KNN": [
-            {"n_neighbors": 5, "weights": "uniform"},
-        ],
-    }
-
-    # Split features and target
-    X = df.drop("Radiation", axis=1)
+    X = df.drop(columns="Radiation").drop(columns=NEW_ROW_COLUMN, errors="ignore")
     y = df["Radiation"]
-    # Split data into train, validation, and test sets
     X_train_full, X_test, y_train_full, y_test = train_test_split(
         X, y, test_size=0.15, random_state=42
     )
     X_train, X_val, y_train, y_val = train_test_split(
         X_train_full, y_train_full, test_size=0.15 / 0.85, random_state=42
     )
+    return X_train, X_val, X_test, y_train, y_val, y_test
+
+
+def set_model_n_jobs(model, n_jobs):
+    """
+    Set n_jobs on a model (or the steps of a pipeline) that supports it.
+    Returns True if the model can use more than one core.
+    """
+    keys = [k for k in model.get_params() if k == "n_jobs" or k.endswith("__n_jobs")]
+    if keys:
+        model.set_params(**{k: n_jobs for k in keys})
+    return bool(keys)
+
+
+def is_multi_core(model):
+    """
+    Return True if the model can use more than one core, either through
+    n_jobs or through OpenMP threads (histogram gradient boosting).
+    """
+    return set_model_n_jobs(model, 1) or isinstance(
+        model, HistGradientBoostingRegressor
+    )
+
+
+def allocate_cpu_budget(models, cpu_budget):
+    """
+    Divide a CPU budget between concurrently trained models and the threads
+    of each estimator. Single-threaded models get one core and the remaining
+    cores are shared by multi-core models, whose n_jobs is set accordingly.
+    Returns the number of models to train in parallel and the thread count
+    of each model.
+    """
+    cpu_budget = max(1, int(cpu_budget))
+    n_workers = max(1, min(len(models), cpu_budget))
+    threads = [1] * len(models)
+
+    multi_core = [i for i, model in enumerate(models) if is_multi_core(model)]
+    if n_workers == len(models) and multi_core:
+        single_core_count = len(models) - len(multi_core)
+        n_threads = max(1, (cpu_budget - single_core_count) // len(multi_core))
+        for i in multi_core:
+            set_model_n_jobs(models[i], n_threads)
+            threads[i] = n_threads
+
+    return n_workers, threads
+
+
+def fit_and_evaluate(model, X_train, y_train, X_val, y_val):
+    """
+    Fit a model and evaluate it on the validation set.
+    Returns the fitted model, wall-clock training time and validation metrics.
+    """
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_time = time.perf_counter() - start
+    val_rmse, val_r2 = evaluate_model(model, X_val, y_val)
+    return model, train_time, val_rmse, val_r2
+
+
+def fit_and_evaluate_shared(model, dataset, n_rows=None, n_threads=1):
+    """
+    Fit and evaluate a model on read-only memory-mapped splits, using the
+    dtype the model would convert its input to anyway. If n_rows is given,
+    only the first n_rows training rows are used. OpenMP and BLAS threads
+    are capped at n_threads so parallel workers do not oversubscribe cores.
+    """
+    dtype = preferred_dtype(model)
+    with threadpool_limits(limits=n_threads):
+        return fit_and_evaluate(
+            model,
+            dataset.frame("X_train", dtype, rows=n_rows),
+            dataset.load("y_train", rows=n_rows),
+            dataset.frame("X_val", dtype),
+            dataset.load("y_val"),
+        )
+
+
+def measure_model_costs(model, X_val):
+    """
+    Measure batch inference time on the validation set and the pickled
+    model size, to be recorded next to the validation metrics.
+    """
+    start = time.perf_counter()
+    model.predict(X_val)
+    inference_time = time.perf_counter() - start
+    model_size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    return {
+        "inference_time_s": inference_time,
+        "model_size_mb": model_size / 1024**2,
+    }
+
+
+def train_candidates(candidates, dataset, cpu_budget, n_rows=None, timeout=None):
+    """
+    Fit and evaluate (model_name, params) candidates on the shared splits,
+    in parallel when the CPU budget allows.
+    Returns a (model, train_time, val_rmse, val_r2) tuple per candidate,
+    or None for candidates that did not finish before the timeout.
+    """
+    models = [get_model_instance(name, params) for name, params in candidates]
+    n_workers, threads = allocate_cpu_budget(models, cpu_budget)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    if n_workers == 1:
+        results = []
+        for model, n_threads in zip(models, threads):
+            if deadline is not None and time.monotonic() >= deadline:
+                results.append(None)
+            else:
+                results.append(
+                    fit_and_evaluate_shared(model, dataset, n_rows, n_threads)
+                )
+        return results
+
+    executor = ProcessPoolExecutor(max_workers=n_workers)
+    futures = [
+        executor.submit(fit_and_evaluate_shared, model, dataset, n_rows, n_threads)
+        for model, n_threads in zip(models, threads)
+    ]
+    wait(futures, timeout=timeout)
+    # Drop candidates that have not started; running ones are allowed to finish
+    executor.shutdown(wait=True, cancel_futures=True)
+    return [
+        future.result() if not future.cancelled() else None for future in futures
+    ]
+
+
+def run_search(train_fn, n_rows, training_config, logger):
+    """
+    Select one configuration per model family with a time-budgeted
+    successive-halving search, warm-started from the production model's
+    params. Winners that did not reach the full training set before the
+    budget ran out are refit on all rows.
+    Returns the winning (model_name, params) candidates and their results.
+    """
+    warm_start = None
+    if training_config["search_warm_start"]:
+        try:
+            warm_start = get_production_params(get_mlflow_config()["model_name"])
+            logger.info(f"Warm-starting search from production params: {warm_start}")
+        except Exception as e:
+            logger.warning(f"Could not fetch production params from MLflow: {e}")
+
+    best = search_models(
+        train_fn,
+        n_rows,
+        n_configs=training_config["search_configs"],
+        eta=training_config["search_eta"],
+        min_fraction=training_config["search_min_fraction"],
+        time_budget=training_config["search_time_budget"],
+        warm_start=warm_start,
+        logger=logger,
+    )
+
+    # Families without a finished candidate fall back to their default params
+    for name, param_list in PARAM_GRIDS.items():
+        if name not in best:
+            logger.warning(f"No search result for {name}, using default params")
+            best[name] = {"params": param_list[0], "fraction": 0.0}
+
+    candidates = [(name, entry["params"]) for name, entry in best.items()]
+    results = [
+        (entry["model"], entry["train_time"], entry["val_rmse"], entry["val_r2"])
+        if entry["fraction"] >= 1
+        else None
+        for entry in best.values()
+    ]
+    partial_fits = [i for i, result in enumerate(results) if result is None]
+    if partial_fits:
+        logger.info(f"Refitting {len(partial_fits)} search winners on all rows")
+        refits = train_fn([candidates[i] for i in partial_fits])
+        for i, result in zip(partial_fits, refits):
+            results[i] = result
+    return candidates, results
+
+
+@task(name="Train and Tune Models")
+@profiled
+def train_tune_models(df, cpu_budget=None):
+    """
+    Train and tune multiple regression models using predefined hyperparameters,
+    or a successive-halving search when enabled in the training config.
+    Model/param combinations are trained concurrently in a process pool,
+    with the CPU budget split between the pool and each estimator's n_jobs.
+    Workers map the train/validation splits from shared files instead of
+    receiving pickled copies.
+    Each run is tagged with a fingerprint of the dataset, params (or search
+    settings) and code version. With the training cache enabled, candidates
+    whose fingerprint already has a logged MLflow run are reused instead of
+    retrained.
+    Returns all runs and validation/test splits.
+    """
+    logger = get_run_logger()
+    logger.info("Starting model training and hyperparameter tuning")
+
+    X_train, X_val, X_test, y_train, y_val, y_test = split_data(df)
 
     logger.info(
         f"Data split: train={len(X_train)}, val={len(X_val)}, test={len(X_test)}"
     )
 
-    all_runs = []
+    training_config = get_training_config()
+    if cpu_budget is None:
+        cpu_budget = training_config["cpu_budget"]
+    logger.info(f"Training with CPU budget: {cpu_budget}")
 
-    for model_name, param_list in param_grids.items():
-        for params in param_list:
-            logger.info(f"Training {model_name} with params: {params}")
-            model = get_model_instance(model_name, params)
-            model.fit(X_train, y_train)
+    search_settings = None
+    if training_config["search_enabled"]:
+        search_settings = {key: training_config[key] for key in SEARCH_SETTINGS}
+        candidates = [(model_name, search_settings) for model_name in PARAM_GRIDS]
+    else:
+        candidates = [
+            (model_name, params)
+            for model_name, param_list in PARAM_GRIDS.items()
+            for params in param_list
+        ]
 
-            # Evaluate on validation set
-            val_rmse, val_r2 = evaluate_model(model, X_val, y_val)
-            logger.info(
-                f"{model_name} | Params: {params} | Val RMSE: {val_rmse:.4f}, "
-                f"Val R2: {val_r2:.4f}"
+    # Fingerprint each candidate and reuse runs trained on identical inputs
+    data_fingerprint = dataset_fingerprint(df)
+    code = code_version()
+    fingerprints = [
+        training_fingerprint(data_fingerprint, model_name, params, code)
+        for model_name, params in candidates
+    ]
+    features = X_train.columns.tolist()
+    cached_runs = [None] * len(candidates)
+    if training_config["cache_enabled"]:
+        try:
+            cached_runs = [
+                find_cached_run(fingerprint, model_name, features)
+                for (model_name, _), fingerprint in zip(candidates, fingerprints)
+            ]
+        except Exception as e:
+            logger.warning(f"Could not look up cached runs in MLflow: {e}")
+    n_cached = sum(run is not None for run in cached_runs)
+    logger.info(f"Reusing {n_cached}/{len(candidates)} cached training runs")
+
+    if search_settings is not None and n_cached == len(candidates):
+        to_train = []
+    elif search_settings is not None:
+        # The search covers all families at once, so rerun it entirely
+        cached_runs = [None] * len(candidates)
+        to_train = candidates
+    else:
+        to_train = [
+            candidate
+            for candidate, cached in zip(candidates, cached_runs)
+            if cached is None
+        ]
+
+    trained = []
+    start = time.perf_counter()
+    if to_train:
+        with SharedDataset.create(
+            features={"X_train": X_train, "X_val": X_val},
+            targets={"y_train": y_train, "y_val": y_val},
+            dtypes=candidate_dtypes(model_name for model_name, _ in to_train),
+            directory=training_config["shared_dir"],
+        ) as dataset:
+            train_fn = partial(
+                train_candidates, dataset=dataset, cpu_budget=cpu_budget
             )
 
-            all_runs.append(
-                {
-                    "model_name": model_name,
-                    "params": params,
-                    "features": X.columns.tolist(),
-                    "val_rmse": val_rmse,
-                    "val_r2": val_r2,
-                    "model": model,
-                }
+            if search_settings is not None:
+                found, results = run_search(
+                    train_fn, len(X_train), training_config, logger
+                )
+                # Match the winners to the candidates by family; their runs
+                # are fingerprinted with the search settings, not the winners
+                found = dict(zip((name for name, _ in found), zip(found, results)))
+                trained = [found[model_name] for model_name, _ in to_train]
+            else:
+                trained = list(zip(to_train, train_fn(to_train)))
+        logger.info(f"All models trained in {time.perf_counter() - start:.2f}s")
+
+    all_runs = []
+    trained_at = datetime.now(timezone.utc).isoformat()
+    trained = iter(trained)
+
+    for fingerprint, cached in zip(fingerprints, cached_runs):
+        if cached is not None:
+            logger.info(
+                f"{cached['model_name']} | Cached run {cached['run_id']} | "
+                f"Val RMSE: {cached['val_rmse']:.4f}"
             )
+            all_runs.append(cached)
+            continue
+
+        (model_name, params), result = next(trained)
+        model, train_time, val_rmse, val_r2 = result
+        # Reset n_jobs so the served model predicts single rows without
+        # spinning up a worker pool
+        set_model_n_jobs(model, None)
+        costs = measure_model_costs(model, X_val)
+        logger.info(
+            f"{model_name} | Params: {params} | Val RMSE: {val_rmse:.4f}, "
+            f"Val R2: {val_r2:.4f} | Train time: {train_time:.2f}s | "
+            f"Inference time: {costs['inference_time_s']:.3f}s | "
+            f"Size: {costs['model_size_mb']:.1f}MB"
+        )
+
+        all_runs.append(
+            {
+                "model_name": model_name,
+                "params": params,
+                "features": features,
+                "val_rmse": val_rmse,
+                "val_r2": val_r2,
+                "model": model,
+                "metrics": {"train_time_s": train_time, **costs},
+                "tags": {
+                    "training_mode": "full",
+                    "incremental_updates": "0",
+                    "last_full_refit": trained_at,
+                    "fingerprint": fingerprint,
+                    "data_fingerprint": data_fingerprint,
+                    "code_version": code,
+                },
+            }
+        )
 
     logger.info("Model training and tuning completed")
     return all_runs, X_val, X_test, y_test
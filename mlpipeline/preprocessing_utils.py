@@ -1,6 +1,20 @@
 import pandas as pd
 import numpy as np
 
+# Marks the rows added by the latest merge of new labeled data into the
+# baseline (see retrain.combine_data). Not a model feature.
+NEW_ROW_COLUMN = "IsNewRow"
+
+
+def new_row_mask(df):
+    """
+    Boolean Series marking the rows added by the latest merge, all False
+    if df carries no marker.
+    """
+    if NEW_ROW_COLUMN not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df[NEW_ROW_COLUMN].fillna(False).astype(bool)
+
 
 def clean_data(df):
     """
@@ -0,0 +1,174 @@
+import functools
+import re
+import resource
+import threading
+import time
+from mlflow.entities import Metric, RunTag
+from mlflow.tracking import MlflowClient
+import pandas as pd
+import psutil
+from config import get_profiling_config
+
+# Profile records of the stages run in this process, in completion order
+_records = []
+_records_lock = threading.Lock()
+
+
+class _RSSSampler(threading.Thread):
+    """
+    Poll the resident set size of this process and its children (e.g.
+    training workers) and keep the peak seen while a stage runs.
+    """
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.current()
+        self._stop_event = threading.Event()
+
+    def current(self):
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass  # the child exited while being sampled
+        return rss
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.current())
+        return self.peak
+
+
+def _frame_stats(values):
+    """
+    Sum rows and (shallow) bytes over the DataFrames and Series found in
+    values, looking one level into tuples, lists and dicts.
+    """
+    rows, size = 0, 0
+    for value in values:
+        if isinstance(value, dict):
+            items = list(value.values())
+        elif isinstance(value, (tuple, list)):
+            items = list(value)
+        else:
+            items = [value]
+        for item in items:
+            if isinstance(item, pd.DataFrame):
+                rows += len(item)
+                size += int(item.memory_usage(index=True).sum())
+            elif isinstance(item, pd.Series):
+                rows += len(item)
+                size += int(item.memory_usage(index=True))
+    return rows, size
+
+
+def profiled(fn=None, *, name=None):
+    """
+    Decorator recording wall time, CPU time (including child processes),
+    peak RSS and the rows and bytes of DataFrames passed in and returned,
+    for each call of a pipeline stage. Apply it below @task or @flow.
+    Records are collected with collect_profile().
+    """
+    if fn is None:
+        return functools.partial(profiled, name=name)
+    stage = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        config = get_profiling_config()
+        if not config["enabled"]:
+            return fn(*args, **kwargs)
+
+        # Measure inputs first; some stages modify their DataFrames in place
+        input_rows, input_bytes = _frame_stats(list(args) + list(kwargs.values()))
+        sampler = _RSSSampler(config["interval"])
+        start_rss = sampler.peak
+        sampler.start()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        start_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            peak = sampler.stop()
+
+        output_rows, output_bytes = _frame_stats([result])
+        record = {
+            "stage": stage,
+            "wall_s": wall,
+            "cpu_s": cpu
+            + (children.ru_utime - start_children.ru_utime)
+            + (children.ru_stime - start_children.ru_stime),
+            "peak_rss_mb": peak / 1024**2,
+            "rss_growth_mb": (peak - start_rss) / 1024**2,
+            "input_rows": input_rows,
+            "input_mb": input_bytes / 1024**2,
+            "output_rows": output_rows,
+            "output_mb": output_bytes / 1024**2,
+        }
+        with _records_lock:
+            _records.append(record)
+        return result
+
+    return wrapper
+
+
+def collect_profile():
+    """
+    Return the profile records gathered so far and start a new profile.
+    """
+    with _records_lock:
+        records = list(_records)
+        _records.clear()
+    return records
+
+
+def profile_metrics(records):
+    """
+    Flatten profile records into MLflow metrics named <stage>.<measure>.
+    Stages run more than once are summed.
+    """
+    metrics = {}
+    for record in records:
+        stage = re.sub(r"[^0-9A-Za-z_]+", "_", record["stage"]).strip("_")
+        for measure, value in record.items():
+            if measure == "stage":
+                continue
+            key = f"{stage}.{measure}"
+            if measure.startswith("peak_"):
+                metrics[key] = max(metrics.get(key, 0), value)
+            else:
+                metrics[key] = metrics.get(key, 0) + value
+    return metrics
+
+
+def log_profile_to_mlflow(records, run_ids, tags=None):
+    """
+    Log profile records on each of the given MLflow runs, as metrics and a
+    profile.json artifact, so every run carries the resources of the
+    pipeline run that trained it.
+    """
+    client = MlflowClient()
+    timestamp = int(time.time() * 1000)
+    metrics = [
+        Metric(key, value, timestamp, 0)
+        for key, value in profile_metrics(records).items()
+    ]
+    for run_id in run_ids:
+        client.log_batch(
+            run_id,
+            metrics=metrics,
+            tags=[RunTag(key, str(value)) for key, value in (tags or {}).items()],
+        )
+        client.log_dict(run_id, {"stages": records}, "profile.json")
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import joblib
+import pandas as pd
+import mlflow
+import mlflow.pyfunc
+import mlflow.sklearn
+from mlflow.models import get_model_info
+
+# Formats handled by the mlflow.sklearn flavor itself
+SKLEARN_FORMATS = ("pickle", "cloudpickle", "skops")
+# Compressed joblib file wrapped in a pyfunc model
+JOBLIB_FORMAT = "joblib"
+SERIALIZATION_FORMATS = SKLEARN_FORMATS + (JOBLIB_FORMAT,)
+
+
+class JoblibModel(mlflow.pyfunc.PythonModel):
+    """
+    pyfunc wrapper around a scikit-learn model stored as a compressed
+    joblib file, so the API can serve it with mlflow.pyfunc.load_model.
+    """
+
+    def load_context(self, context):
+        self.model = joblib.load(context.artifacts["model"])
+
+    def predict(self, context, model_input: pd.DataFrame, params=None):
+        return self.model.predict(model_input)
+
+
+def _check_format(serialization_format):
+    if serialization_format not in SERIALIZATION_FORMATS:
+        raise ValueError(
+            f"Unsupported serialization format: {serialization_format}. "
+            f"Use one of {', '.join(SERIALIZATION_FORMATS)}"
+        )
+
+
+def _pip_requirements(serialization_format):
+    """
+    Pin the model requirements explicitly. Otherwise MLflow infers them by
+    reloading the model in a subprocess, which takes seconds per model.
+    """
+    return mlflow.sklearn.get_default_pip_requirements(
+        include_cloudpickle=serialization_format == "cloudpickle"
+    )
+
+
+def _dump_joblib(model, directory, compression_level):
+    path = os.path.join(directory, "model.joblib")
+    joblib.dump(model, path, compress=("zlib", compression_level))
+    return path
+
+
+def save_sklearn_model(
+    model,
+    path,
+    serialization_format="pickle",
+    compression_level=3,
+    signature=None,
+    input_example=None,
+):
+    """
+    Save a scikit-learn model as an MLflow model directory in the given
+    serialization format.
+    """
+    _check_format(serialization_format)
+    if serialization_format == JOBLIB_FORMAT:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mlflow.pyfunc.save_model(
+                path,
+                python_model=JoblibModel(),
+                artifacts={"model": _dump_joblib(model, tmp_dir, compression_level)},
+                signature=signature,
+                input_example=input_example,
+                pip_requirements=_pip_requirements(serialization_format),
+            )
+    else:
+        mlflow.sklearn.save_model(
+            model,
+            path,
+            serialization_format=serialization_format,
+            signature=signature,
+            input_example=input_example,
+            pip_requirements=_pip_requirements(serialization_format),
+        )
+
+
+def log_sklearn_model(
+    model,
+    name="model",
+    serialization_format="pickle",
+    compression_level=3,
+    signature=None,
+    input_example=None,
+):
+    """
+    Log a scikit-learn model to the active MLflow run in the given
+    serialization format.
+    """
+    _check_format(serialization_format)
+    if serialization_format == JOBLIB_FORMAT:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            return mlflow.pyfunc.log_model(
+                name=name,
+                python_model=JoblibModel(),
+                artifacts={"model": _dump_joblib(model, tmp_dir, compression_level)},
+                signature=signature,
+                input_example=input_example,
+                pip_requirements=_pip_requirements(serialization_format),
+            )
+    return mlflow.sklearn.log_model(
+        sk_model=model,
+        name=name,
+        serialization_format=serialization_format,
+        signature=signature,
+        input_example=input_example,
+        pip_requirements=_pip_requirements(serialization_format),
+    )
+
+
+def load_sklearn_model(model_uri):
+    """
+    Load the scikit-learn model behind an MLflow model URI, whichever
+    serialization format it was logged with.
+    """
+    if "sklearn" in get_model_info(model_uri).flavors:
+        return mlflow.sklearn.load_model(model_uri)
+    return mlflow.pyfunc.load_model(model_uri).unwrap_python_model().model
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+def preferred_dtype(model):
+    """
+    Return the dtype a model converts its input to during fit.
+    Tree ensembles work on float32, everything else on float64.
+    """
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    if hasattr(estimator, "n_estimators"):
+        return "float32"
+    return "float64"
+
+
+class SharedDataset:
+    """
+    Training matrices written once as contiguous .npy files and memory-mapped
+    read-only by every worker. Pickling the dataset only ships file paths,
+    so adding parallel trainers does not copy the data.
+    """
+
+    def __init__(self, directory, columns):
+        self.directory = directory
+        self.columns = columns
+
+    @classmethod
+    def create(cls, features, targets, dtypes=("float64",), directory=None):
+        """
+        Write each feature matrix once per dtype in dtypes, and each target
+        once as float64, into a fresh directory. Pass only the dtypes the
+        models being trained read (see preferred_dtype), so no matrix is
+        written twice without need. Column names are taken from the
+        first feature DataFrame so workers can rebuild DataFrames.
+        """
+        directory = tempfile.mkdtemp(prefix="solar-train-", dir=directory)
+        columns = list(next(iter(features.values())).columns)
+        for name, frame in features.items():
+            for dtype in dtypes:
+                cls._save(directory, name, frame.to_numpy(), dtype)
+        for name, series in targets.items():
+            cls._save(directory, name, np.asarray(series), "float64")
+        return cls(directory, columns)
+
+    @staticmethod
+    def _save(directory, name, values, dtype):
+        np.save(
+            os.path.join(directory, f"{name}.{dtype}.npy"),
+            np.ascontiguousarray(values, dtype=dtype),
+        )
+
+    def load(self, name, dtype="float64", rows=None):
+        """
+        Map an array read-only from disk, optionally only its first rows.
+        """
+        path = os.path.join(self.directory, f"{name}.{dtype}.npy")
+        return np.load(path, mmap_mode="r")[:rows]
+
+    def frame(self, name, dtype="float64", rows=None):
+        """
+        Map a feature matrix as a DataFrame backed by the memory map.
+        """
+        return pd.DataFrame(
+            self.load(name, dtype, rows), columns=self.columns, copy=False
+        )
+
+    def cleanup(self):
+        """
+        Remove the backing files.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
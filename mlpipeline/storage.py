@@ -0,0 +1,265 @@
+import os
+import shutil
+import sqlite3
+from contextlib import contextmanager
+import boto3  # type: ignore
+import pandas as pd  # type: ignore
+from config import get_storage_config, get_supabase_config
+
+# Prediction log table written by the API and read by the monitor
+MODEL_LOGS_TABLE = "model_logs"
+MODEL_LOGS_COLUMNS = [
+    "UNIXTime",
+    "Data",
+    "Time",
+    "Temperature",
+    "Pressure",
+    "Humidity",
+    "WindDirection_Degrees",
+    "Speed",
+    "TimeSunRise",
+    "TimeSunSet",
+    "datetime",
+    "Radiation",
+]
+
+
+class S3Storage:
+    """
+    Object storage in Amazon S3, optionally through a named AWS profile.
+    """
+
+    def __init__(self, aws_profile=None):
+        session = (
+            boto3.Session(profile_name=aws_profile) if aws_profile else boto3.Session()
+        )
+        self.s3 = session.client("s3")
+
+    def open(self, bucket, key):
+        """
+        Return a readable binary stream of an object.
+        """
+        return self.s3.get_object(Bucket=bucket, Key=key)["Body"]
+
+    def write(self, bucket, key, data):
+        """
+        Store bytes (or a string, encoded as UTF-8) as an object.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.s3.put_object(Bucket=bucket, Key=key, Body=data)
+
+    def upload_file(self, local_path, bucket, key):
+        """
+        Store a local file as an object.
+        """
+        with open(local_path, "rb") as f:
+            self.s3.upload_fileobj(f, bucket, key)
+
+    def etag(self, bucket, key):
+        """
+        Return a tag that changes whenever the object is rewritten.
+        """
+        return self.s3.head_object(Bucket=bucket, Key=key)["ETag"]
+
+    def copy(self, bucket, source_key, key):
+        self.s3.copy_object(
+            Bucket=bucket, CopySource={"Bucket": bucket, "Key": source_key}, Key=key
+        )
+
+    def delete(self, bucket, key):
+        self.s3.delete_object(Bucket=bucket, Key=key)
+
+
+class LocalStorage:
+    """
+    Object storage in a local directory, with each object stored as the file
+    root/<bucket>/<key>. Lets the pipeline, API and monitor run on one
+    machine without cloud services.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def path(self, bucket, key):
+        return os.path.join(self.root, bucket, key)
+
+    def _existing_path(self, bucket, key):
+        path = self.path(bucket, key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No object {key} in local bucket {bucket}")
+        return path
+
+    def open(self, bucket, key):
+        return open(self._existing_path(bucket, key), "rb")
+
+    def write(self, bucket, key, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial object
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def upload_file(self, local_path, bucket, key):
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, path)
+
+    def etag(self, bucket, key):
+        stat = os.stat(self._existing_path(bucket, key))
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def copy(self, bucket, source_key, key):
+        self.upload_file(self._existing_path(bucket, source_key), bucket, key)
+
+    def delete(self, bucket, key):
+        os.remove(self._existing_path(bucket, key))
+
+
+def get_storage(aws_profile=None):
+    """
+    Return the object storage backend selected by STORAGE_BACKEND.
+    """
+    config = get_storage_config()
+    if config["backend"] == "s3":
+        return S3Storage(aws_profile)
+    if config["backend"] == "local":
+        return LocalStorage(config["local_root"])
+    raise ValueError(
+        f"Unsupported storage backend: {config['backend']}. Use s3 or local"
+    )
+
+
+def read_csv(bucket, key, aws_profile=None, storage=None):
+    """
+    Load a CSV object into a pandas DataFrame.
+    """
+    storage = storage or get_storage(aws_profile)
+    with storage.open(bucket, key) as f:
+        return pd.read_csv(f)
+
+
+def write_csv(df, bucket, key, storage=None):
+    """
+    Store a DataFrame as a CSV object.
+    """
+    (storage or get_storage()).write(bucket, key, df.to_csv(index=False))
+
+
+class SupabaseLogStore:
+    """
+    Prediction logs in the Supabase model_logs table.
+    """
+
+    def __init__(self, url, key):
+        from supabase import create_client  # only needed for this backend
+
+        self.client = create_client(url, key)
+
+    def insert(self, records):
+        """
+        Append prediction records. Returns the inserted rows.
+        """
+        return self.client.table(MODEL_LOGS_TABLE).insert(records).execute().data
+
+    def fetch_range(self, columns, after_id=None, before_id=None, limit=1000):
+        """
+        Return up to limit logged rows with after_id < id < before_id (either
+        bound optional) as a DataFrame of id and the given columns, newest
+        first. Paging on id (keyset pagination) only reads the rows returned.
+        """
+        query = (
+            self.client.table(MODEL_LOGS_TABLE)
+            .select(",".join(["id", *columns]))
+            .order("id", desc=True)
+            .limit(limit)
+        )
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        if before_id is not None:
+            query = query.lt("id", before_id)
+        return pd.DataFrame(query.execute().data, columns=["id", *columns])
+
+    def clear(self):
+        self.client.table(MODEL_LOGS_TABLE).delete().neq("id", 0).execute()
+
+
+class SQLiteLogStore:
+    """
+    Local stand-in for the Supabase model_logs table in a SQLite file, with
+    the same columns and an auto-incrementing id.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        columns = ", ".join(f'"{column}"' for column in MODEL_LOGS_COLUMNS)
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {MODEL_LOGS_TABLE} "
+                f"(id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One connection per call, so the store can be shared across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def insert(self, records):
+        columns = ", ".join(f'"{column}"' for column in MODEL_LOGS_COLUMNS)
+        placeholders = ", ".join("?" for _ in MODEL_LOGS_COLUMNS)
+        rows = [[record.get(c) for c in MODEL_LOGS_COLUMNS] for record in records]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO {MODEL_LOGS_TABLE} ({columns}) VALUES ({placeholders})",
+                rows,
+            )
+        return records
+
+    def fetch_range(self, columns, after_id=None, before_id=None, limit=1000):
+        selected = ", ".join(f'"{column}"' for column in ["id", *columns])
+        conditions, params = [], []
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(int(after_id))
+        if before_id is not None:
+            conditions.append("id < ?")
+            params.append(int(before_id))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                f"SELECT {selected} FROM {MODEL_LOGS_TABLE} {where} "
+                "ORDER BY id DESC LIMIT ?",
+                conn,
+                params=(*params, limit),
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {MODEL_LOGS_TABLE}")
+
+
+def get_log_store():
+    """
+    Return the prediction log backend selected by PREDICTION_LOG_BACKEND.
+    """
+    config = get_storage_config()
+    if config["log_backend"] == "supabase":
+        supabase_config = get_supabase_config()
+        return SupabaseLogStore(supabase_config["url"], supabase_config["key"])
+    if config["log_backend"] == "sqlite":
+        return SQLiteLogStore(config["sqlite_path"])
+    raise ValueError(
+        f"Unsupported prediction log backend: {config['log_backend']}. "
+        "Use supabase or sqlite"
+    )
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import mlflow
+import pandas as pd
+import sklearn
+from mlpipeline.hyperparameter_search import parse_param
+from mlpipeline.serialization import load_sklearn_model
+
+# Modules whose source determines the trained models and their logged
+# artifacts
+TRAINING_MODULES = (
+    "model_training.py",
+    "hyperparameter_search.py",
+    "shared_data.py",
+    "serialization.py",
+)
+# Modules whose source determines the compressed models
+COMPRESSION_MODULES = TRAINING_MODULES + ("model_compression.py",)
+
+
+def dataset_fingerprint(df):
+    """
+    Content hash of a prepared DataFrame, covering its column names,
+    dtypes, index and values.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def code_version(modules=TRAINING_MODULES):
+    """
+    Hash of the given pipeline modules and the scikit-learn version, so a
+    change to either invalidates cached results.
+    """
+    digest = hashlib.sha256(sklearn.__version__.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in modules:
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def training_fingerprint(data_fingerprint, model_name, params, code):
+    """
+    Cache key of one training task: dataset, model family, params (or
+    search settings) and code version.
+    """
+    payload = json.dumps(
+        [data_fingerprint, model_name, params, code], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def find_cached_run(fingerprint, model_name, features):
+    """
+    Look up the latest finished MLflow run with a logged model for a
+    training fingerprint in the active experiment. Returns it as a run dict
+    (with run_id, the loaded model and cached=True), or None.
+    """
+    runs = mlflow.search_runs(
+        filter_string=(
+            f"tags.fingerprint = '{fingerprint}' and attributes.status = 'FINISHED'"
+        ),
+        order_by=["attributes.start_time DESC"],
+        max_results=1,
+        output_format="list",
+    )
+    if not runs:
+        return None
+    run = runs[0]
+    metrics = dict(run.data.metrics)
+    if "val_rmse" not in metrics:
+        return None
+    try:
+        model = load_sklearn_model(f"runs:/{run.info.run_id}/model")
+    except Exception:
+        # The run exists but its model artifact is missing or unreadable
+        return None
+
+    return {
+        "run_id": run.info.run_id,
+        "model_name": model_name,
+        "params": {k: parse_param(v) for k, v in run.data.params.items()},
+        "features": features,
+        "val_rmse": metrics.pop("val_rmse"),
+        "val_r2": metrics.pop("val_r2", float("nan")),
+        "model": model,
+        "metrics": metrics,
+        "tags": {k: v for k, v in run.data.tags.items() if not k.startswith("mlflow.")},
+        "cached": True,
+    }
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from prometheus_client import Counter, Gauge, Histogram
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+cycle_duration = Histogram(
+    "monitor_cycle_duration_seconds",
+    "Time from the start of ingestion until every stage processed the cycle",
+    buckets=STAGE_BUCKETS,
+)
+stage_duration = Histogram(
+    "monitor_stage_duration_seconds",
+    "Latency of each monitoring stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+stage_timeouts = Counter(
+    "monitor_stage_timeouts_total", "Stage runs that exceeded their timeout", ["stage"]
+)
+stage_errors = Counter(
+    "monitor_stage_errors_total", "Stage runs that raised an exception", ["stage"]
+)
+stage_skipped = Counter(
+    "monitor_stage_skipped_total",
+    "Cycles a stage skipped because it was still busy with an older one",
+    ["stage"],
+)
+last_cycle_completed = Gauge(
+    "monitor_last_cycle_completed_timestamp_seconds",
+    "Unix time when the last cycle finished every stage",
+)
+
+
+class Stage:
+    """
+    One blocking step of the monitor (e.g. Supabase or S3 I/O, drift
+    analysis), run in a worker thread with a timeout. A run that times out
+    keeps going in its thread, but the loop stops waiting for it, and the
+    stage skips new cycles until it finishes.
+    """
+
+    def __init__(self, name, func, timeout):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self._running = None
+
+    async def run(self, *args):
+        """
+        Run the stage and return its result, or None if it was busy, timed
+        out or failed.
+        """
+        if self._running is not None and not self._running.done():
+            stage_skipped.labels(stage=self.name).inc()
+            print(f"Stage {self.name} still busy, skipping this cycle.")
+            return None
+        self._running = asyncio.ensure_future(asyncio.to_thread(self.func, *args))
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._running), self.timeout)
+        except asyncio.TimeoutError:
+            stage_timeouts.labels(stage=self.name).inc()
+            print(f"Stage {self.name} timed out after {self.timeout}s.")
+        except Exception as e:
+            stage_errors.labels(stage=self.name).inc()
+            print(f"Stage {self.name} failed: {e}")
+        finally:
+            stage_duration.labels(stage=self.name).observe(time.perf_counter() - start)
+        return None
+
+
+class Cycle:
+    """
+    One ingested snapshot on its way through the analysis stages.
+    """
+
+    def __init__(self, snapshot, started, stages):
+        self.snapshot = snapshot
+        self.started = started
+        self.pending = stages
+
+    def stage_done(self):
+        self.pending -= 1
+        if not self.pending:
+            cycle_duration.observe(time.perf_counter() - self.started)
+            last_cycle_completed.set(time.time())
+
+
+def put_latest(queue, item):
+    """
+    Queue item, replacing a cycle the stage has not started yet: a stage
+    that falls behind analyses the newest data rather than a backlog.
+    Returns whether a cycle was dropped.
+    """
+    dropped = queue.full()
+    if dropped:
+        queue.get_nowait()
+        queue.task_done()
+    queue.put_nowait(item)
+    return dropped
+
+
+async def ingest_loop(ingest, queues, next_interval):
+    """
+    Run the ingest stage every next_interval(snapshot) seconds, counted from
+    the start of the previous run, and hand each snapshot to every analysis
+    stage's queue.
+    """
+    while True:
+        started = time.perf_counter()
+        snapshot = await ingest.run()
+        if snapshot is not None:
+            cycle = Cycle(snapshot, started, len(queues))
+            for stage, queue in queues.items():
+                if put_latest(queue, cycle):
+                    stage_skipped.labels(stage=stage).inc()
+        interval = next_interval(snapshot)
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+async def stage_loop(stage, queue):
+    """
+    Run an analysis stage on every cycle taken from its queue.
+    """
+    while True:
+        cycle = await queue.get()
+        try:
+            await stage.run(cycle.snapshot)
+        finally:
+            cycle.stage_done()
+            queue.task_done()
+
+
+async def run_monitor(ingest, stages, next_interval):
+    """
+    Run the monitor as concurrent stages: ingest feeds a one-slot queue per
+    analysis stage, and each analysis stage consumes its queue at its own
+    pace, so a slow stage delays neither ingestion nor the other stages.
+    """
+    queues = {stage.name: asyncio.Queue(maxsize=1) for stage in stages}
+    await asyncio.gather(
+        ingest_loop(ingest, queues, next_interval),
+        *(stage_loop(stage, queues[stage.name]) for stage in stages),
+    )
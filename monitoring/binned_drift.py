@@ -0,0 +1,70 @@
+import numpy as np
+from scipy.spatial.distance import jensenshannon
+
+# Floor for empty bins in the PSI, which is undefined for zero proportions
+PSI_EPSILON = 1e-4
+
+
+def bin_index(edges, values):
+    """
+    Bin of each finite value given the baseline's quantile bin edges, in
+    one pass over the values. Values beyond the outer edges fall into the
+    first or last bin, so the bins cover the whole line.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    return np.searchsorted(edges[1:-1], values, side="right")
+
+
+def bin_counts(edges, values):
+    """
+    Number of finite values per bin (see bin_index).
+    """
+    return np.bincount(bin_index(edges, values), minlength=len(edges) - 1)
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """
+    Population Stability Index between baseline and recent bin counts.
+    """
+    expected = np.clip(expected / expected.sum(), epsilon, None)
+    actual = np.clip(actual / actual.sum(), epsilon, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def js_distance(expected, actual):
+    """
+    Jensen-Shannon distance (base 2, so between 0 and 1) between baseline
+    and recent bin counts.
+    """
+    return float(jensenshannon(expected, actual, base=2))
+
+
+class BinnedHistogram:
+    """
+    Bin counts of a sliding window of values over fixed baseline bins.
+    Rows entering and leaving the window update the counts in place, so
+    each cycle costs O(new rows) instead of re-binning the whole window.
+    """
+
+    def __init__(self, edges, values=()):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(max(len(self.edges) - 1, 0), dtype=np.int64)
+        self.add(values)
+
+    def add(self, values):
+        if len(self.counts):
+            self.counts += bin_counts(self.edges, values)
+
+    def remove(self, values):
+        if len(self.counts):
+            self.counts -= bin_counts(self.edges, values)
+
+    def copy(self):
+        histogram = BinnedHistogram(self.edges)
+        histogram.counts = self.counts.copy()
+        return histogram
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
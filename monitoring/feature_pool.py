@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# Reference shared with the forked workers: set before the pool starts, so
+# each worker inherits it (copy-on-write) instead of receiving it per task.
+# A later reference is loaded once per worker from the file it was published
+# to, and the version tells the workers when to load it.
+_reference = None
+_reference_version = 0
+
+
+def _run(func, version, path, key, args):
+    global _reference, _reference_version
+    if version != _reference_version:
+        with open(path, "rb") as f:
+            _reference = pickle.load(f)
+        _reference_version = version
+    return func(_reference[key], *args)
+
+
+class FeaturePool:
+    """
+    Runs a per-feature function over a process pool. Each task is
+    func(reference[key], *args), where reference (e.g. the baseline
+    profile) is shared read-only with the workers through fork, and only
+    the key and the recent data are pickled. Results come back in task
+    order, so they are identical to a serial run. With fewer than
+    min_features tasks, a single worker, or a pool that was not started,
+    it runs serially: process overhead would outweigh the gain.
+
+    The workers are forked once, by start. When a different reference is
+    passed, e.g. after the baseline changed, it is pickled once to a file
+    that each worker loads on its next task, so map never forks and can be
+    called from any thread.
+    """
+
+    def __init__(self, workers=1, min_features=32):
+        self.workers = workers
+        self.min_features = min_features
+        self.reference = None
+        self._version = 0
+        self._path = None
+        self._pool = None
+
+    def start(self, reference):
+        """
+        Fork the workers with reference. Call it from the main thread before
+        any other thread starts (e.g. the metrics HTTP server), as forking
+        copies the state of locks held by other threads.
+        """
+        global _reference, _reference_version
+        self.shutdown()
+        _reference = self.reference = reference
+        _reference_version = self._version = 0
+        self._pool = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("fork")
+        )
+        # Fork every worker now rather than on the first task
+        self._pool.submit(int).result()
+
+    def _publish(self, reference):
+        """
+        Write a new reference for the running workers to load.
+        """
+        fd, path = tempfile.mkstemp(prefix="feature_pool_", suffix=".pkl")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(reference, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remove_published()
+        self.reference = reference
+        self._version += 1
+        self._path = path
+
+    def _remove_published(self):
+        if self._path is not None:
+            os.remove(self._path)
+            self._path = None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._remove_published()
+
+    def map(self, func, reference, tasks):
+        """
+        Return [func(reference[key], *args) for key, args in tasks].
+        """
+        tasks = list(tasks)
+        if self._pool is None or self.workers <= 1 or len(tasks) < self.min_features:
+            return [func(reference[key], *args) for key, args in tasks]
+        if reference is not self.reference:
+            self._publish(reference)
+        return list(
+            self._pool.map(
+                _run,
+                [func] * len(tasks),
+                [self._version] * len(tasks),
+                [self._path] * len(tasks),
+                [key for key, _ in tasks],
+                [args for _, args in tasks],
+            )
+        )
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from mlpipeline.storage import get_storage, read_csv
+
+
+def _unix_times(frame):
+    """
+    UNIXTime column as int64, with a mask of the rows that have one.
+    """
+    times = pd.to_numeric(frame["UNIXTime"], errors="coerce").to_numpy(dtype=float)
+    valid = np.isfinite(times)
+    return np.where(valid, times, 0).astype(np.int64), valid
+
+
+class GroundTruthIndex:
+    """
+    Ground-truth radiation held in memory as arrays sorted by UNIXTime,
+    reloaded only when the object's ETag changes. Predictions are joined
+    with np.searchsorted instead of merging DataFrames every cycle.
+    """
+
+    def __init__(self, bucket, key, storage=None):
+        self.bucket = bucket
+        self.key = key
+        self.storage = storage or get_storage()
+        self.etag = None
+        self.times = np.array([], dtype=np.int64)
+        self.radiation = np.array([], dtype=float)
+        self.radiation_range = 0.0
+
+    @property
+    def empty(self):
+        return not len(self.times)
+
+    def refresh(self):
+        """
+        Reload the ground truth if the object changed. Returns whether it did.
+        """
+        etag = self.storage.etag(self.bucket, self.key)
+        if etag == self.etag:
+            return False
+        df = read_csv(self.bucket, self.key, storage=self.storage)
+        times, valid = _unix_times(df)
+        radiation = df["Radiation"].to_numpy(dtype=float)[valid]
+        # One value per timestamp: the last one logged
+        order = np.argsort(times[valid], kind="stable")
+        times, radiation = times[valid][order], radiation[order]
+        last = np.append(times[1:] != times[:-1], True)
+        self.times, self.radiation = times[last], radiation[last]
+        self.radiation_range = (
+            float(np.nanmax(radiation) - np.nanmin(radiation))
+            if len(radiation)
+            else 0.0
+        )
+        self.etag = etag
+        return True
+
+    def errors(self, frame):
+        """
+        Prediction errors (predicted minus actual Radiation) of the rows of
+        frame that have ground truth for their UNIXTime.
+        """
+        if self.empty or frame.empty:
+            return np.array([], dtype=float)
+        times, valid = _unix_times(frame)
+        idx = np.minimum(np.searchsorted(self.times, times), len(self.times) - 1)
+        matched = valid & (self.times[idx] == times)
+        predicted = frame["Radiation"].to_numpy(dtype=float)
+        errors = predicted[matched] - self.radiation[idx[matched]]
+        return errors[np.isfinite(errors)]
+
+
+class RunningRMSE:
+    """
+    RMSE of the recent window against the ground truth, kept as a running
+    count and sum of squared errors: rows entering the window add their
+    errors and rows leaving it subtract them. reset recomputes it from the
+    whole window, e.g. after the ground truth changed.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.count = 0
+        self.squared_error = 0.0
+        self.valid = False
+
+    def reset(self, frame):
+        errors = self.index.errors(frame)
+        self.count = len(errors)
+        self.squared_error = float((errors**2).sum())
+        self.valid = True
+
+    def update(self, added, evicted):
+        added_errors = self.index.errors(added)
+        evicted_errors = self.index.errors(evicted)
+        self.count += len(added_errors) - len(evicted_errors)
+        self.squared_error += float((added_errors**2).sum())
+        self.squared_error -= float((evicted_errors**2).sum())
+
+    def invalidate(self):
+        """
+        Mark the running sums stale, so the next cycle recomputes them.
+        """
+        self.valid = False
+
+    @property
+    def rmse(self):
+        if not self.count:
+            return float("nan")
+        return float(np.sqrt(max(self.squared_error, 0.0) / self.count))
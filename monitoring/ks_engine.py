@@ -0,0 +1,79 @@
+import numpy as np
+from scipy.stats import kstwo
+
+
+def _ecdf(values):
+    """
+    Distinct sorted values and the ECDF below the first and up to each of
+    them (length k + 1), from finite values.
+    """
+    distinct, ties = np.unique(values, return_counts=True)
+    return distinct, np.concatenate([[0], np.cumsum(ties)]) / len(values)
+
+
+def _max_gap(a, b):
+    """
+    Largest distance between two ECDFs (see _ecdf), looked up at the
+    distinct values of a. Between two of them the ECDF of a is flat and that
+    of b only grows, so the largest gap is at, or just below, one of them.
+    """
+    values_a, cdf_a = a
+    values_b, cdf_b = b
+    up_to = cdf_b[np.searchsorted(values_b, values_a, side="right")]
+    below = cdf_b[np.searchsorted(values_b, values_a, side="left")]
+    return max(np.abs(cdf_a[1:] - up_to).max(), np.abs(cdf_a[:-1] - below).max())
+
+
+def presort_reference(columns):
+    """
+    Prepare baseline columns (a list of 1-D arrays, one per feature) for
+    ks_2samp_batch: drop non-finite values and sort each column once into
+    its ECDF.
+    """
+    ecdfs, counts = [], []
+    for values in columns:
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        ecdfs.append(_ecdf(values) if len(values) else None)
+        counts.append(len(values))
+    return {"ecdfs": ecdfs, "counts": np.array(counts, dtype=np.int64)}
+
+
+def ks_2samp_batch(reference, recent):
+    """
+    Two-sample Kolmogorov-Smirnov tests of every recent column against the
+    matching presorted baseline column (see presort_reference).
+    recent is a (rows x features) array; non-finite values are ignored per
+    column. Returns arrays of statistics and p-values, NaN for features
+    without data. Matches scipy's ks_2samp(method="asymp") per column.
+
+    Only the recent column is sorted each cycle, and the ECDF gap is looked
+    up at the distinct values of the smaller sample with np.searchsorted in
+    the larger one, instead of merging and re-sorting both samples.
+    """
+    recent = np.asarray(recent, dtype=float)
+    if recent.ndim == 1:
+        recent = recent[:, np.newaxis]
+    n_features = recent.shape[1]
+    statistics = np.full(n_features, np.nan)
+    m = np.zeros(n_features, dtype=np.int64)
+    n = reference["counts"]
+
+    for j in range(n_features):
+        values = recent[:, j]
+        values = values[np.isfinite(values)]
+        m[j] = len(values)
+        if m[j] and n[j]:
+            baseline, window = reference["ecdfs"][j], _ecdf(values)
+            statistics[j] = (
+                _max_gap(window, baseline)
+                if len(window[0]) < len(baseline[0])
+                else _max_gap(baseline, window)
+            )
+
+    # Smirnov's asymptotic distribution, as in scipy's ks_2samp
+    tested = ~np.isnan(statistics)
+    en = np.round(n * m / np.where(tested, n + m, 1))
+    p_values = np.full(n_features, np.nan)
+    p_values[tested] = np.clip(kstwo.sf(statistics[tested], en[tested]), 0, 1)
+    return statistics, p_values
@@ -0,0 +1,133 @@
+import pandas as pd
+
+
+class LogWindow:
+    """
+    Bounded window of the most recent prediction logs, refreshed
+    incrementally. A high-water mark on the log id remembers the newest row
+    already read, so each refresh only transfers rows logged since then,
+    and only the given columns. Ids are assigned by the database and only
+    grow, unlike the client-supplied datetime, so they make a safe
+    watermark.
+    """
+
+    def __init__(self, log_store, columns, max_rows=1200, page_size=1000):
+        self.log_store = log_store
+        self.columns = list(columns)
+        self.max_rows = max_rows
+        self.page_size = page_size
+        self.last_id = None
+        self.frame = pd.DataFrame(columns=["id", *self.columns])
+        # Rows that entered and left the window in the last refresh, for
+        # statistics maintained incrementally over the window
+        self.added = self.frame
+        self.evicted = self.frame
+
+    def _fetch_new(self):
+        """
+        Read the rows newer than the watermark, newest first, one page at a
+        time. Stops after max_rows rows, since older ones would fall out of
+        the window anyway.
+        """
+        pages, fetched, before_id = [], 0, None
+        while fetched < self.max_rows:
+            page = self.log_store.fetch_range(
+                self.columns,
+                after_id=self.last_id,
+                before_id=before_id,
+                limit=min(self.page_size, self.max_rows - fetched),
+            )
+            if page.empty:
+                break
+            pages.append(page)
+            fetched += len(page)
+            before_id = page["id"].min()
+            if len(page) < self.page_size:
+                break  # no older rows left above the watermark
+        if not pages:
+            return pd.DataFrame(columns=["id", *self.columns])
+        return pd.concat(pages[::-1], ignore_index=True).sort_values(
+            "id", ignore_index=True
+        )
+
+    def refresh(self):
+        """
+        Append the rows logged since the last refresh and drop the oldest
+        rows beyond max_rows. Returns the number of new rows.
+        """
+        new_rows = self._fetch_new()
+        self.added = new_rows
+        self.evicted = self.frame.iloc[:0]
+        if new_rows.empty:
+            return 0
+        frames = [self.frame, new_rows] if not self.frame.empty else [new_rows]
+        combined = pd.concat(frames, ignore_index=True)
+        self.evicted = combined.head(max(len(combined) - self.max_rows, 0))
+        self.frame = combined.tail(self.max_rows).reset_index(drop=True)
+        self.last_id = int(self.frame["id"].iloc[-1])
+        return len(new_rows)
+
+    def data(self):
+        """
+        Return a copy of the rows in the window, oldest first.
+        """
+        return self.frame.copy()
+
+
+class LogStream:
+    """
+    Every prediction log row above an id watermark, read a page at a time
+    and handed to a consumer, with no cap on the rows per read. Unlike
+    LogWindow it keeps nothing, so statistics that must see every row
+    (e.g. rolling window sketches) stay exact through bursts. With
+    skip_existing, the first read only moves the watermark to the newest
+    row, so rows logged before the monitor started are not counted as new.
+    """
+
+    def __init__(self, log_store, columns, page_size=1000, skip_existing=False):
+        self.log_store = log_store
+        self.columns = list(columns)
+        self.page_size = page_size
+        self.skip_existing = skip_existing
+        self.last_id = None
+        self.started = False
+        # Newest id and paging position of a read interrupted by an error,
+        # so the next read resumes it without consuming any row twice
+        self._head = None
+        self._before_id = None
+
+    def read(self, consume):
+        """
+        Pass the rows newer than the watermark to consume, one page at a
+        time (newest page first), then move the watermark past them.
+        Returns the number of rows consumed.
+        """
+        if not self.started:
+            self.started = True
+            if self.skip_existing:
+                newest = self.log_store.fetch_range(self.columns, limit=1)
+                if not newest.empty:
+                    self.last_id = int(newest["id"].iloc[0])
+                return 0
+
+        consumed = 0
+        while True:
+            page = self.log_store.fetch_range(
+                self.columns,
+                after_id=self.last_id,
+                before_id=self._before_id,
+                limit=self.page_size,
+            )
+            if page.empty:
+                break
+            if self._head is None:
+                self._head = int(page["id"].max())
+            consume(page)
+            consumed += len(page)
+            self._before_id = int(page["id"].min())
+            if len(page) < self.page_size:
+                break  # no older rows left above the watermark
+        if self._head is not None:
+            self.last_id = self._head
+        self._head = self._before_id = None
+        return consumed
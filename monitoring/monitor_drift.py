@@ -3,29 +3,48 @@ import sys
 from dotenv import load_dotenv
 from datetime import datetime
 import json
-import time
+import asyncio
 import random
-import io
-import boto3
 import numpy as np
 import pandas as pd
-from sklearn.metrics import mean_squared_error
 from prometheus_client import start_http_server, Gauge
-from supabase import create_client, Client
 from evidently.report import Report
 from evidently.metric_preset import DataDriftPreset
-from scipy.stats import ks_2samp, anderson_ksamp
-from io import StringIO
 
 sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 )  # noqa: E402
 
 from config import (  # noqa: E402
-    get_supabase_config,
     get_s3_config,
     get_monitoring_config,
 )  # noqa: E402
+from mlpipeline.storage import (  # noqa: E402
+    MODEL_LOGS_COLUMNS,
+    get_storage,
+    get_log_store,
+    read_csv,
+)
+from mlpipeline.preprocessing_utils import NEW_ROW_COLUMN  # noqa: E402
+from monitoring.log_ingestion import LogWindow, LogStream  # noqa: E402
+from monitoring.ground_truth import GroundTruthIndex, RunningRMSE  # noqa: E402
+from monitoring.reference_profile import build_reference_profile  # noqa: E402
+from monitoring.ks_engine import presort_reference, ks_2samp_batch  # noqa: E402
+from monitoring.binned_drift import (  # noqa: E402
+    BinnedHistogram,
+    bin_counts,
+    js_distance,
+    psi,
+)
+from monitoring.report_worker import ReportWorker, window_key  # noqa: E402
+from monitoring.async_monitor import Stage, run_monitor  # noqa: E402
+from monitoring.scheduler import AdaptiveScheduler  # noqa: E402
+from monitoring.feature_pool import FeaturePool  # noqa: E402
+from monitoring.rolling_sketches import (  # noqa: E402
+    WINDOWS,
+    RollingSketches,
+    window_drift,
+)
 
 
 load_dotenv()
@@ -39,16 +58,11 @@ random.seed(42)
 # load baseline data from s3 function
 def load_data_s3(bucket_name, file_key, aws_profile=None):
     """
-    Loads a CSV file from S3 into a pandas DataFrame.
+    Loads a CSV file from S3 (or the local storage backend, see
+    STORAGE_BACKEND) into a pandas DataFrame.
     Optionally uses a specific AWS profile.
     """
-    session = (
-        boto3.Session(profile_name=aws_profile) if aws_profile else boto3.Session()
-    )
-    s3 = session.client("s3")
-
-    obj = s3.get_object(Bucket=bucket_name, Key=file_key)
-    df = pd.read_csv(StringIO(obj["Body"].read().decode("utf-8")))
+    df = read_csv(bucket_name, file_key, aws_profile)
 
     print(
         f"Loaded data from S3 bucket: {bucket_name}, "
@@ -58,26 +72,70 @@ def load_data_s3(bucket_name, file_key, aws_profile=None):
 
 
 # Get configuration
-supabase_config = get_supabase_config()
 s3_config = get_s3_config()
 monitoring_config = get_monitoring_config()
 
-supabase: Client = create_client(supabase_config["url"], supabase_config["key"])
+# Prediction logs: Supabase, or a local SQLite file (PREDICTION_LOG_BACKEND)
+prediction_log = get_log_store()
+# One storage client for the whole process
+storage = get_storage()
 
 # Load baseline from S3
 S3_BUCKET_NAME = s3_config["bucket_name"]
 RAW_KEY = s3_config["raw_baseline_key"]
 if not S3_BUCKET_NAME:
     raise ValueError("S3_BUCKET_NAME must be set in the environment.")
+baseline_etag = storage.etag(S3_BUCKET_NAME, RAW_KEY)
 baseline = load_data_s3(S3_BUCKET_NAME, RAW_KEY)
 
 
+def reference_columns(df):
+    """
+    Numeric baseline columns checked for drift.
+    """
+    return [
+        col
+        for col in df.columns
+        if col not in ["id", "datetime", "UNIXTime", NEW_ROW_COLUMN]
+        and pd.api.types.is_numeric_dtype(df[col])
+    ]
+
+
+# Sorted values, moments, scaler parameters and histogram per feature,
+# computed once per baseline instead of every cycle
+reference_profile = build_reference_profile(baseline, reference_columns(baseline))
+# The same columns concatenated for batched KS tests of all features
+ks_reference = presort_reference(
+    [profile["sorted_values"] for profile in reference_profile.values()]
+)
+
+
+def refresh_reference():
+    """
+    Reload the baseline and rebuild the reference profile if the baseline
+    object changed (e.g. after retraining merged new data into it).
+    """
+    global baseline, baseline_etag, reference_profile, ks_reference
+    try:
+        etag = storage.etag(S3_BUCKET_NAME, RAW_KEY)
+    except Exception as e:
+        print(f"Could not check the baseline for changes: {e}")
+        return False
+    if etag == baseline_etag:
+        return False
+    baseline = load_data_s3(S3_BUCKET_NAME, RAW_KEY)
+    reference_profile = build_reference_profile(baseline, reference_columns(baseline))
+    ks_reference = presort_reference(
+        [profile["sorted_values"] for profile in reference_profile.values()]
+    )
+    baseline_etag = etag
+    print("Baseline changed, reference profile rebuilt.")
+    return True
+
+
 # Helper to upload file to S3
 def upload_file_to_s3(local_path, bucket, s3_key):
-
-    s3 = boto3.client("s3")
-    with open(local_path, "rb") as f:
-        s3.upload_fileobj(f, bucket, s3_key)
+    storage.upload_file(local_path, bucket, s3_key)
 
 
 # Prometheus metrics
@@ -116,6 +174,9 @@ statistical_significance_share = Gauge(
     "statistical_significance_share",
     "Share of features with statistically significant drift",
 )
+binned_drift_share = Gauge(
+    "binned_drift_share", "Share of features with PSI/Jensen-Shannon drift"
+)
 
 # Individual feature drift status (0=OK, 1=WARNING, 2=CRITICAL, 3=ERROR)
 feature_drift_status = Gauge(
@@ -134,6 +195,16 @@ feature_std_change = Gauge(
 feature_p_value = Gauge(
     "feature_p_value", "P-value from statistical test for features", ["feature_name"]
 )
+feature_psi = Gauge(
+    "feature_psi",
+    "Population Stability Index over baseline quantile bins for features",
+    ["feature_name"],
+)
+feature_js_distance = Gauge(
+    "feature_js_distance",
+    "Jensen-Shannon distance over baseline quantile bins for features",
+    ["feature_name"],
+)
 
 # Create one gauge per column (skip 'id' and 'datetime')
 column_drift_gauges = {
@@ -146,15 +217,48 @@ column_drift_gauges = {
 rmse_gauge = Gauge("model_rmse", "Root Mean Squared Error of model predictions")
 rmse_pct_gauge = Gauge("model_rmse_pct", "RMSE as percent of radiation range")
 
+# Rolling window metrics (1h, 24h, 7d), from merged sketches
+window_row_count = Gauge(
+    "window_row_count", "Prediction logs read in the rolling window", ["window"]
+)
+window_rmse_gauge = Gauge(
+    "window_rmse", "RMSE of predictions in the rolling window", ["window"]
+)
+window_feature_psi = Gauge(
+    "window_feature_psi",
+    "Population Stability Index of features over the rolling window",
+    ["feature_name", "window"],
+)
+window_feature_js_distance = Gauge(
+    "window_feature_js_distance",
+    "Jensen-Shannon distance of features over the rolling window",
+    ["feature_name", "window"],
+)
+window_feature_mean_shift = Gauge(
+    "window_feature_mean_shift",
+    "Mean shift of features over the rolling window, in baseline std units",
+    ["feature_name", "window"],
+)
+window_feature_quantile = Gauge(
+    "window_feature_quantile",
+    "Approximate quantiles of features over the rolling window",
+    ["feature_name", "window", "quantile"],
+)
+
 # Get distance threshold from configuration
 DISTANCE_FEATURE_THRESHOLD = monitoring_config["distance_feature_threshold"]
-MONITORING_INTERVAL = 60  # 1 minute in seconds
+MONITORING_INTERVAL = monitoring_config["interval"]
 CONFIDENCE_LEVEL = 0.05  # 95% confidence level (standard in statistics)
+PSI_WARNING_THRESHOLD = monitoring_config["psi_warning_threshold"]
+PSI_CRITICAL_THRESHOLD = monitoring_config["psi_critical_threshold"]
+JS_DISTANCE_THRESHOLD = monitoring_config["js_distance_threshold"]
 
 print(f"Using distance feature threshold: {DISTANCE_FEATURE_THRESHOLD}")
 print(
     f"Monitoring interval: {MONITORING_INTERVAL} seconds "
-    f"({MONITORING_INTERVAL/3600:.1f} hours)"
+    f"({MONITORING_INTERVAL/3600:.1f} hours), adaptive between "
+    f"{monitoring_config['min_interval']} and "
+    f"{monitoring_config['max_interval']} seconds"
 )
 print(
     f"Statistical confidence level: {CONFIDENCE_LEVEL} "
@@ -162,95 +266,20 @@ print(
 )
 
 
-def check_statistical_significance(baseline_series, recent_series, feature_name):
+def enhanced_drift_analysis(
+    reference, recent_series, feature_name, ks_result, histogram=None
+):
     """
-    Check statistical significance using multiple tests.
-    Returns dict with test results and overall significance.
+    Enhanced drift detection using scaled parameter comparison, statistical test
+    and PSI/Jensen-Shannon distance over the baseline's quantile bins.
+    reference is the feature's baseline profile (see reference_profile.py) and
+    ks_result its (statistic, p_value) KS result from ks_2samp_batch.
+    histogram holds the recent window's bin counts if maintained incrementally;
+    otherwise recent_series is binned.
     """
-    # Remove NaN values
-    baseline_clean = baseline_series.dropna()
     recent_clean = recent_series.dropna()
 
-    if len(baseline_clean) < 10 or len(recent_clean) < 10:
-        return {
-            "significant": False,
-            "reason": "Insufficient data (< 10 samples)",
-            "tests": {},
-        }
-
-    results = {}
-
-    # Kolmogorov-Smirnov test (most common for distribution comparison)
-    try:
-        ks_stat, ks_p_value = ks_2samp(baseline_clean, recent_clean)
-        if ks_p_value < CONFIDENCE_LEVEL:
-            interpretation = f"p={ks_p_value:.4f} < 0.05(SIGNIFICANT)"
-        else:
-            interpretation = f"p={ks_p_value:.4f} > 0.05(NOT SIGNIFICANT)"
-
-        results["ks_test"] = {
-            "statistic": ks_stat,
-            "p_value": ks_p_value,
-            "significant": ks_p_value < CONFIDENCE_LEVEL,
-            "interpretation": interpretation,
-        }
-    except Exception as e:
-        results["ks_test"] = {"significant": False, "error": str(e)}
-
-    # Anderson-Darling test (for normality and distribution comparison)
-    try:
-        if len(baseline_clean) > 20 and len(recent_clean) > 20:
-            ad_stat, ad_critical, ad_significance = anderson_ksamp(
-                [baseline_clean, recent_clean]
-            )
-            if ad_significance < CONFIDENCE_LEVEL:
-                interpretation = f"p={ad_significance:.4f} < 0.05 (SIGNIFICANT)"
-            else:
-                interpretation = f"p={ad_significance:.4f} > 0.05 (NOT SIGNIFICANT)"
-
-            results["anderson_test"] = {
-                "statistic": ad_stat,
-                "significance": ad_significance,
-                "significant": ad_significance < CONFIDENCE_LEVEL,
-                "interpretation": interpretation,
-            }
-            results["anderson_test"] = {
-                "significant": False,
-                "reason": "Insufficient data for Anderson test (< 20 samples)",
-            }
-    except Exception as e:
-        results["anderson_test"] = {"significant": False, "error": str(e)}
-
-    # Count significant tests
-    significant_tests = sum(
-        [
-            results.get("ks_test", {}).get("significant", False),
-            results.get("anderson_test", {}).get("significant", False),
-        ]
-    )
-
-    # Overall significance (at least one test significant)
-    overall_significant = significant_tests >= 1
-
-    return {
-        "significant": overall_significant,
-        "significant_tests": significant_tests,
-        "total_tests": len(results),
-        "tests": results,
-    }
-
-
-def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
-    """
-    Enhanced drift detection using scaled parameter comparison and statistical test.
-    """
-    from scipy import stats
-    from sklearn.preprocessing import StandardScaler
-
-    baseline_clean = baseline_series.dropna()
-    recent_clean = recent_series.dropna()
-
-    if len(baseline_clean) < 10 or len(recent_clean) < 10:
+    if reference["n"] < 10 or len(recent_clean) < 10:
         return {
             "overall_status": "ERROR",
             "message": "Insufficient data (< 10 samples)",
@@ -261,6 +290,7 @@ def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
         "distribution_family": {},
         "parameter_drift": {},
         "statistical_test": {},
+        "binned_drift": {},
         "overall_status": "OK",
     }
 
@@ -273,22 +303,21 @@ def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
     }
 
     try:
-        scaler = StandardScaler()
-        baseline_scaled = scaler.fit_transform(
-            baseline_clean.values.reshape(-1, 1)
-        ).flatten()
-        recent_scaled = scaler.transform(recent_clean.values.reshape(-1, 1)).flatten()
-
-        baseline_mean_scaled = np.mean(baseline_scaled)
-        baseline_std_scaled = np.std(baseline_scaled)
+        # Standardize with the baseline's scaler parameters
+        recent_scaled = (
+            recent_clean.to_numpy(dtype=float) - reference["scaler_mean"]
+        ) / reference["scaler_scale"]
+
+        baseline_mean_scaled = reference["mean_scaled"]
+        baseline_std_scaled = reference["std_scaled"]
         recent_mean_scaled = np.mean(recent_scaled)
         recent_std_scaled = np.std(recent_scaled)
 
         mean_change = abs(recent_mean_scaled - baseline_mean_scaled)
         std_change = abs(recent_std_scaled - baseline_std_scaled)
 
-        baseline_mean_orig = np.mean(baseline_clean)
-        baseline_std_orig = np.std(baseline_clean)
+        baseline_mean_orig = reference["mean"]
+        baseline_std_orig = reference["std"]
         recent_mean_orig = np.mean(recent_clean)
         recent_std_orig = np.std(recent_clean)
 
@@ -337,7 +366,7 @@ def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
         }
 
     try:
-        statistic, p_value = stats.ks_2samp(baseline_clean, recent_clean)
+        statistic, p_value = ks_result
         significant = p_value < CONFIDENCE_LEVEL
 
         if p_value < 0.0001:
@@ -368,6 +397,45 @@ def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
             "significant": False,
         }
 
+    try:
+        expected = reference["bin_counts"]
+        if histogram is not None:
+            actual = histogram.counts
+        else:
+            actual = bin_counts(reference["bin_edges"], recent_clean)
+
+        if len(expected) < 2:
+            results["binned_drift"] = {
+                "status": "OK",
+                "message": "Constant baseline, no bins to compare",
+            }
+        else:
+            psi_value = psi(expected, actual)
+            js_value = js_distance(expected, actual)
+            if psi_value >= PSI_CRITICAL_THRESHOLD:
+                binned_status = "CRITICAL"
+            elif (
+                psi_value >= PSI_WARNING_THRESHOLD
+                or js_value >= JS_DISTANCE_THRESHOLD
+            ):
+                binned_status = "WARNING"
+            else:
+                binned_status = "OK"
+            results["binned_drift"] = {
+                "status": binned_status,
+                "message": (
+                    f"PSI: {psi_value:.3f}, JS distance: {js_value:.3f} "
+                    f"({len(expected)} bins)"
+                ),
+                "psi": psi_value,
+                "js_distance": js_value,
+            }
+    except Exception as e:
+        results["binned_drift"] = {
+            "status": "ERROR",
+            "message": f"Error in binned drift detection: {e}",
+        }
+
     p_value = results["statistical_test"].get("p_value", 1.0)
     combined_distance = results["parameter_drift"].get("combined_distance", 0.0)
 
@@ -379,6 +447,14 @@ def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
     else:
         results["overall_status"] = "OK"
 
+    # The binned detectors can raise the status on their own
+    severity = ["OK", "WARNING", "CRITICAL"]
+    binned_status = results["binned_drift"]["status"]
+    if binned_status in severity and severity.index(binned_status) > severity.index(
+        results["overall_status"]
+    ):
+        results["overall_status"] = binned_status
+
     results["combined_logic"] = {
         "p_value": p_value,
         "combined_distance": combined_distance,
@@ -387,19 +463,247 @@ def enhanced_drift_analysis(baseline_series, recent_series, feature_name):
         "distance_above_threshold": combined_distance > SCALED_DISTANCE_THRESHOLD,
         "both_conditions_met": p_value < CONFIDENCE_LEVEL
         and combined_distance > SCALED_DISTANCE_THRESHOLD,
+        "psi": results["binned_drift"].get("psi"),
+        "js_distance": results["binned_drift"].get("js_distance"),
     }
 
     return results
 
 
+# Prediction log columns used by the drift checks and the RMSE: the numeric
+# baseline features plus UNIXTime to join with ground truth
+LOG_COLUMNS = [
+    col
+    for col in MODEL_LOGS_COLUMNS
+    if col in baseline.columns and pd.api.types.is_numeric_dtype(baseline[col])
+]
+recent_window = LogWindow(
+    prediction_log,
+    LOG_COLUMNS,
+    max_rows=monitoring_config["window_rows"],
+    page_size=monitoring_config["fetch_page_size"],
+)
+
+
 def fetch_recent_data():
-    response = supabase.table("model_logs").select("*").limit(1200).execute()
-    data = response.data
-    return pd.DataFrame(data)
+    """
+    Read the prediction logs added since the last cycle into the window of
+    recent observations and return the window.
+    """
+    new_rows = recent_window.refresh()
+    print(
+        f"Fetched {new_rows} new prediction logs "
+        f"(window: {len(recent_window.frame)} rows, last id: {recent_window.last_id})"
+    )
+    return recent_window.data()
+
+
+def build_window_histograms():
+    """
+    Bin the recent window over the baseline's quantile bins, per feature.
+    """
+    return {
+        col: BinnedHistogram(
+            reference_profile[col]["bin_edges"], recent_window.frame[col]
+        )
+        for col in reference_profile
+        if col in LOG_COLUMNS
+    }
+
+
+# Bin counts of the recent window, updated with the rows entering and leaving
+# it each cycle
+window_histograms = build_window_histograms()
+
 
+def update_window_histograms(rebuild=False):
+    """
+    Apply the last window refresh to the bin counts, or bin the whole window
+    again when the baseline (and so the bins) changed.
+    """
+    global window_histograms
+    if rebuild:
+        window_histograms = build_window_histograms()
+        return
+    for col, histogram in window_histograms.items():
+        histogram.add(recent_window.added[col])
+        histogram.remove(recent_window.evicted[col])
+
+
+# Sketches of the logs over rolling 1h/24h/7d windows, fed with every new row
+# read through their own stream: the recent window only reads the newest
+# window_rows rows per cycle. Rows logged before the monitor started have no
+# read time to be bucketed by, so they are skipped.
+rolling_sketches = RollingSketches(
+    {col: reference_profile[col] for col in reference_profile if col in LOG_COLUMNS}
+)
+sketch_stream = LogStream(
+    prediction_log,
+    LOG_COLUMNS,
+    page_size=monitoring_config["fetch_page_size"],
+    skip_existing=True,
+)
 
-def update_metrics():
+# Columns of the streamed rows kept to add their prediction errors
+ERROR_COLUMNS = [col for col in ("UNIXTime", "Radiation") if col in LOG_COLUMNS]
+
+
+def update_rolling_windows(reset=False):
+    """
+    Add every row logged since the last cycle to the rolling window
+    sketches and export each window's drift statistics. The sketches use
+    the baseline's bins, so they start over when the baseline changed.
+    Returns the UNIXTime and Radiation of the rows added, for their errors.
+    """
+    global rolling_sketches
+    if reset:
+        rolling_sketches = RollingSketches(
+            {
+                col: reference_profile[col]
+                for col in reference_profile
+                if col in LOG_COLUMNS
+            }
+        )
+        print("Rolling window sketches reset for the new baseline.")
+    streamed = []
+
+    def consume(page):
+        rolling_sketches.add_rows(page)
+        streamed.append(page[ERROR_COLUMNS])
+
+    sketch_stream.read(consume)
+
+    for window in WINDOWS:
+        sketch = rolling_sketches.window(window)
+        counts = [feature.count for feature in sketch.features.values()]
+        window_row_count.labels(window=window).set(max(counts, default=0))
+        for col, stats in window_drift(rolling_sketches.profile, sketch).items():
+            if "psi" in stats:
+                window_feature_psi.labels(feature_name=col, window=window).set(
+                    stats["psi"]
+                )
+                window_feature_js_distance.labels(
+                    feature_name=col, window=window
+                ).set(stats["js_distance"])
+            if "mean_shift" in stats:
+                window_feature_mean_shift.labels(feature_name=col, window=window).set(
+                    stats["mean_shift"]
+                )
+            for q, value in stats["quantiles"].items():
+                window_feature_quantile.labels(
+                    feature_name=col, window=window, quantile=str(q)
+                ).set(value)
+    if not streamed:
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    return pd.concat(streamed, ignore_index=True)
+
+
+def run_evidently_report(reference_data, current_data):
+    """
+    Run the Evidently data drift report, upload its HTML to S3 and return
+    the share of drifted columns. Runs in the report worker.
+    """
+    report = Report(metrics=[DataDriftPreset()])
+    report.run(reference_data=reference_data, current_data=current_data)
+    result = report.as_dict()
+    drift_share = result["metrics"][0]["result"].get("share_of_drifted_columns", 0.0)
+    data_drift_gauge.set(drift_share)
+    print(f"Evidently drift share: {drift_share}")
+
+    # Generate and save HTML report
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    html_filename = f"data_drift_report_{timestamp}.html"
+    html_path = os.path.join(BASE_DIR, html_filename)
+
+    try:
+        # Save HTML report locally
+        report.save_html(html_path)
+        print(f"HTML report saved locally: {html_path}")
+
+        # Upload HTML report to S3
+        s3_key = f"monitoring-reports/{html_filename}"
+        upload_file_to_s3(html_path, S3_BUCKET_NAME, s3_key)
+        print(f"HTML report uploaded to S3: s3://{S3_BUCKET_NAME}/{s3_key}")
+
+    except Exception as e:
+        print(f"Failed to save/upload HTML report: {e}")
+    finally:
+        # Clean up local file
+        if os.path.exists(html_path):
+            os.remove(html_path)
+
+    # Print full JSON drift result for debugging
+    drift_json = result["metrics"][0]["result"].copy()
+    drift_json.pop("drift_share", None)  # Remove legacy/unused field if present
+    print(json.dumps(drift_json, indent=2))
+
+    return drift_share
+
+
+report_worker = ReportWorker(
+    run_evidently_report,
+    min_interval=monitoring_config["report_interval"],
+    min_gap=monitoring_config["report_min_gap"],
+)
+# Feature drift statuses of the last cycle, to report early on changes
+last_drift_statuses = None
+
+# Per-feature analysis in workers forked once, sharing the reference profile
+feature_pool = FeaturePool(
+    monitoring_config["workers"], monitoring_config["parallel_min_features"]
+)
+
+
+# Ingest cycles so far, so the analysis stages can tell if they missed one
+ingest_cycle = 0
+
+
+def ingest():
+    """
+    Refresh the baseline and the window of recent logs, and update the
+    incremental statistics. Returns a snapshot of the cycle's inputs, so
+    the analysis stages can run while the next cycle ingests.
+    """
+    global ingest_cycle
+    reference_changed = refresh_reference()
     recent = fetch_recent_data()
+    update_window_histograms(rebuild=reference_changed)
+    streamed = update_rolling_windows(reset=reference_changed)
+    new_rows = len(recent_window.added)
+    scheduler.observe_rows(new_rows)
+    if ingest_cycle and not new_rows and not reference_changed:
+        print("No new prediction logs or baseline changes, skipping analysis.")
+        return None
+    ingest_cycle += 1
+    return {
+        "cycle": ingest_cycle,
+        "recent": recent,
+        "added": recent_window.added,
+        "evicted": recent_window.evicted,
+        "streamed": streamed,
+        "baseline": baseline,
+        "baseline_etag": baseline_etag,
+        "reference_profile": reference_profile,
+        "ks_reference": ks_reference,
+        "histograms": {
+            col: histogram.copy() for col, histogram in window_histograms.items()
+        },
+    }
+
+
+def update_metrics(snapshot=None):
+    """
+    Drift analysis of one cycle's snapshot (see ingest), ingesting first if
+    none is given.
+    """
+    global last_drift_statuses
+    if snapshot is None:
+        snapshot = ingest()
+    # The cycle's inputs stay consistent while the next cycle ingests
+    recent = snapshot["recent"]
+    baseline = snapshot["baseline"]
+    reference_profile = snapshot["reference_profile"]
+    window_histograms = snapshot["histograms"]
     if recent.empty:
         print("No recent data fetched.")
         return 0.0, 0.0, recent
@@ -427,6 +731,14 @@ def update_metrics():
 
     print("Dtypes equal:", baseline_numeric.dtypes.equals(recent_numeric.dtypes))
 
+    # KS tests of all features at once against the presorted baseline
+    ks_columns = list(reference_profile)
+    ks_statistics, ks_p_values = ks_2samp_batch(
+        snapshot["ks_reference"],
+        recent_numeric.reindex(columns=ks_columns).to_numpy(dtype=float),
+    )
+    ks_results = dict(zip(ks_columns, zip(ks_statistics, ks_p_values)))
+
     # Enhanced Multi-Level Drift Analysis
     print("🔍 Enhanced Multi-Level Drift Analysis:")
     print("=" * 50)
@@ -436,11 +748,20 @@ def update_metrics():
     warning_count = 0
     ok_count = 0
 
-    for col in numeric_cols:
-        # Run enhanced analysis
-        enhanced_result = enhanced_drift_analysis(
-            baseline_numeric[col], recent_numeric[col], col
-        )
+    # Run enhanced analysis, over the process pool for many features
+    feature_results = feature_pool.map(
+        enhanced_drift_analysis,
+        reference_profile,
+        [
+            (
+                col,
+                (recent_numeric[col], col, ks_results[col], window_histograms.get(col)),
+            )
+            for col in numeric_cols
+        ],
+    )
+
+    for col, enhanced_result in zip(numeric_cols, feature_results):
         enhanced_results.append(enhanced_result)
 
         # Count statuses
@@ -463,6 +784,10 @@ def update_metrics():
             f"  🔬 Statistical: {enhanced_result['statistical_test']['status']} "
             f"- {enhanced_result['statistical_test']['message']}"
         )
+        print(
+            f"  📊 Binned: {enhanced_result['binned_drift']['status']} "
+            f"- {enhanced_result['binned_drift']['message']}"
+        )
         print(f"  🎯 Overall: {enhanced_result['overall_status']}")
 
     # Calculate enhanced drift metrics
@@ -488,6 +813,12 @@ def update_metrics():
         if r["statistical_test"]["status"] in ["CRITICAL", "WARNING"]
     )
 
+    binned_issues = sum(
+        1
+        for r in enhanced_results
+        if r["binned_drift"]["status"] in ["CRITICAL", "WARNING"]
+    )
+
     distribution_share = (
         distribution_issues / total_features if total_features > 0 else 0.0
     )
@@ -505,6 +836,9 @@ def update_metrics():
     distribution_drift_share.set(distribution_share)
     parameter_drift_share.set(parameter_share)
     statistical_significance_share.set(statistical_share)
+    binned_drift_share.set(
+        binned_issues / total_features if total_features > 0 else 0.0
+    )
 
     # Update individual feature metrics
     for i, result in enumerate(enhanced_results):
@@ -530,6 +864,14 @@ def update_metrics():
                 result["statistical_test"]["p_value"]
             )
 
+        if "psi" in result["binned_drift"]:
+            feature_psi.labels(feature_name=feature_name).set(
+                result["binned_drift"]["psi"]
+            )
+            feature_js_distance.labels(feature_name=feature_name).set(
+                result["binned_drift"]["js_distance"]
+            )
+
     # Keep the old metric for backward compatibility
     statistical_drift_gauge.set(enhanced_share)
 
@@ -551,39 +893,18 @@ def update_metrics():
 
     print(f"\n🎯 Overall Status: {drift_status}")
 
-    # Calculate overall data drift on numeric columns
-    report = Report(metrics=[DataDriftPreset()])
-    report.run(reference_data=baseline_numeric, current_data=recent_numeric)
-    result = report.as_dict()
-    drift_share = result["metrics"][0]["result"].get("share_of_drifted_columns", 0.0)
-    data_drift_gauge.set(drift_share)
-    print(f"Evidently drift share: {drift_share}")
-
-    # Generate and save HTML report
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    html_filename = f"data_drift_report_{timestamp}.html"
-    html_path = os.path.join(BASE_DIR, html_filename)
-
-    try:
-        # Save HTML report locally
-        report.save_html(html_path)
-        print(f"HTML report saved locally: {html_path}")
-
-        # Upload HTML report to S3
-        s3_key = f"monitoring-reports/{html_filename}"
-        upload_file_to_s3(html_path, S3_BUCKET_NAME, s3_key)
-        print(f"HTML report uploaded to S3: s3://{S3_BUCKET_NAME}/{s3_key}")
-
-        # Clean up local file (optional)
-        # os.remove(html_path)
-
-    except Exception as e:
-        print(f"Failed to save/upload HTML report: {e}")
-
-    # Print full JSON drift result for debugging
-    drift_json = result["metrics"][0]["result"].copy()
-    drift_json.pop("drift_share", None)  # Remove legacy/unused field if present
-    print(json.dumps(drift_json, indent=2))
+    # The Evidently report runs in the background, on its own schedule or
+    # sooner when a feature's drift status changed; its gauge updates when
+    # it finishes
+    drift_statuses = [r["overall_status"] for r in enhanced_results]
+    report_worker.submit(
+        (snapshot["baseline_etag"], window_key(recent_numeric)),
+        baseline_numeric,
+        recent_numeric.copy(),
+        drift_changed=drift_statuses != last_drift_statuses,
+    )
+    last_drift_statuses = drift_statuses
+    drift_share = report_worker.latest if report_worker.latest is not None else 0.0
 
     # For RMSE: use the original 'recent' DataFrame (with UNIXTime) and ground truth
     # Do NOT drop/exclude UNIXTime from these DataFrames
@@ -593,49 +914,65 @@ def update_metrics():
 
 def clear_model_logs():
     try:
-        supabase.table("model_logs").delete().neq("id", 0).execute()
-        print("Supabase model_logs cleared.")
+        prediction_log.clear()
+        print("model_logs cleared.")
     except Exception as e:
         print("Failed to clear model_logs:", e)
 
 
-def compute_rmse_with_ground_truth(recent):
+# Ground truth indexed by UNIXTime, and the window's running RMSE against it
+GROUND_TRUTH_KEY = "raw-data/new_data/new_data.csv"
+ground_truth = GroundTruthIndex(S3_BUCKET_NAME, GROUND_TRUTH_KEY, storage)
+window_errors = RunningRMSE(ground_truth)
+
 
-    # Fetch ground truth from S3 (raw-data/new_data/new_data.csv)
-    s3 = boto3.client("s3")
-    key = "raw-data/new_data/new_data.csv"
+def compute_rmse_with_ground_truth(recent, added=None, evicted=None, streamed=None):
+    """
+    RMSE of the recent window against the ground truth. added and evicted
+    are the rows that entered and left the window this cycle (by default
+    those of the last refresh). streamed holds every row logged this cycle,
+    for the rolling window RMSE (by default the rows added to the window).
+    """
+    added = recent_window.added if added is None else added
+    evicted = recent_window.evicted if evicted is None else evicted
+    streamed = added if streamed is None else streamed
+
+    # Ground truth from S3 (raw-data/new_data/new_data.csv), reloaded only
+    # when it changed
     try:
-        csv_obj = s3.get_object(Bucket=S3_BUCKET_NAME, Key=key)
-        ground_truth_df = pd.read_csv(io.BytesIO(csv_obj["Body"].read()))
+        ground_truth_changed = ground_truth.refresh()
     except Exception as e:
         print(f"Could not fetch ground truth from S3: {e}")
+        window_errors.invalidate()
         return
-    if ground_truth_df.empty:
+    if ground_truth.empty:
         print("No ground truth data found in S3.")
+        window_errors.invalidate()
         return
     if recent.empty:
         print("No recent predictions found in Supabase.")
         return
-    # Ensure UNIXTime is the same type
-    recent["UNIXTime"] = recent["UNIXTime"].astype(int)
-    ground_truth_df["UNIXTime"] = ground_truth_df["UNIXTime"].astype(int)
-    merged = pd.merge(
-        recent, ground_truth_df[["UNIXTime", "Radiation"]], on="UNIXTime", how="inner"
-    )
-    if merged.empty:
+
+    # Join by UNIXTime: only the rows entering and leaving the window, unless
+    # the ground truth changed
+    if ground_truth_changed or not window_errors.valid:
+        window_errors.reset(recent)
+    else:
+        window_errors.update(added, evicted)
+    if not window_errors.count:
         print("No matching UNIXTime values between predictions and ground truth.")
         return
-    if "Radiation_x" not in merged.columns or "Radiation_y" not in merged.columns:
-        print("Merged DataFrame does not contain required columns for RMSE.")
-        print("Merged columns:", merged.columns.tolist())
-        print("Merged DataFrame head:\n", merged.head())
-        return
-    rmse = np.sqrt(mean_squared_error(merged["Radiation_y"], merged["Radiation_x"]))
+    rmse = window_errors.rmse
+
+    # Rolling window RMSE: add the errors of the rows logged this cycle only
+    rolling_sketches.add_errors(ground_truth.errors(streamed))
+    for window in WINDOWS:
+        window_rmse = rolling_sketches.window(window).rmse
+        if not np.isnan(window_rmse):
+            window_rmse_gauge.labels(window=window).set(window_rmse)
 
     # Provide context for RMSE interpretation
-    radiation_range = (
-        ground_truth_df["Radiation"].max() - ground_truth_df["Radiation"].min()
-    )
+    radiation_range = ground_truth.radiation_range
     rmse_percentage = (rmse / radiation_range) * 100 if radiation_range > 0 else 0
 
     # Set Prometheus metrics
@@ -670,13 +1007,64 @@ def compute_rmse_with_ground_truth(recent):
     return rmse
 
 
+def drift_stage(snapshot):
+    drift_share, enhanced_share, _ = update_metrics(snapshot)
+    scheduler.observe_drift(enhanced_share)
+    print(f"Drift Share: {drift_share:.2f}, Enhanced Share: {enhanced_share:.2f}")
+
+
+# Last cycle the RMSE stage processed: its running sums are rebuilt after a
+# skipped cycle, whose window changes it never saw
+last_rmse_cycle = 0
+
+
+def rmse_stage(snapshot):
+    global last_rmse_cycle
+    if snapshot["cycle"] != last_rmse_cycle + 1:
+        window_errors.invalidate()
+    last_rmse_cycle = snapshot["cycle"]
+    compute_rmse_with_ground_truth(
+        snapshot["recent"],
+        snapshot["added"],
+        snapshot["evicted"],
+        snapshot["streamed"],
+    )
+
+
+# Cycle pacing from traffic and drift (see scheduler.py)
+scheduler = AdaptiveScheduler(
+    MONITORING_INTERVAL,
+    monitoring_config["min_interval"],
+    monitoring_config["max_interval"],
+    monitoring_config["busy_rows"],
+    backoff=monitoring_config["backoff"],
+    jitter=monitoring_config["jitter"],
+)
+
+
+def next_interval(snapshot):
+    interval = scheduler.next_interval()
+    print(f"Next check in {interval/60:.1f} minutes...")
+    return interval
+
+
 if __name__ == "__main__":
+    # Fork the analysis workers before any other thread starts
+    if monitoring_config["workers"] > 1:
+        feature_pool.start(reference_profile)
     start_http_server(8080)
     print("Prometheus metrics available on port 8080")
+    report_worker.start()
     print("Starting drift monitoring...")
-    while True:
-        drift_share, enhanced_share, recent = update_metrics()
-        print(f"Drift Share: {drift_share:.2f}, Enhanced Share: {enhanced_share:.2f}")
-        compute_rmse_with_ground_truth(recent)
-        print(f"Next check in {MONITORING_INTERVAL/60:.1f} minutes...")
-        time.sleep(MONITORING_INTERVAL)
+    # Ingestion, drift analysis and RMSE run as concurrent stages, each
+    # with its own timeout (the Evidently report runs in report_worker)
+    asyncio.run(
+        run_monitor(
+            Stage("ingest", ingest, monitoring_config["ingest_timeout"]),
+            [
+                Stage("drift", drift_stage, monitoring_config["drift_timeout"]),
+                Stage("rmse", rmse_stage, monitoring_config["rmse_timeout"]),
+            ],
+            next_interval,
+        )
+    )
@@ -0,0 +1,54 @@
+import numpy as np
+
+# Quantile bins per feature, for histogram-based detectors
+HISTOGRAM_BINS = 10
+# Finer quantile bins, for approximate quantiles of recent data
+QUANTILE_BINS = 100
+
+
+def feature_profile(values, bins=HISTOGRAM_BINS):
+    """
+    Summarize one baseline column for the drift detectors: its sorted
+    non-NaN values, moments, StandardScaler parameters and quantile
+    histogram. Computed once, so each cycle only touches the recent data.
+    """
+    clean = np.asarray(values, dtype=float)
+    clean = clean[~np.isnan(clean)]
+    sorted_values = np.sort(clean)
+    n = len(sorted_values)
+    mean = float(np.mean(sorted_values)) if n else float("nan")
+    std = float(np.std(sorted_values)) if n else float("nan")
+    # StandardScaler leaves constant columns unscaled
+    scale = std if n and sorted_values[-1] > sorted_values[0] else 1.0
+
+    if n:
+        edges = np.unique(np.quantile(sorted_values, np.linspace(0, 1, bins + 1)))
+        counts = np.histogram(sorted_values, edges)[0]
+        quantile_edges = np.unique(
+            np.quantile(sorted_values, np.linspace(0, 1, QUANTILE_BINS + 1))
+        )
+    else:
+        edges, counts = np.array([]), np.array([], dtype=int)
+        quantile_edges = np.array([])
+
+    return {
+        "n": n,
+        "sorted_values": sorted_values,
+        "mean": mean,
+        "std": std,
+        "scaler_mean": mean,
+        "scaler_scale": scale,
+        # Moments of the standardized baseline
+        "mean_scaled": 0.0,
+        "std_scaled": std / scale if n else float("nan"),
+        "bin_edges": edges,
+        "bin_counts": counts,
+        "quantile_edges": quantile_edges,
+    }
+
+
+def build_reference_profile(baseline, columns, bins=HISTOGRAM_BINS):
+    """
+    Return a feature profile (see feature_profile) per baseline column.
+    """
+    return {col: feature_profile(baseline[col], bins) for col in columns}
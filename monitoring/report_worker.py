@@ -0,0 +1,95 @@
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+
+def window_key(frame):
+    """
+    Content hash of a data window, so identical windows share one report.
+    """
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(",".join(map(str, frame.columns)).encode())
+    return digest.hexdigest()
+
+
+class ReportWorker:
+    """
+    Runs a slow report job (the Evidently drift report) in a background
+    thread, so the monitoring cycle never waits for it. Reports run on
+    their own schedule (min_interval seconds apart), or sooner when drift
+    changes (but never closer than min_gap seconds). At most one report is
+    pending at a time, and results are cached by key, so an unchanged
+    window is never reported twice.
+    """
+
+    def __init__(self, run_report, min_interval=3600, min_gap=300, cache_size=8):
+        self.run_report = run_report
+        self.min_interval = min_interval
+        self.min_gap = min_gap
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.latest = None
+        self.last_submitted = None
+        self._jobs = queue.Queue(maxsize=1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def wait(self):
+        """
+        Block until the pending report, if any, has finished.
+        """
+        self._jobs.join()
+
+    def submit(self, key, *args, drift_changed=False):
+        """
+        Queue a report of args unless the key was already reported, it is
+        too soon since the last one, or another one is still pending.
+        Returns whether the report was queued.
+        """
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.latest = self.cache[key]
+                return False
+        now = time.monotonic()
+        gap = self.min_gap if drift_changed else self.min_interval
+        if self.last_submitted is not None and now - self.last_submitted < gap:
+            return False
+        try:
+            self._jobs.put_nowait((key, args))
+        except queue.Full:
+            return False
+        self.last_submitted = now
+        return True
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    return
+                key, args = job
+                result = self.run_report(*args)
+                with self._lock:
+                    self.cache[key] = result
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                    self.latest = result
+            except Exception as e:
+                print(f"Report failed: {e}")
+            finally:
+                self._jobs.task_done()
@@ -0,0 +1,242 @@
+import threading
+import time
+import numpy as np
+
+from monitoring.binned_drift import BinnedHistogram, js_distance, psi
+
+# Rolling windows: (bucket width in seconds, number of buckets)
+WINDOWS = {
+    "1h": (300, 12),
+    "24h": (3600, 24),
+    "7d": (6 * 3600, 28),
+}
+# Quantiles reported per feature and window
+WINDOW_QUANTILES = (0.05, 0.5, 0.95)
+
+
+class FeatureSketch:
+    """
+    Mergeable, fixed-size summary of one feature's values: count, mean and
+    sum of squared deviations, bin counts over the baseline's drift bins,
+    and counts over its finer quantile bins (plus one bin below and one
+    above) for approximate quantiles.
+    """
+
+    def __init__(self, bin_edges, quantile_edges):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.bins = BinnedHistogram(bin_edges)
+        self.quantile_edges = quantile_edges
+        self.quantile_counts = np.zeros(len(quantile_edges) + 1, dtype=np.int64)
+
+    def _merge_moments(self, count, mean, m2):
+        """
+        Combine running moments with those of another set of values
+        (Chan et al.'s parallel update).
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        mean = values.mean()
+        self._merge_moments(len(values), mean, ((values - mean) ** 2).sum())
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+        self.bins.add(values)
+        self.quantile_counts += np.bincount(
+            np.searchsorted(self.quantile_edges, values, side="right"),
+            minlength=len(self.quantile_counts),
+        )
+
+    def merge(self, other):
+        if not other.count:
+            return
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.bins.counts += other.bins.counts
+        self.quantile_counts += other.quantile_counts
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / self.count)) if self.count else float("nan")
+
+    def quantile(self, q):
+        """
+        Approximate quantile, interpolated linearly within the quantile bin
+        holding the requested rank. Its rank error is at most the baseline
+        share of one bin (1% with 100 bins), clipped to the observed range.
+        """
+        if not self.count:
+            return float("nan")
+        lows = np.concatenate([[self.minimum], self.quantile_edges])
+        highs = np.concatenate([self.quantile_edges, [self.maximum]])
+        cumulative = np.cumsum(self.quantile_counts)
+        rank = q * self.count
+        i = min(
+            int(np.searchsorted(cumulative, rank, side="left")),
+            len(cumulative) - 1,
+        )
+        in_bin = self.quantile_counts[i]
+        fraction = (rank - (cumulative[i] - in_bin)) / in_bin if in_bin else 0.0
+        low = max(lows[i], self.minimum)
+        high = min(highs[i], self.maximum)
+        return float(low + fraction * (high - low))
+
+
+class WindowSketch:
+    """
+    Sketches of every feature, plus the count and sum of squared
+    prediction errors, for one time bucket or a merged window.
+    """
+
+    def __init__(self, profile):
+        self.features = {
+            col: FeatureSketch(reference["bin_edges"], reference["quantile_edges"])
+            for col, reference in profile.items()
+        }
+        self.error_count = 0
+        self.squared_error = 0.0
+
+    def merge(self, other):
+        for col, sketch in self.features.items():
+            sketch.merge(other.features[col])
+        self.error_count += other.error_count
+        self.squared_error += other.squared_error
+
+    @property
+    def rmse(self):
+        if not self.error_count:
+            return float("nan")
+        return float(np.sqrt(self.squared_error / self.error_count))
+
+
+class RingBuffer:
+    """
+    A fixed number of time buckets of equal width. A slot is cleared and
+    reused when its turn comes round again, so memory stays fixed however
+    many rows arrive.
+    """
+
+    def __init__(self, width, n_buckets, make_bucket):
+        self.width = width
+        self.n_buckets = n_buckets
+        self.make_bucket = make_bucket
+        self.epochs = [None] * n_buckets
+        self.buckets = [None] * n_buckets
+
+    def bucket(self, timestamp):
+        """
+        Return the bucket covering timestamp, starting a new one if needed.
+        """
+        epoch = int(timestamp // self.width)
+        slot = epoch % self.n_buckets
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.buckets[slot] = self.make_bucket()
+        return self.buckets[slot]
+
+    def live_buckets(self, now):
+        """
+        Buckets that still fall inside the window ending at now.
+        """
+        epoch = int(now // self.width)
+        return [
+            bucket
+            for bucket_epoch, bucket in zip(self.epochs, self.buckets)
+            if bucket_epoch is not None
+            and epoch - self.n_buckets < bucket_epoch <= epoch
+        ]
+
+
+class RollingSketches:
+    """
+    Per-feature sketches of the prediction logs over rolling time windows
+    (see WINDOWS), updated incrementally with the rows read each cycle.
+    Rows are bucketed by the time the monitor reads them, since the logged
+    datetime is supplied by the client. Window statistics merge the live
+    buckets, so no window ever re-reads old logs. Safe to update and read
+    from different threads.
+    """
+
+    def __init__(self, profile, windows=WINDOWS):
+        self.profile = profile
+        self.rings = {
+            name: RingBuffer(width, n_buckets, lambda: WindowSketch(profile))
+            for name, (width, n_buckets) in windows.items()
+        }
+        self._lock = threading.Lock()
+
+    def add_rows(self, frame, timestamp=None):
+        """
+        Add the feature columns of newly read rows to every window.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        columns = [col for col in self.profile if col in frame.columns]
+        with self._lock:
+            for ring in self.rings.values():
+                bucket = ring.bucket(timestamp)
+                for col in columns:
+                    bucket.features[col].add(frame[col])
+
+    def add_errors(self, errors, timestamp=None):
+        """
+        Add prediction errors (prediction minus ground truth) to every window.
+        """
+        errors = np.asarray(errors, dtype=float)
+        errors = errors[np.isfinite(errors)]
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for ring in self.rings.values():
+                bucket = ring.bucket(timestamp)
+                bucket.error_count += len(errors)
+                bucket.squared_error += float((errors**2).sum())
+
+    def window(self, name, now=None):
+        """
+        Merge the live buckets of a window into one WindowSketch.
+        """
+        now = time.time() if now is None else now
+        merged = WindowSketch(self.profile)
+        with self._lock:
+            for bucket in self.rings[name].live_buckets(now):
+                merged.merge(bucket)
+        return merged
+
+
+def window_drift(profile, sketch):
+    """
+    Drift statistics of every feature in a merged window against the
+    baseline profile: PSI and Jensen-Shannon distance over the drift bins,
+    mean shift in baseline standard deviations, and approximate quantiles.
+    """
+    results = {}
+    for col, feature in sketch.features.items():
+        reference = profile[col]
+        result = {
+            "count": feature.count,
+            "mean": feature.mean if feature.count else float("nan"),
+            "std": feature.std,
+            "quantiles": {q: feature.quantile(q) for q in WINDOW_QUANTILES},
+        }
+        if feature.count:
+            result["mean_shift"] = (
+                abs(feature.mean - reference["scaler_mean"]) / reference["scaler_scale"]
+            )
+            if len(reference["bin_counts"]) >= 2:
+                result["psi"] = psi(reference["bin_counts"], feature.bins.counts)
+                result["js_distance"] = js_distance(
+                    reference["bin_counts"], feature.bins.counts
+                )
+        results[col] = result
+    return results
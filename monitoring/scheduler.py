@@ -0,0 +1,72 @@
+import random
+
+
+class AdaptiveScheduler:
+    """
+    Chooses the pause before the next monitoring cycle from recent traffic
+    and drift. The interval halves (down to min_interval) when at least
+    busy_rows new logs arrived or the drift share rose, grows by backoff
+    (up to max_interval) while no new logs arrive, and returns to the
+    configured interval otherwise. Random jitter keeps several monitors
+    from polling in lockstep.
+    """
+
+    def __init__(
+        self,
+        interval,
+        min_interval,
+        max_interval,
+        busy_rows,
+        backoff=2.0,
+        jitter=0.1,
+        seed=None,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.base_interval = self._clamp(interval)
+        self.interval = self.base_interval
+        self.busy_rows = busy_rows
+        self.backoff = backoff
+        self.jitter = jitter
+        self.new_rows = 0
+        self.drift = None
+        self.previous_drift = None
+        self._rng = random.Random(seed)
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def observe_rows(self, count):
+        """
+        Record new prediction logs read by a cycle.
+        """
+        self.new_rows += count
+
+    def observe_drift(self, share):
+        """
+        Record the drift share of an analysed cycle.
+        """
+        self.drift = share
+
+    def drift_rising(self):
+        return (
+            self.drift is not None
+            and self.previous_drift is not None
+            and self.drift > self.previous_drift
+        )
+
+    def next_interval(self):
+        """
+        Seconds until the next cycle, given what was observed since the last
+        call.
+        """
+        if self.new_rows >= self.busy_rows or self.drift_rising():
+            self.interval = self._clamp(self.interval / self.backoff)
+        elif not self.new_rows:
+            self.interval = self._clamp(self.interval * self.backoff)
+        else:
+            self.interval = self.base_interval
+        self.new_rows = 0
+        self.previous_drift = self.drift
+        jitter = self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+        return self._clamp(self.interval * jitter)
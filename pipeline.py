@@ -1,19 +1,53 @@
-from mlpipeline.data_preparation import load_and_prepare_data, load_data_s3
+from mlpipeline.data_preparation import (
+    cached,
+    load_and_prepare_data,
+    load_data_s3,
+    s3_object_cache_key,
+)
 from mlpipeline.model_training import train_tune_models
-from mlpipeline.model_logging import log_models_to_mlflow, setup_mlflow
+from mlpipeline.incremental_training import (
+    incremental_retrain,
+    compare_retrain_modes,
+)
+from mlpipeline.model_compression import compress_models
+from mlpipeline.model_logging import (
+    log_models_to_mlflow,
+    setup_mlflow,
+    wait_for_model_uploads,
+)
 from mlpipeline.evaluate_and_register import evaluate_and_register
+from mlpipeline.profiling import collect_profile, log_profile_to_mlflow
 from prefect import flow, get_run_logger
-from config import get_s3_config, get_mlflow_config
+from config import (
+    get_s3_config,
+    get_mlflow_config,
+    get_training_config,
+    get_profiling_config,
+)
 
 
 @flow(name="ML Pipeline")
-def main(bucket_name=None, raw_key=None, processed_key=None):
+def main(
+    bucket_name=None,
+    raw_key=None,
+    processed_key=None,
+    training_mode="full",
+    refresh_cache=False,
+):
     """
     Main pipeline flow for data preparation,
     model training, logging, and evaluation.
     Accepts optional S3 bucket and key overrides.
+    training_mode is "full", "incremental" (warm-start the production model
+    with the rows marked as new by the latest merge, falling back to a full
+    refit when the staleness rules require it) or "compare" (run both and
+    keep the mode that does better on the new rows neither has seen).
+    refresh_cache recomputes the cached data preparation results instead
+    of reusing them.
     """
     logger = get_run_logger()
+    # Start a fresh per-stage resource profile for this run
+    collect_profile()
 
     # Retrieve configuration for S3 and MLflow
     s3_config = get_s3_config()
@@ -33,20 +67,19 @@ def main(bucket_name=None, raw_key=None, processed_key=None):
     # Step 1: Preprocess raw data and save processed data to S3
     logger.info("Running data preparation...")
     logger.info(f"Using raw data from: s3://{bucket}/{raw_key}")
-    load_and_prepare_data(file_key=raw_key, bucket_name=bucket)
+    load_and_prepare_data(
+        file_key=raw_key, bucket_name=bucket, refresh_cache=refresh_cache
+    )
 
     # Step 2: Load processed data from S3 for model training
     logger.info("Loading processed data from S3 for model training...")
     logger.info(f"Loading from: s3://{bucket}/{processed_key}")
-    df = load_data_s3(bucket, processed_key)
+    load_processed = cached(load_data_s3, s3_object_cache_key, refresh_cache)
+    df = load_processed(bucket, processed_key)
 
     # Step 3: Model training and subsequent steps
     logger.info(f"Data prepared: {df.shape[0]} rows, {df.shape[1]} columns")
 
-    logger.info("Training and tuning models...")
-    all_runs, X_val, X_test, y_test = train_tune_models(df)
-    logger.info(f"Model tuning completed. Total runs: {len(all_runs)}")
-
     # Set up MLflow tracking and experiment
     logger.info("Setting up MLflow...")
     logger.info(f"MLflow tracking URI: {mlflow_config['tracking_uri']}")
@@ -55,15 +88,70 @@ def main(bucket_name=None, raw_key=None, processed_key=None):
         experiment_name=mlflow_config["experiment_name"],
     )
 
+    all_runs = []
+    if training_mode in ("incremental", "compare"):
+        logger.info("Incrementally updating the production model...")
+        incremental = incremental_retrain(df)
+        if incremental is not None:
+            all_runs, X_val, X_test, y_test = incremental
+
+    if not all_runs or training_mode == "compare":
+        logger.info("Training and tuning models...")
+        full_runs, X_val, X_test, y_test = train_tune_models(df)
+        all_runs = all_runs + full_runs
+    logger.info(f"Model tuning completed. Total runs: {len(all_runs)}")
+
+    if training_mode == "compare":
+        all_runs = compare_retrain_modes(all_runs, df, logger)
+
+    if get_training_config()["compression_enabled"]:
+        logger.info("Compressing forest models...")
+        all_runs = all_runs + compress_models(all_runs, df)
+
     # Log models to MLflow
     logger.info("Logging models to MLflow...")
-    logged_runs = log_models_to_mlflow(all_runs, X_val)
-    logger.info(f"Logged {len(logged_runs)} runs to MLflow.")
+    try:
+        logged_runs = log_models_to_mlflow(
+            all_runs,
+            X_val,
+            async_artifacts=mlflow_config["async_logging"],
+            max_workers=mlflow_config["logging_workers"],
+            serialization_format=mlflow_config["serialization_format"],
+            compression_level=mlflow_config["compression_level"],
+        )
+        logger.info(f"Logged {len(logged_runs)} runs to MLflow.")
+
+        # Evaluate and register the best model
+        logger.info("Evaluating and registering best model...")
+        best_run, test_results = evaluate_and_register(
+            logged_runs,
+            X_test,
+            y_test,
+            serialization_format=mlflow_config["serialization_format"],
+            compression_level=mlflow_config["compression_level"],
+        )
+        logger.info(f"Best model registered: {best_run}")
 
-    # Evaluate and register the best model
-    logger.info("Evaluating and registering best model...")
-    best_run, test_results = evaluate_and_register(logged_runs, X_test, y_test)
-    logger.info(f"Best model registered: {best_run}")
+        # Log where time and memory went on the runs trained here, so
+        # regressions show across retrains. Cached runs keep the profile
+        # of the pipeline run that trained them.
+        if get_profiling_config()["enabled"]:
+            profiled_run_ids = [
+                run["run_id"] for run in logged_runs if not run.get("cached")
+            ]
+            log_profile_to_mlflow(
+                collect_profile(),
+                profiled_run_ids,
+                tags={
+                    "best_run_id": best_run["run_id"],
+                    "pipeline_training_mode": training_mode,
+                },
+            )
+            logger.info(f"Pipeline profile logged to {len(profiled_run_ids)} runs")
+    finally:
+        # Every model upload must be stored, or have its failure raised,
+        # before the flow returns
+        wait_for_model_uploads(logger)
     logger.info("Pipeline completed successfully.")
 
 
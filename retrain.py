@@ -1,11 +1,11 @@
 import pandas as pd
 from pipeline import main
 from mlpipeline.data_preparation import load_data_s3
+from mlpipeline.preprocessing_utils import NEW_ROW_COLUMN
+from mlpipeline.storage import get_storage, write_csv
 from prefect import flow, get_run_logger, task
-import boto3
 from datetime import datetime
-import io
-from config import get_s3_config
+from config import get_s3_config, get_training_config
 import requests
 
 
@@ -34,12 +34,10 @@ def get_config():
 @task(task_run_name="save merged data to s3", retries=1, retry_delay_seconds=10)
 def save_df_to_s3(df, bucket, key):
     """
-    Save a DataFrame as a CSV file to the specified S3 bucket and key.
+    Save a DataFrame as a CSV file to the specified S3 bucket and key
+    (or the local storage backend, see STORAGE_BACKEND).
     """
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-    s3 = boto3.client("s3")
-    s3.put_object(Bucket=bucket, Key=key, Body=csv_buffer.getvalue())
+    write_csv(df, bucket, key)
 
 
 @task(task_run_name="archive new_data to s3 after merging")
@@ -49,18 +47,14 @@ def archive_new_data_s3(bucket, new_data_key):
     it to an archive location with a timestamp,
     then delete the original.
     """
-    s3 = boto3.client("s3")
+    storage = get_storage()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     archive_key = f"raw-data/archived/new_data_{timestamp}.csv"
     try:
         # Copy the new data file to the archive location
-        s3.copy_object(
-            Bucket=bucket,
-            CopySource={"Bucket": bucket, "Key": new_data_key},
-            Key=archive_key,
-        )
+        storage.copy(bucket, new_data_key, archive_key)
         # Delete the original new data file
-        s3.delete_object(Bucket=bucket, Key=new_data_key)
+        storage.delete(bucket, new_data_key)
         print(f"Archived new data to s3://{bucket}/{archive_key} and deleted original.")
     except Exception as e:
         print(f"Failed to archive new data in S3: {e}")
@@ -69,24 +63,32 @@ def archive_new_data_s3(bucket, new_data_key):
 @task(task_run_name="combine baseline and new data")
 def combine_data(baseline: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
     """
-    Combine and deduplicate baseline and new data.
+    Combine and deduplicate baseline and new data. The rows of new_data
+    are marked in the NEW_ROW_COLUMN column, replacing the marks of any
+    earlier merge; new rows that duplicate a baseline row are dropped.
     """
-    combined = (
-        pd.concat([baseline, new_data], ignore_index=True)
-        .drop_duplicates()
-        .reset_index(drop=True)
+    combined = pd.concat(
+        [
+            baseline.assign(**{NEW_ROW_COLUMN: False}),
+            new_data.assign(**{NEW_ROW_COLUMN: True}),
+        ],
+        ignore_index=True,
     )
-    return combined
+    columns = [col for col in combined.columns if col != NEW_ROW_COLUMN]
+    return combined.drop_duplicates(subset=columns).reset_index(drop=True)
 
 
 @flow(name="Retrain on Drift, Distance, RMSE")
-def retrain_on_drift_distance_rmse():
+def retrain_on_drift_distance_rmse(training_mode=None):
     """
     Main retraining flow. If new data is available,
     merge it with the baseline, retrain, and archive
     the new data. Otherwise, retrain on the baseline only.
+    training_mode ("full", "incremental" or "compare") defaults to
+    RETRAIN_MODE and only applies when new data is merged.
     """
     logger = get_run_logger()
+    training_mode = training_mode or get_training_config()["retrain_mode"]
 
     # Get S3 configuration for bucket and data keys
     bucket, baseline_key, new_data_key = get_config()
@@ -119,8 +121,9 @@ def retrain_on_drift_distance_rmse():
         save_df_to_s3(combined, bucket, baseline_key)
         logger.info(f"Saved merged data to s3://{bucket}/{baseline_key}")
 
-        # Run the main pipeline using the updated baseline
-        main(bucket_name=bucket, raw_key=baseline_key)
+        # Run the main pipeline using the updated baseline; the new rows
+        # are marked in NEW_ROW_COLUMN
+        main(bucket_name=bucket, raw_key=baseline_key, training_mode=training_mode)
         logger.info("Retraining completed with new data.")
 
         # Archive the new data file in S3
@@ -3,6 +3,7 @@ from pipeline import main
 import pytest
 
 
+@patch("pipeline.log_profile_to_mlflow")
 @patch("pipeline.get_s3_config")
 @patch("pipeline.get_mlflow_config")
 @patch("pipeline.load_and_prepare_data")
@@ -21,6 +22,7 @@ def test_main_flow(
     mock_load_prepare,
     mock_mlflow_config,
     mock_s3_config,
+    mock_log_profile,
 ):
     # Setup mocks
     mock_s3_config.return_value = {
@@ -31,19 +33,32 @@ def test_main_flow(
     mock_mlflow_config.return_value = {
         "tracking_uri": "http://localhost:5000",
         "experiment_name": "TestExperiment",
+        "async_logging": False,
+        "logging_workers": 4,
+        "serialization_format": "pickle",
+        "compression_level": 3,
     }
-    mock_load_data_s3.return_value = MagicMock(shape=(100, 10))
+    load_processed = mock_load_data_s3.with_options.return_value
+    load_processed.return_value = MagicMock(shape=(100, 10))
     mock_train_tune.return_value = (["run1", "run2"], "X_val", "X_test", "y_test")
-    mock_log_models.return_value = ["logged_run1", "logged_run2"]
-    mock_evaluate_register.return_value = ("best_run", {"accuracy": 0.9})
+    mock_log_models.return_value = [
+        {"run_id": "logged_run1"},
+        {"run_id": "cached_run", "cached": True},
+    ]
+    mock_evaluate_register.return_value = ({"run_id": "best_run"}, {"accuracy": 0.9})
 
     # Run main flow
     main()
 
     # Assertions
     mock_load_prepare.assert_called_once()
-    mock_load_data_s3.assert_called_once()
+    load_processed.assert_called_once()
     mock_train_tune.assert_called_once()
     mock_setup_mlflow.assert_called_once()
     mock_log_models.assert_called_once()
     mock_evaluate_register.assert_called_once()
+    mock_log_profile.assert_called_once()
+    # The profile goes on the runs trained here, not on reused ones
+    assert mock_log_profile.call_args.args[1] == ["logged_run1"]
+    # The runs keep their own training_mode tag, read back by the cache
+    assert "training_mode" not in mock_log_profile.call_args.kwargs["tags"]
@@ -1,6 +1,9 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import importlib
+import pandas as pd
+
+from mlpipeline.preprocessing_utils import NEW_ROW_COLUMN
 
 
 @pytest.fixture
@@ -44,3 +47,17 @@ def test_retrain_flow(
     mock_save_df.assert_not_called()  # no merge, so no save
     mock_main.assert_called_once()  # retrain called once
     mock_archive.assert_not_called()  # no archive since no new data
+
+
+@pytest.mark.integration
+def test_combine_data_marks_new_rows():
+    from retrain import combine_data
+
+    # Duplicates in the baseline and a new row already in the baseline
+    baseline = pd.DataFrame({"A": [1, 1, 2, 3], NEW_ROW_COLUMN: True})
+    new_data = pd.DataFrame({"A": [3, 4, 5]})
+
+    combined = combine_data.fn(baseline, new_data)
+
+    assert combined["A"].tolist() == [1, 2, 3, 4, 5]
+    assert combined[NEW_ROW_COLUMN].tolist() == [False, False, False, True, True]
@@ -18,7 +18,7 @@ def client():
 def patch_mlflow_and_client(monkeypatch):
     with patch(
         "api.serve_model.mlflow.pyfunc.load_model", return_value=MagicMock()
-    ), patch("api.serve_model.create_client", return_value=MagicMock()):
+    ), patch("api.serve_model.get_log_store", return_value=MagicMock()):
         yield
 
 
@@ -42,10 +42,10 @@ def sample_json_input():
 
 @patch("api.serve_model.model")
 @patch("api.serve_model.load_and_prepare_data")
-@patch("api.serve_model.log_to_supabase")
+@patch("api.serve_model.log_prediction")
 @pytest.mark.integration
 def test_predict_json(
-    mock_log_supabase, mock_preprocess, mock_model, sample_json_input, client
+    mock_log_prediction, mock_preprocess, mock_model, sample_json_input, client
 ):
     mock_preprocess.return_value = pd.DataFrame(np.random.rand(1, 3))
     mock_model.predict.return_value = np.array([123.45])
@@ -60,15 +60,20 @@ def test_predict_json(
 
     mock_preprocess.assert_called_once()
     mock_model.predict.assert_called_once()
-    mock_log_supabase.assert_called_once()
+    mock_log_prediction.assert_called_once()
 
 
 @patch("api.serve_model.model")
 @patch("api.serve_model.load_and_prepare_data")
-@patch("api.serve_model.log_to_supabase")
+@patch("api.serve_model.log_prediction")
 @pytest.mark.integration
 def test_predict_csv(
-    mock_log_supabase, mock_preprocess, mock_model, tmp_path, sample_json_input, client
+    mock_log_prediction,
+    mock_preprocess,
+    mock_model,
+    tmp_path,
+    sample_json_input,
+    client,
 ):
     # Create a dummy CSV file
     df = pd.DataFrame([sample_json_input])
@@ -92,7 +97,7 @@ def test_predict_csv(
 
     mock_preprocess.assert_called_once()
     mock_model.predict.assert_called_once()
-    mock_log_supabase.assert_called_once()
+    mock_log_prediction.assert_called_once()
 
 
 def test_predict_csv_invalid_file_type(client):
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from monitoring.async_monitor import Stage, put_latest, run_monitor
+
+
+def test_stage_times_out_and_skips_while_busy():
+    release = threading.Event()
+
+    async def scenario():
+        stage = Stage("slow", lambda: release.wait(5) and "done", timeout=0.05)
+        assert await stage.run() is None  # timed out
+        assert await stage.run() is None  # still busy: skipped
+        release.set()
+        await asyncio.sleep(0.1)
+        return await stage.run()
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_put_latest_replaces_waiting_item():
+    queue = asyncio.Queue(maxsize=1)
+    assert not put_latest(queue, 1)
+    assert put_latest(queue, 2)
+    assert queue.get_nowait() == 2
+
+
+def test_slow_stage_does_not_delay_other_stages():
+    counter = iter(range(1, 1000))
+    fast, slow = [], []
+
+    def slow_stage(snapshot):
+        time.sleep(0.2)
+        slow.append(snapshot)
+
+    async def scenario():
+        await run_monitor(
+            Stage("ingest", lambda: next(counter), timeout=1),
+            [
+                Stage("fast", fast.append, timeout=1),
+                Stage("slow", slow_stage, timeout=1),
+            ],
+            lambda snapshot: 0.02,
+        )
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(scenario(), timeout=0.5))
+    assert len(fast) >= 10
+    assert len(slow) < len(fast)
+    # The slow stage always moves on to the newest cycle
+    assert slow == sorted(slow)
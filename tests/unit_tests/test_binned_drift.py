@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from monitoring.binned_drift import BinnedHistogram, bin_counts, js_distance, psi
+from monitoring.reference_profile import feature_profile
+
+
+@pytest.fixture
+def profile():
+    return feature_profile(np.random.default_rng(0).normal(50, 5, 2000))
+
+
+def test_bin_counts_match_baseline_histogram(profile):
+    counts = bin_counts(profile["bin_edges"], profile["sorted_values"])
+    assert counts.tolist() == profile["bin_counts"].tolist()
+    # Values beyond the baseline range and NaNs
+    assert bin_counts(profile["bin_edges"], [0.0, 100.0, np.nan]).sum() == 2
+
+
+def test_incremental_counts_match_rebinning(profile):
+    values = np.random.default_rng(1).normal(52, 5, 300)
+    histogram = BinnedHistogram(profile["bin_edges"], values[:200])
+    histogram.add(values[200:])
+    histogram.remove(values[:100])
+    assert histogram.counts.tolist() == (
+        bin_counts(profile["bin_edges"], values[100:]).tolist()
+    )
+    assert histogram.total == 200
+
+
+def test_psi_and_js_distance_grow_with_drift(profile):
+    rng = np.random.default_rng(2)
+    expected = profile["bin_counts"]
+    stable = bin_counts(profile["bin_edges"], rng.normal(50, 5, 1200))
+    shifted = bin_counts(profile["bin_edges"], rng.normal(55, 5, 1200))
+
+    assert psi(expected, stable) < 0.1
+    assert psi(expected, shifted) > 0.25
+    assert 0 <= js_distance(expected, stable) < js_distance(expected, shifted) <= 1
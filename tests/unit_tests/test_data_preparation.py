@@ -19,8 +19,8 @@ SAMPLE_CSV = (
 
 @pytest.fixture
 def mock_boto3_client():
-    with patch("mlpipeline.data_preparation.boto3.Session") as mock_session_cls, patch(
-        "mlpipeline.data_preparation.boto3.client"
+    with patch("mlpipeline.storage.boto3.Session") as mock_session_cls, patch(
+        "mlpipeline.storage.boto3.client"
     ) as mock_client_func:
 
         # Mock S3 client for get_object
@@ -64,10 +64,13 @@ def test_load_and_prepare_data_flow(
 
     sample_df = pd.read_csv(StringIO(SAMPLE_CSV))
 
-    # Set up the mock chain
-    mock_load_data.return_value = sample_df
-    mock_clean_data.return_value = sample_df
-    mock_feature_engineer.return_value = sample_df
+    # Set up the mock chain; tasks run with their caching options applied
+    load = mock_load_data.with_options.return_value
+    clean = mock_clean_data.with_options.return_value
+    engineer = mock_feature_engineer.with_options.return_value
+    load.return_value = sample_df
+    clean.return_value = sample_df
+    engineer.return_value = sample_df
     mock_upload.return_value = None
 
     # Run the flow with mock bucket and key
@@ -77,9 +80,9 @@ def test_load_and_prepare_data_flow(
     df = load_and_prepare_data.fn(file_key=file_key, bucket_name=bucket_name)
 
     # Check that the flow called the expected tasks in the right order
-    mock_load_data.assert_called_once_with(bucket_name, file_key)
-    mock_clean_data.assert_called_once_with(sample_df)
-    mock_feature_engineer.assert_called_once_with(sample_df)
+    load.assert_called_once_with(bucket_name, file_key)
+    clean.assert_called_once_with(sample_df)
+    engineer.assert_called_once_with(sample_df)
 
     # Check that upload was called with the right processed key
     mock_upload.assert_called_once()
@@ -90,3 +93,53 @@ def test_load_and_prepare_data_flow(
 
     # Check that the flow returns the processed DataFrame
     assert df is sample_df
+
+
+def test_dataframe_cache_key_tracks_content():
+    from io import StringIO
+    from mlpipeline.data_preparation import dataframe_cache_key, clean_data
+
+    context = MagicMock()
+    context.task = clean_data
+    df = pd.read_csv(StringIO(SAMPLE_CSV))
+
+    key = dataframe_cache_key(context, {"df": df})
+    assert key == dataframe_cache_key(context, {"df": df.copy()})
+
+    changed = df.copy()
+    changed.loc[0, "Temperature"] = 56
+    assert dataframe_cache_key(context, {"df": changed}) != key
+
+
+def test_s3_object_cache_key_uses_etag(mock_boto3_client):
+    from mlpipeline.data_preparation import s3_object_cache_key, load_data_s3
+
+    context = MagicMock()
+    context.task = load_data_s3
+    parameters = {"bucket_name": "test-bucket", "file_key": "raw-data/test.csv"}
+
+    mock_boto3_client.head_object.return_value = {"ETag": '"abc"'}
+    key = s3_object_cache_key(context, parameters)
+    assert key == s3_object_cache_key(context, parameters)
+
+    mock_boto3_client.head_object.return_value = {"ETag": '"def"'}
+    assert s3_object_cache_key(context, parameters) != key
+
+    # Objects that cannot be inspected are not cached
+    mock_boto3_client.head_object.side_effect = Exception("NoSuchKey")
+    assert s3_object_cache_key(context, parameters) is None
+
+
+def test_cached_reads_the_cache_config_at_call_time(monkeypatch, tmp_path):
+    from mlpipeline.data_preparation import cached, clean_data, dataframe_cache_key
+
+    monkeypatch.setenv("PIPELINE_CACHE_ENABLED", "false")
+    assert cached(clean_data, dataframe_cache_key).cache_expiration is None
+
+    monkeypatch.setenv("PIPELINE_CACHE_ENABLED", "true")
+    monkeypatch.setenv("PIPELINE_CACHE_EXPIRATION_HOURS", "2")
+    monkeypatch.setenv("PIPELINE_CACHE_STORAGE", str(tmp_path))
+    task = cached(clean_data, dataframe_cache_key)
+    assert task.cache_expiration.total_seconds() == 2 * 3600
+    assert task.persist_result and not task.refresh_cache
+    assert cached(clean_data, dataframe_cache_key, refresh_cache=True).refresh_cache
@@ -5,6 +5,10 @@ from unittest.mock import patch, MagicMock
 
 from mlpipeline.evaluate_and_register import (
     evaluate_and_register,
+    evaluate_model_on_test,
+    benchmark_serving,
+    exceeded_budgets,
+    select_best_run,
 )  # replace your_module with actual filename
 
 
@@ -40,17 +44,19 @@ def dummy_test_data():
 
 
 @patch("mlpipeline.evaluate_and_register.get_run_logger")
+@patch("mlpipeline.evaluate_and_register.benchmark_serving")
 @patch("mlpipeline.evaluate_and_register.register_best_model")
 @patch("mlpipeline.evaluate_and_register.log_test_metrics_to_mlflow")
 @patch("mlpipeline.evaluate_and_register.evaluate_model_on_test")
-@patch("mlpipeline.evaluate_and_register.mlflow")
+@patch("mlpipeline.evaluate_and_register.load_sklearn_model")
 @patch("mlpipeline.evaluate_and_register.MlflowClient")
 def test_evaluate_and_register(
     mock_client,
-    mock_mlflow,
+    mock_load_model,
     mock_eval,
     mock_log_metrics,
     mock_register,
+    mock_benchmark,
     mock_logger,
     dummy_logged_runs,
     dummy_test_data,
@@ -60,10 +66,18 @@ def test_evaluate_and_register(
     # Mock loaded model from mlflow
     mock_model = MagicMock()
     mock_model.predict.return_value = np.random.rand(10)
-    mock_mlflow.sklearn.load_model.return_value = mock_model
+    mock_load_model.return_value = mock_model
 
     # Mock test metrics evaluation
-    mock_eval.return_value = {"test_rmse": 0.3, "test_r2": 0.9}
+    mock_eval.submit.side_effect = lambda *args: MagicMock(
+        result=MagicMock(return_value={"test_rmse": 0.3, "test_r2": 0.9})
+    )
+    mock_benchmark.return_value = {
+        "single_row_latency_ms": 1.0,
+        "batch_latency_ms": 5.0,
+        "model_size_mb": 1.0,
+        "load_time_s": 0.01,
+    }
     mock_register.return_value = 2  # pretend registered model version is 2
 
     X_test, y_test = dummy_test_data
@@ -72,12 +86,161 @@ def test_evaluate_and_register(
     # Assertions
     assert best_run["test_rmse"] == 0.3
     assert best_run["test_r2"] == 0.9
-    assert len(test_results) == 3  # since top_3_runs is sliced
-    mock_mlflow.sklearn.load_model.assert_called()
+    assert len(test_results) == 3
+    # Runs without an in-memory model are loaded back from MLflow
+    assert mock_load_model.call_count == 3
 
     # Ensure register_best_model is called with best_run
     mock_register.assert_called_once()
     # Ensure metrics logged for all 3 models
     assert mock_log_metrics.call_count == 3
     # Ensure evaluate_model_on_test is called for each model
-    assert mock_eval.call_count == 3
+    assert mock_eval.submit.call_count == 3
+
+
+def test_select_best_run_respects_serving_budgets():
+    results = [
+        {
+            "run_id": "run_1",
+            "model_name": "RandomForest",
+            "test_rmse": 0.30,
+            "single_row_latency_ms": 40.0,
+            "batch_latency_ms": 100.0,
+            "model_size_mb": 500.0,
+            "load_time_s": 2.0,
+        },
+        {
+            "run_id": "run_2",
+            "model_name": "HistGradientBoosting",
+            "test_rmse": 0.31,
+            "single_row_latency_ms": 2.0,
+            "batch_latency_ms": 10.0,
+            "model_size_mb": 1.0,
+            "load_time_s": 0.01,
+        },
+    ]
+    config = {"max_latency_ms": 10.0, "max_model_size_mb": 100.0}
+    assert exceeded_budgets(results[0], config) == [
+        "single_row_latency_ms",
+        "model_size_mb",
+    ]
+    assert select_best_run(results, config)["run_id"] == "run_2"
+    # Without budgets the lowest test RMSE wins
+    assert select_best_run(results, {})["run_id"] == "run_1"
+    # When nothing fits, fail unless the fallback is configured
+    with pytest.raises(RuntimeError):
+        select_best_run(results, {"max_latency_ms": 1.0})
+    over_budget = {"max_latency_ms": 1.0, "allow_over_budget": True}
+    assert select_best_run(results, over_budget)["run_id"] == "run_1"
+
+
+@patch("mlpipeline.evaluate_and_register.get_run_logger")
+def test_benchmark_serving(mock_logger):
+    from sklearn.linear_model import LinearRegression
+
+    X = pd.DataFrame(np.random.rand(50, 2), columns=["f1", "f2"])
+    model = LinearRegression().fit(X, np.random.rand(50))
+    costs = benchmark_serving.fn(model, X, repeats=5, batch_size=20)
+    assert set(costs) == {
+        "single_row_latency_ms",
+        "batch_latency_ms",
+        "model_size_mb",
+        "load_time_s",
+    }
+    assert all(value > 0 for value in costs.values())
+
+
+@patch("mlpipeline.evaluate_and_register.get_run_logger")
+def test_benchmark_serving_measures_the_deployed_format(mock_logger):
+    from sklearn.ensemble import RandomForestRegressor
+
+    X = pd.DataFrame(np.random.rand(200, 2), columns=["f1", "f2"])
+    model = RandomForestRegressor(n_estimators=20).fit(X, np.random.rand(200))
+    pickled = benchmark_serving.fn(model, X, repeats=1, batch_size=20)
+    compressed = benchmark_serving.fn(
+        model,
+        X,
+        repeats=1,
+        batch_size=20,
+        serialization_format="joblib",
+        compression_level=9,
+    )
+    assert compressed["model_size_mb"] < pickled["model_size_mb"]
+
+
+@patch("mlpipeline.evaluate_and_register.get_run_logger")
+@patch("mlpipeline.evaluate_and_register.benchmark_serving")
+@patch("mlpipeline.evaluate_and_register.register_best_model")
+@patch("mlpipeline.evaluate_and_register.log_test_metrics_to_mlflow")
+@patch("mlpipeline.evaluate_and_register.evaluate_model_on_test")
+@patch("mlpipeline.evaluate_and_register.load_sklearn_model")
+def test_evaluate_and_register_reuses_in_memory_models(
+    mock_load_model,
+    mock_eval,
+    mock_log_metrics,
+    mock_register,
+    mock_benchmark,
+    mock_logger,
+    dummy_logged_runs,
+    dummy_test_data,
+):
+    from sklearn.linear_model import LinearRegression
+
+    X_test, y_test = dummy_test_data
+    runs = [
+        {**run, "model": LinearRegression().fit(X_test, y_test)}
+        for run in dummy_logged_runs
+    ]
+    # Run submitted evaluations inline, outside of a flow run
+    mock_eval.submit.side_effect = lambda *args: MagicMock(
+        result=MagicMock(return_value=evaluate_model_on_test.fn(*args))
+    )
+    mock_benchmark.return_value = {}
+    mock_register.return_value = 1
+
+    best_run, test_results = evaluate_and_register.fn(runs, X_test, y_test)
+
+    mock_load_model.assert_not_called()
+    assert len(test_results) == 3
+    assert best_run["test_rmse"] == min(r["test_rmse"] for r in test_results)
+
+
+@patch("mlpipeline.evaluate_and_register.get_serving_config")
+@patch("mlpipeline.evaluate_and_register.get_run_logger")
+@patch("mlpipeline.evaluate_and_register.benchmark_serving")
+@patch("mlpipeline.evaluate_and_register.register_best_model")
+@patch("mlpipeline.evaluate_and_register.log_test_metrics_to_mlflow")
+@patch("mlpipeline.evaluate_and_register.evaluate_model_on_test")
+def test_evaluate_and_register_checks_every_model_against_budgets(
+    mock_eval,
+    mock_log_metrics,
+    mock_register,
+    mock_benchmark,
+    mock_logger,
+    mock_serving_config,
+    dummy_logged_runs,
+    dummy_test_data,
+):
+    X_test, y_test = dummy_test_data
+    # Only the run ranked last by validation RMSE is small enough
+    cheap = {**dummy_logged_runs[0], "run_id": "run_4", "val_rmse": 0.9}
+    runs = [{**run, "model": MagicMock()} for run in dummy_logged_runs + [cheap]]
+    sizes = {id(run["model"]): 50.0 for run in runs}
+    sizes[id(runs[-1]["model"])] = 1.0
+    mock_serving_config.return_value = {
+        "max_model_size_mb": 10.0,
+        "benchmark_repeats": 1,
+        "benchmark_batch_size": 10,
+        "verify_logged_model": False,
+    }
+    mock_eval.submit.side_effect = lambda *args: MagicMock(
+        result=MagicMock(return_value={"test_rmse": 0.3, "test_r2": 0.9})
+    )
+    mock_benchmark.side_effect = lambda model, *args, **kwargs: {
+        "model_size_mb": sizes[id(model)]
+    }
+
+    best_run, test_results = evaluate_and_register.fn(runs, X_test, y_test)
+
+    assert len(test_results) == 4
+    assert best_run["run_id"] == "run_4"
@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+
+from monitoring.feature_pool import FeaturePool
+
+
+class Unpicklable(dict):
+    def __reduce__(self):
+        raise TypeError("the reference must not be pickled")
+
+
+def shifted_mean(reference, values, scale):
+    return float((np.mean(values) - reference.mean()) * scale)
+
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    return Unpicklable({f"f{i}": rng.normal(i, 1, 1000) for i in range(40)})
+
+
+def tasks(reference):
+    rng = np.random.default_rng(1)
+    return [(key, (rng.normal(0, 1, 200), 2.0)) for key in reference]
+
+
+def test_pool_results_match_serial(reference):
+    pool = FeaturePool(workers=2, min_features=8)
+    pool.start(reference)
+    try:
+        parallel = pool.map(shifted_mean, reference, tasks(reference))
+    finally:
+        pool.shutdown()
+    serial = FeaturePool(workers=1).map(shifted_mean, reference, tasks(reference))
+    assert parallel == serial
+
+
+def test_new_reference_reaches_workers_without_forking(reference):
+    pool = FeaturePool(workers=2, min_features=8)
+    pool.start(reference)
+    try:
+        workers = set(pool._pool._processes)
+        updated = {key: values + 1 for key, values in reference.items()}
+        # From another thread, as in the monitor's drift stage
+        with ThreadPoolExecutor(1) as thread:
+            parallel = thread.submit(
+                pool.map, shifted_mean, updated, tasks(updated)
+            ).result()
+        assert set(pool._pool._processes) == workers
+        path = pool._path
+    finally:
+        pool.shutdown()
+    assert not os.path.exists(path)
+    serial = FeaturePool(workers=1).map(shifted_mean, updated, tasks(updated))
+    assert parallel == serial
+
+
+def test_small_feature_counts_run_serially(reference):
+    pool = FeaturePool(workers=2, min_features=64)
+    pool.map(shifted_mean, reference, tasks(reference))
+    assert pool._pool is None
+
+
+def test_pool_not_started_runs_serially(reference):
+    pool = FeaturePool(workers=2, min_features=8)
+    serial = FeaturePool(workers=1).map(shifted_mean, reference, tasks(reference))
+    assert pool.map(shifted_mean, reference, tasks(reference)) == serial
+    assert pool._pool is None
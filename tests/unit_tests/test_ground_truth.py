@@ -0,0 +1,68 @@
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+import pytest
+
+from mlpipeline.storage import LocalStorage, write_csv
+from monitoring.ground_truth import GroundTruthIndex, RunningRMSE
+
+BUCKET = "bucket"
+KEY = "raw-data/new_data/new_data.csv"
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    rng = np.random.default_rng(0)
+    times = 1472793006 + 300 * rng.permutation(500)
+    write_csv(
+        pd.DataFrame({"UNIXTime": times, "Radiation": rng.uniform(0, 1000, 500)}),
+        BUCKET,
+        KEY,
+        storage,
+    )
+    return storage
+
+
+def predictions(start, count, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(start, start + count),
+            # Some predictions have no ground truth yet
+            "UNIXTime": 1472793006 + 300 * np.arange(start, start + count),
+            "Radiation": rng.uniform(0, 1000, count),
+        }
+    )
+
+
+def merge_rmse(storage, frame):
+    truth = pd.read_csv(storage.path(BUCKET, KEY))
+    merged = frame.merge(truth, on="UNIXTime")
+    return np.sqrt(np.mean((merged["Radiation_x"] - merged["Radiation_y"]) ** 2))
+
+
+def test_index_reloads_only_on_change(storage):
+    index = GroundTruthIndex(BUCKET, KEY, storage)
+    assert index.refresh()
+    with patch("monitoring.ground_truth.read_csv") as read_csv:
+        assert not index.refresh()
+        read_csv.assert_not_called()
+    assert np.all(np.diff(index.times) > 0)
+
+
+def test_running_rmse_matches_merge(storage):
+    index = GroundTruthIndex(BUCKET, KEY, storage)
+    index.refresh()
+    window = predictions(400, 200)
+    errors = RunningRMSE(index)
+    errors.reset(window)
+    assert errors.count == 100
+    assert errors.rmse == pytest.approx(merge_rmse(storage, window))
+
+    # Slide the window back: 50 rows leave, 50 rows enter
+    added = predictions(350, 50, seed=2)
+    errors.update(added, window.tail(50))
+    slid = pd.concat([added, window.head(150)])
+    assert errors.count == 150
+    assert errors.rmse == pytest.approx(merge_rmse(storage, slid))
@@ -0,0 +1,50 @@
+import random
+
+from mlpipeline.hyperparameter_search import (
+    parse_param,
+    sample_configs,
+    successive_halving,
+)
+
+
+def fake_train_fn(calls):
+    # Validation RMSE only depends on the "quality" param
+    def train_fn(candidates, n_rows=None, timeout=None):
+        calls.append((len(candidates), n_rows))
+        return [
+            ("model", 0.1, 10.0 - params["quality"], 0.9) for _, params in candidates
+        ]
+
+    return train_fn
+
+
+def test_successive_halving_promotes_best_to_full_data():
+    calls = []
+    configs = {"A": [{"quality": q} for q in range(9)], "B": [{"quality": 1}]}
+
+    best = successive_halving(configs, fake_train_fn(calls), n_rows=900, eta=3)
+
+    assert best["A"]["params"] == {"quality": 8}
+    assert best["A"]["fraction"] == 1.0
+    assert best["B"]["fraction"] == 1.0
+    # 9 -> 3 -> 1 candidates for A on growing data, B carried along
+    assert calls == [(10, 100), (4, 300), (2, 900)]
+
+
+def test_successive_halving_stops_when_budget_runs_out():
+    def train_fn(candidates, n_rows=None, timeout=None):
+        return [None for _ in candidates]
+
+    configs = {"A": [{"quality": q} for q in range(9)]}
+    assert successive_halving(configs, train_fn, n_rows=900, time_budget=5) == {}
+
+
+def test_sample_configs_and_parse_param():
+    space = {"a": [1, 2], "b": ["x"]}
+    configs = sample_configs(space, 5, random.Random(0), seed_params={"a": 3})
+    assert configs[0] == {"a": 3}
+    assert {"a": 1, "b": "x"} in configs and {"a": 2, "b": "x"} in configs
+
+    assert parse_param("300") == 300
+    assert parse_param("None") is None
+    assert parse_param("sqrt") == "sqrt"
@@ -0,0 +1,169 @@
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+from sklearn.ensemble import (
+    RandomForestRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+)
+
+from mlpipeline.incremental_training import (
+    WARM_START_FAMILIES,
+    compare_retrain_modes,
+    incremental_update,
+    needs_full_refit,
+)
+from mlpipeline.model_training import split_data
+from mlpipeline.preprocessing_utils import NEW_ROW_COLUMN, new_row_mask
+
+CONFIG = {
+    "incremental_max_new_fraction": 0.3,
+    "incremental_max_updates": 5,
+    "incremental_max_age_days": 30,
+}
+
+
+def make_data(n=60):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((n, 3)), columns=["A", "B", "C"])
+    return X, X["A"] * 10 + rng.random(n)
+
+
+def production(model, **overrides):
+    return {
+        "model": model,
+        "model_name": "RandomForest",
+        "incremental_updates": 0,
+        "last_full_refit": datetime.now(timezone.utc).isoformat(),
+        **overrides,
+    }
+
+
+def test_incremental_update_grows_or_replaces_trees():
+    X, y = make_data()
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    old_trees = list(forest.estimators_)
+
+    forest = incremental_update(forest, "RandomForest", X[:20], y[:20], 0.5, True)
+    assert forest.n_estimators == 10 and len(forest.estimators_) == 10
+    assert forest.estimators_[:5] == old_trees[5:]
+
+    boosting = GradientBoostingRegressor(n_estimators=10).fit(X, y)
+    boosting = incremental_update(boosting, "GradientBoosting", X, y, 0.5, True)
+    assert len(boosting.estimators_) == 15
+    assert not boosting.warm_start
+
+
+def test_incremental_update_improves_on_new_rows_and_keeps_old_fit():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((3000, 3)), columns=["A", "B", "C"])
+    y = X["A"] * 10 + X["B"] * 3
+    # Recent rows cover the upper half of A, with targets shifted by 1
+    X_new = pd.DataFrame(rng.random((300, 3)), columns=["A", "B", "C"])
+    X_new["A"] = 0.5 + X_new["A"] / 2
+    y_new = X_new["A"] * 10 + X_new["B"] * 3 + 1
+
+    def rmse(model, X, y):
+        return np.sqrt(np.mean((model.predict(X) - y) ** 2))
+
+    models = {
+        "RandomForest": RandomForestRegressor(n_estimators=10, random_state=0),
+        "GradientBoosting": GradientBoostingRegressor(random_state=0),
+    }
+    assert set(models) == set(WARM_START_FAMILIES)
+    for model_name, model in models.items():
+        model.fit(X, y)
+        new_before = rmse(model, X_new, y_new)
+        incremental_update(model, model_name, X_new, y_new, 0.2, False)
+        assert rmse(model, X_new, y_new) < new_before, model_name
+        assert rmse(model, X, y) < 1.0, model_name
+
+
+def test_hist_gradient_boosting_needs_full_refit():
+    # fit would rebuild its bins from the recent rows only
+    X, y = make_data()
+    hist = HistGradientBoostingRegressor(max_iter=10).fit(X, y)
+    production_hist = production(hist, model_name="HistGradientBoosting")
+    full_refit, reason = needs_full_refit(
+        production_hist, ["A", "B", "C"], 10, 100, CONFIG
+    )
+    assert full_refit and "warm start" in reason
+
+
+def test_needs_full_refit_rules():
+    X, y = make_data()
+    model = RandomForestRegressor(n_estimators=5).fit(X, y)
+    features = ["A", "B", "C"]
+
+    assert needs_full_refit(production(model), features, 10, 100, CONFIG)[0] is False
+    assert needs_full_refit(None, features, 10, 100, CONFIG)[0]
+    assert needs_full_refit(production(model), ["A", "B"], 10, 100, CONFIG)[0]
+    assert needs_full_refit(production(model), features, 50, 100, CONFIG)[0]
+    assert needs_full_refit(
+        production(model, incremental_updates=5), features, 10, 100, CONFIG
+    )[0]
+    assert needs_full_refit(
+        production(model, last_full_refit="2020-01-01T00:00:00+00:00"),
+        features,
+        10,
+        100,
+        CONFIG,
+    )[0]
+
+
+def test_new_row_mask_follows_labels_after_cleaning():
+    X, y = make_data()
+    df = X.assign(Radiation=y, **{NEW_ROW_COLUMN: [False] * 50 + [True] * 10})
+    # Dropped rows leave gaps in the index, as clean_data does
+    df = df.drop(index=[3, 7, 11])
+
+    X_train, X_val, X_test, *_ = split_data(df)
+    assert NEW_ROW_COLUMN not in X_train.columns
+    new_rows = new_row_mask(df)
+    for split in (X_train, X_val, X_test):
+        assert (new_rows.loc[split.index] == (split.index >= 50)).all()
+    assert not new_row_mask(X).any()
+
+
+class MeanModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return np.full(len(X), self.value)
+
+
+def make_run(mode, value):
+    return {
+        "model_name": "RandomForest",
+        "model": MeanModel(value),
+        "val_rmse": 0.0,
+        "metrics": {"train_time_s": 0.0},
+        "tags": {"training_mode": mode},
+    }
+
+
+def test_compare_retrain_modes_selects_on_new_holdout_rows():
+    X, _ = make_data(200)
+    new = np.arange(200) >= 150
+    # Old rows have target 0, new rows 10
+    df = X.assign(Radiation=np.where(new, 10.0, 0.0), **{NEW_ROW_COLUMN: new})
+    logger = MagicMock()
+
+    # The incremental run fits the new rows, the full run the old ones
+    runs = [make_run("incremental", 10.0), make_run("full", 0.0)]
+    selected = compare_retrain_modes(runs, df, logger)
+    assert [run["tags"]["training_mode"] for run in selected] == ["incremental"]
+    assert selected[0]["metrics"]["new_holdout_rmse"] == 0.0
+    assert all(run["tags"]["compare_selected_mode"] == "incremental" for run in runs)
+
+    runs = [make_run("incremental", 0.0), make_run("full", 10.0), make_run("full", 5)]
+    selected = compare_retrain_modes(runs, df, logger)
+    assert [run["tags"]["training_mode"] for run in selected] == ["full", "full"]
+
+    # Without new rows there is no unbiased holdout: keep the full refit
+    runs = [make_run("incremental", 0.0), make_run("full", 10.0)]
+    selected = compare_retrain_modes(runs, df.drop(columns=NEW_ROW_COLUMN), logger)
+    assert [run["tags"]["training_mode"] for run in selected] == ["full"]
+    assert runs[0]["tags"]["compare_holdout_rows"] == "0"
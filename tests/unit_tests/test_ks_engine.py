@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scipy.stats import ks_2samp
+
+from monitoring.ks_engine import ks_2samp_batch, presort_reference
+
+
+def test_ks_2samp_batch_matches_scipy():
+    rng = np.random.default_rng(0)
+    baseline = rng.normal(0, 1, (400, 4))
+    recent = rng.normal(0.3, 1.2, (150, 4))
+    # Ties within and across samples, and NaNs
+    baseline[:, 1] = np.round(baseline[:, 1], 1)
+    recent[:, 1] = np.round(recent[:, 1], 1)
+    baseline[::7, 2] = np.nan
+    recent[::5, 2] = np.nan
+    recent[:, 3] = rng.normal(0, 1, 150)
+
+    statistics, p_values = ks_2samp_batch(presort_reference(list(baseline.T)), recent)
+
+    for j in range(4):
+        expected = ks_2samp(
+            baseline[:, j], recent[:, j], method="asymp", nan_policy="omit"
+        )
+        assert statistics[j] == pytest.approx(expected.statistic, abs=1e-12)
+        assert p_values[j] == pytest.approx(expected.pvalue, rel=1e-9)
+
+
+def test_features_without_data_are_nan():
+    reference = presort_reference([np.arange(20.0), np.arange(20.0), []])
+    recent = np.column_stack(
+        [np.arange(10.0), np.full(10, np.nan), np.arange(10.0)]
+    )
+    statistics, p_values = ks_2samp_batch(reference, recent)
+    assert np.isfinite(statistics[0]) and np.isfinite(p_values[0])
+    assert np.isnan(statistics[1:]).all() and np.isnan(p_values[1:]).all()
@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock
+import pytest
+import pandas as pd
+
+from mlpipeline.storage import SQLiteLogStore
+from monitoring.log_ingestion import LogWindow, LogStream
+
+
+def log_rows(store, start, count):
+    store.insert(
+        [
+            {"UNIXTime": 1472793006 + 300 * i, "Temperature": 50 + i % 10}
+            for i in range(start, start + count)
+        ]
+    )
+
+
+def test_log_window_reads_only_new_rows(tmp_path):
+    store = SQLiteLogStore(str(tmp_path / "model_logs.db"))
+    log_rows(store, 0, 25)
+    window = LogWindow(store, ["UNIXTime", "Temperature"], max_rows=10, page_size=4)
+
+    # The first refresh only reads the newest max_rows rows
+    assert window.refresh() == 10
+    assert window.data()["id"].tolist() == list(range(16, 26))
+    assert window.last_id == 25
+    assert list(window.data().columns) == ["id", "UNIXTime", "Temperature"]
+
+    assert window.refresh() == 0
+
+    log_rows(store, 25, 3)
+    assert window.refresh() == 3
+    assert window.data()["id"].tolist() == list(range(19, 29))
+    assert window.added["id"].tolist() == [26, 27, 28]
+    assert window.evicted["id"].tolist() == [16, 17, 18]
+
+
+def test_log_window_transfer_scales_with_new_rows():
+    store = MagicMock()
+    store.fetch_range.return_value = pd.DataFrame(columns=["id", "Temperature"])
+    window = LogWindow(store, ["Temperature"], max_rows=1200, page_size=1000)
+    window.last_id = 500
+
+    assert window.refresh() == 0
+    store.fetch_range.assert_called_once_with(
+        ["Temperature"], after_id=500, before_id=None, limit=1000
+    )
+
+
+def test_log_stream_reads_every_new_row(tmp_path):
+    store = SQLiteLogStore(str(tmp_path / "model_logs.db"))
+    log_rows(store, 0, 25)
+    stream = LogStream(store, ["Temperature"], page_size=4, skip_existing=True)
+    pages = []
+
+    # Rows logged before the first read are skipped
+    assert stream.read(pages.append) == 0
+    assert pages == [] and stream.last_id == 25
+
+    # A burst larger than any window is read in full, a page at a time
+    log_rows(store, 25, 30)
+    assert stream.read(pages.append) == 30
+    ids = sorted(i for page in pages for i in page["id"])
+    assert ids == list(range(26, 56))
+    assert max(len(page) for page in pages) == 4
+    assert stream.read(pages.append) == 0
+
+
+def test_log_stream_resumes_an_interrupted_read(tmp_path):
+    store = SQLiteLogStore(str(tmp_path / "model_logs.db"))
+    log_rows(store, 0, 10)
+    stream = LogStream(store, ["Temperature"], page_size=4)
+    pages = []
+
+    def fail_on_second_page(page):
+        if pages:
+            raise IOError("consumer failed")
+        pages.append(page)
+
+    with pytest.raises(IOError):
+        stream.read(fail_on_second_page)
+    log_rows(store, 10, 2)
+    stream.read(pages.append)
+    stream.read(pages.append)
+
+    # Every row is consumed exactly once
+    ids = sorted(i for page in pages for i in page["id"])
+    assert ids == list(range(1, 13))
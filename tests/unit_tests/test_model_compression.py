@@ -0,0 +1,93 @@
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from mlpipeline.model_compression import compress_models, prune_forest, distill_forest
+from mlpipeline.model_training import evaluate_model, split_data
+
+
+def make_data(n=200):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((n, 3)), columns=["A", "B", "C"])
+    return X, X["A"] * 10 + X["B"] * 3 + rng.random(n)
+
+
+def test_prune_forest_keeps_best_trees():
+    X, y = make_data()
+    forest = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+
+    pruned = prune_forest(forest, X[150:], y[150:], factor=4)
+    assert pruned.n_estimators == 5 and len(pruned.estimators_) == 5
+    # The teacher is left untouched
+    assert len(forest.estimators_) == 20
+    X_val = X[150:].to_numpy(dtype=np.float32)
+    teacher_preds = [tree.predict(X_val).tolist() for tree in forest.estimators_]
+    assert all(
+        tree.predict(X_val).tolist() in teacher_preds for tree in pruned.estimators_
+    )
+    assert pruned.predict(X[:5]).shape == (5,)
+
+
+def test_distill_forest_shrinks_the_teacher():
+    X, y = make_data()
+    forest = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)
+    forest.fit(X, y)
+
+    student = distill_forest(forest, X, factor=4)
+    assert student.n_estimators == 5 and student.max_depth == 6
+    # The student reproduces the teacher's predictions closely
+    gap = np.sqrt(np.mean((student.predict(X) - forest.predict(X)) ** 2))
+    assert gap < 0.2 * y.std()
+
+
+def test_prune_forest_on_unseen_rows_skips_overfit_trees():
+    X, y = make_data(400)
+    y = y + np.random.default_rng(1).normal(0, 3, 400)
+    X_train, y_train, X_val, y_val = X[:200], y[:200], X[200:], y[200:]
+    forest = RandomForestRegressor(n_estimators=10, max_depth=3, random_state=0)
+    forest.fit(X_train, y_train)
+    # Add a fully grown tree that memorises the training rows
+    memorised = RandomForestRegressor(n_estimators=1, bootstrap=False).fit(
+        X_train, y_train
+    )
+    forest.estimators_.append(memorised.estimators_[0])
+
+    # Ranked on its own training rows, the memorising tree wins
+    kept = prune_forest(forest, X_train, y_train, 11).estimators_
+    assert kept[0].get_depth() > 3
+    kept = prune_forest(forest, X_val, y_val, 11).estimators_
+    assert kept[0].get_depth() == 3
+
+
+@patch("mlpipeline.model_compression.get_run_logger")
+@patch("mlpipeline.model_compression.get_training_config")
+def test_compressed_val_rmse_covers_every_validation_row(mock_config, mock_logger):
+    X, y = make_data(400)
+    df = X.assign(Radiation=y)
+    X_train, X_val, _, y_train, y_val, _ = split_data(df)
+    forest = RandomForestRegressor(n_estimators=20, random_state=0)
+    forest.fit(X_train, y_train)
+    teacher_rmse, _ = evaluate_model(forest, X_val, y_val)
+    mock_config.return_value = {
+        "compression_method": "prune",
+        "compression_factor": 4,
+        "cpu_budget": 1,
+        "cache_enabled": False,
+    }
+    run = {
+        "model_name": "RandomForest",
+        "params": {"n_estimators": 20},
+        "features": ["A", "B", "C"],
+        "val_rmse": teacher_rmse,
+        "model": forest,
+        "metrics": {"model_size_mb": 1.0},
+    }
+
+    (compressed,) = compress_models.fn([run], df)
+
+    # Ranked against the teacher on the same rows; the selection-free half
+    # is reported separately
+    val_rmse, _ = evaluate_model(compressed["model"], X_val, y_val)
+    assert compressed["val_rmse"] == val_rmse
+    assert compressed["metrics"]["holdout_rmse"] != val_rmse
@@ -1,10 +1,18 @@
+import os
 import pytest
 import pandas as pd
 import numpy as np
 from unittest.mock import patch, MagicMock
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
 
-from mlpipeline.model_logging import log_models_to_mlflow  # replace 'your_module'
+from mlpipeline.model_logging import (  # replace 'your_module'
+    log_models_to_mlflow,
+    upload_model_artifact,
+    wait_for_model_artifact,
+    wait_for_model_uploads,
+    _pending_uploads,
+)
 
 
 @pytest.fixture
@@ -29,9 +37,10 @@ def dummy_all_runs():
     )
 
 
+@patch("mlpipeline.model_logging.log_sklearn_model")
 @patch("mlpipeline.model_logging.get_run_logger")
 @patch("mlpipeline.model_logging.mlflow")
-def test_log_models_to_mlflow(mock_mlflow, mock_logger, dummy_all_runs):
+def test_log_models_to_mlflow(mock_mlflow, mock_logger, mock_log_model, dummy_all_runs):
     mock_logger.return_value = MagicMock()
     mock_run = MagicMock()
     mock_run.info.run_id = "test-run-id"
@@ -45,7 +54,94 @@ def test_log_models_to_mlflow(mock_mlflow, mock_logger, dummy_all_runs):
     mock_mlflow.log_metrics.assert_called()
 
     # Assert model logged
-    mock_mlflow.sklearn.log_model.assert_called()
+    mock_log_model.assert_called()
+    assert mock_log_model.call_args.kwargs["serialization_format"] == "pickle"
 
     # Check run ID injected into result
     assert logged_runs[0]["run_id"] == "test-run-id"
+
+
+@patch("mlpipeline.model_logging.log_sklearn_model")
+@patch("mlpipeline.model_logging.upload_model_artifact")
+@patch("mlpipeline.model_logging.get_run_logger")
+@patch("mlpipeline.model_logging.mlflow")
+def test_log_models_to_mlflow_async(
+    mock_mlflow, mock_logger, mock_upload, mock_log_model, dummy_all_runs
+):
+    mock_run = MagicMock()
+    mock_run.info.run_id = "test-run-id"
+    mock_mlflow.start_run.return_value.__enter__.return_value = mock_run
+    mock_upload.return_value = "test-run-id"
+
+    all_runs, X_val = dummy_all_runs
+    logged_runs = log_models_to_mlflow.fn(all_runs, X_val, async_artifacts=True)
+
+    # The model is uploaded in the background instead of with log_model
+    mock_log_model.assert_not_called()
+    assert logged_runs[0]["run_id"] == "test-run-id"
+    # No future travels in the task result
+    assert "artifact_future" not in logged_runs[0]
+    assert mock_upload.call_args[0][:2] == ("test-run-id", all_runs[0]["model"])
+    wait_for_model_artifact("test-run-id")
+    assert not _pending_uploads
+
+
+@patch("mlpipeline.model_logging.upload_model_artifact")
+@patch("mlpipeline.model_logging.get_run_logger")
+@patch("mlpipeline.model_logging.mlflow")
+def test_wait_for_model_uploads_reports_failures(
+    mock_mlflow, mock_logger, mock_upload, dummy_all_runs
+):
+    run_ids = iter(["run-1", "run-2"])
+    mock_mlflow.start_run.return_value.__enter__.side_effect = lambda: MagicMock(
+        info=MagicMock(run_id=next(run_ids))
+    )
+
+    def upload(run_id, *args):
+        if run_id == "run-2":
+            raise ConnectionError("upload failed")
+        return run_id
+
+    mock_upload.side_effect = upload
+
+    all_runs, X_val = dummy_all_runs
+    log_models_to_mlflow.fn(all_runs * 2, X_val, async_artifacts=True)
+
+    logger = MagicMock()
+    with pytest.raises(RuntimeError, match="run-2"):
+        wait_for_model_uploads(logger)
+    assert "run-2" in logger.error.call_args[0][0]
+    assert not _pending_uploads
+
+
+@patch("mlpipeline.model_logging.time.sleep")
+@patch("mlpipeline.model_logging.MlflowClient")
+def test_upload_model_artifact_retries_until_verified(
+    mock_client_cls, mock_sleep, dummy_all_runs
+):
+    all_runs, X_val = dummy_all_runs
+    client = mock_client_cls.return_value
+    uploaded = {}
+
+    def log_artifacts(run_id, local_path, artifact_path):
+        # First attempt fails, the second stores the files
+        if not client.log_artifacts.call_count > 1:
+            raise ConnectionError("upload failed")
+        uploaded.update(
+            {
+                name: os.path.getsize(os.path.join(local_path, name))
+                for name in os.listdir(local_path)
+            }
+        )
+
+    client.log_artifacts.side_effect = log_artifacts
+    client.list_artifacts.side_effect = lambda run_id, path: [
+        MagicMock(path=f"model/{name}", file_size=size, is_dir=False)
+        for name, size in uploaded.items()
+    ]
+
+    model = LinearRegression().fit(X_val, np.random.rand(len(X_val)))
+    run_id = upload_model_artifact("test-run-id", model, None, X_val.iloc[:5])
+    assert run_id == "test-run-id"
+    assert client.log_artifacts.call_count == 2
+    assert "MLmodel" in uploaded
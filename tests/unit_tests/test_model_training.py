@@ -34,8 +34,9 @@ def dummy_df():
     return pd.DataFrame(data)
 
 
+@patch("mlpipeline.model_training.find_cached_run", return_value=None)
 @patch("mlpipeline.model_training.get_run_logger")
-def test_train_tune_models(mock_logger, dummy_df):
+def test_train_tune_models(mock_logger, mock_cache, dummy_df):
     mock_logger.return_value = MagicMock()
 
     results, X_val, X_test, y_test = train_tune_models.fn(dummy_df)
@@ -53,3 +54,63 @@ def test_train_tune_models(mock_logger, dummy_df):
         assert isinstance(run["val_rmse"], float)
         assert isinstance(run["val_r2"], float)
         assert hasattr(run["model"], "predict")
+        assert {"train_time_s", "inference_time_s", "model_size_mb"} == set(
+            run["metrics"]
+        )
+
+    assert "HistGradientBoosting" in {run["model_name"] for run in results}
+    # Every run is fingerprinted for the training cache
+    fingerprints = {run["tags"]["fingerprint"] for run in results}
+    assert len(fingerprints) == len(results)
+
+
+@patch("mlpipeline.model_training.train_candidates")
+@patch("mlpipeline.model_training.find_cached_run")
+@patch("mlpipeline.model_training.get_run_logger")
+def test_train_tune_models_reuses_cached_runs(
+    mock_logger, mock_cache, mock_train, dummy_df
+):
+    cached = {"run_id": "cached-run", "model_name": "KNN", "val_rmse": 1.0}
+    mock_cache.side_effect = lambda fp, name, features: (
+        {**cached, "cached": True} if name == "KNN" else None
+    )
+    mock_train.side_effect = lambda candidates, **kwargs: [
+        (MagicMock(), 0.1, 2.0, 0.5) for _ in candidates
+    ]
+
+    costs = {"inference_time_s": 0.01, "model_size_mb": 1.0}
+    with patch("mlpipeline.model_training.measure_model_costs", return_value=costs):
+        results, _, _, _ = train_tune_models.fn(dummy_df)
+
+    # Only the uncached candidates are trained
+    trained = [name for name, _ in mock_train.call_args[0][0]]
+    assert "KNN" not in trained and len(trained) == len(results) - 1
+    assert [run["run_id"] for run in results if run.get("cached")] == ["cached-run"]
+
+
+def test_allocate_cpu_budget_splits_cores():
+    from mlpipeline.model_training import allocate_cpu_budget, get_model_instance
+
+    models = [
+        get_model_instance("RandomForest", {"n_estimators": 10}),
+        get_model_instance("GradientBoosting", {"n_estimators": 10}),
+        get_model_instance("KNN", {"n_neighbors": 3}),
+        get_model_instance("HistGradientBoosting", {"max_iter": 10}),
+    ]
+
+    # Enough cores: all models in parallel, spare cores go to multi-core models
+    assert allocate_cpu_budget(models, 10) == (4, [3, 1, 3, 3])
+    assert models[0].get_params()["n_jobs"] == 3
+    assert models[2].get_params()["kneighborsregressor__n_jobs"] == 3
+
+    # Fewer cores than models: one core per model
+    assert allocate_cpu_budget(models, 2) == (2, [1, 1, 1, 1])
+    assert models[0].get_params()["n_jobs"] == 1
+
+
+def test_candidate_dtypes_covers_only_trained_families():
+    from mlpipeline.model_training import candidate_dtypes
+
+    assert candidate_dtypes(["KNN"]) == ["float64"]
+    assert candidate_dtypes(["RandomForest", "GradientBoosting"]) == ["float32"]
+    assert candidate_dtypes(["KNN", "RandomForest"]) == ["float32", "float64"]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+from mlpipeline.profiling import (
+    profiled,
+    collect_profile,
+    profile_metrics,
+    log_profile_to_mlflow,
+)
+
+
+@profiled(name="Double Rows")
+def double_rows(df):
+    # Hold a large temporary so the peak RSS rises during the call
+    buffer = np.ones(20 * 1024**2 // 8)
+    return pd.concat([df, df]), float(buffer.sum())
+
+
+def test_profiled_records_stage_resources():
+    collect_profile()
+    df = pd.DataFrame({"A": np.arange(100, dtype="float64")})
+
+    result, _ = double_rows(df)
+    assert len(result) == 200
+
+    (record,) = collect_profile()
+    assert record["stage"] == "Double Rows"
+    assert record["wall_s"] > 0 and record["cpu_s"] >= 0
+    assert record["peak_rss_mb"] > 0
+    assert record["input_rows"] == 100 and record["output_rows"] == 200
+    assert record["output_mb"] > record["input_mb"] > 0
+    # Records are cleared once collected
+    assert collect_profile() == []
+
+
+def test_profile_metrics_flattens_and_aggregates():
+    records = [
+        {"stage": "Train Models", "wall_s": 1.0, "peak_rss_mb": 100.0},
+        {"stage": "Train Models", "wall_s": 2.0, "peak_rss_mb": 50.0},
+    ]
+    assert profile_metrics(records) == {
+        "Train_Models.wall_s": 3.0,
+        "Train_Models.peak_rss_mb": 100.0,
+    }
+
+
+@patch("mlpipeline.profiling.MlflowClient")
+def test_log_profile_to_mlflow_logs_on_each_run(mock_client_cls):
+    client = mock_client_cls.return_value
+    records = [{"stage": "load", "wall_s": 1.0}]
+
+    log_profile_to_mlflow(records, ["run1", "run2"], tags={"best_run_id": "run1"})
+
+    assert [c.args[0] for c in client.log_batch.call_args_list] == ["run1", "run2"]
+    batch = client.log_batch.call_args.kwargs
+    assert [(m.key, m.value) for m in batch["metrics"]] == [("load.wall_s", 1.0)]
+    assert [(t.key, t.value) for t in batch["tags"]] == [("best_run_id", "run1")]
+    client.log_dict.assert_called_with("run2", {"stages": records}, "profile.json")
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from monitoring.reference_profile import feature_profile
+
+
+def test_feature_profile_matches_standard_scaler():
+    values = pd.Series(np.random.default_rng(0).normal(50, 5, 500))
+    values[::50] = np.nan
+    profile = feature_profile(values)
+    scaler = StandardScaler().fit(values.dropna().to_frame())
+
+    assert profile["n"] == 490
+    assert np.all(np.diff(profile["sorted_values"]) >= 0)
+    assert profile["scaler_mean"] == pytest.approx(scaler.mean_[0])
+    assert profile["scaler_scale"] == pytest.approx(scaler.scale_[0])
+    assert profile["std_scaled"] == pytest.approx(1.0)
+    assert profile["bin_counts"].sum() == 490
+
+
+def test_constant_column_is_not_scaled():
+    profile = feature_profile(pd.Series([30.4] * 20))
+    assert profile["scaler_scale"] == 1.0
+    assert profile["std_scaled"] == pytest.approx(0.0, abs=1e-9)
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from monitoring.report_worker import ReportWorker, window_key
+
+
+def test_window_key_depends_on_content_only():
+    frame = pd.DataFrame({"Temperature": [50.0, 51.0], "Pressure": [30.4, 30.5]})
+    assert window_key(frame) == window_key(frame.copy().reset_index(drop=True))
+    changed = frame.copy()
+    changed.loc[1, "Temperature"] = 52.0
+    assert window_key(frame) != window_key(changed)
+
+
+def test_report_worker_caches_and_rate_limits():
+    calls = []
+    worker = ReportWorker(
+        lambda value: calls.append(value) or value * 2, min_interval=3600, min_gap=0
+    )
+    worker.start()
+    try:
+        assert worker.submit("a", 1)
+        worker.wait()
+        assert worker.latest == 2
+
+        # Same window: served from the cache
+        assert not worker.submit("a", 1, drift_changed=True)
+        # New window on schedule: too soon
+        assert not worker.submit("b", 3)
+        # New window after a drift change
+        assert worker.submit("b", 3, drift_changed=True)
+        worker.wait()
+        assert worker.latest == 6
+        assert calls == [1, 3]
+    finally:
+        worker.stop()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from monitoring.binned_drift import bin_counts
+from monitoring.reference_profile import build_reference_profile
+from monitoring.rolling_sketches import FeatureSketch, RollingSketches, window_drift
+
+
+@pytest.fixture
+def profile():
+    baseline = pd.DataFrame(
+        {"Temperature": np.random.default_rng(0).normal(50, 5, 5000)}
+    )
+    return build_reference_profile(baseline, ["Temperature"])
+
+
+def test_merged_sketches_match_all_values(profile):
+    reference = profile["Temperature"]
+    values = np.random.default_rng(1).normal(52, 6, 3000)
+    merged = FeatureSketch(reference["bin_edges"], reference["quantile_edges"])
+    for chunk in np.array_split(values, 7):
+        part = FeatureSketch(reference["bin_edges"], reference["quantile_edges"])
+        part.add(chunk)
+        merged.merge(part)
+
+    assert merged.count == 3000
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.std == pytest.approx(values.std())
+    assert merged.bins.counts.tolist() == (
+        bin_counts(reference["bin_edges"], values).tolist()
+    )
+    for q in (0.05, 0.5, 0.95):
+        # Within one percent of the baseline mass around the exact quantile
+        assert np.mean(values <= merged.quantile(q)) == pytest.approx(q, abs=0.02)
+
+
+def test_windows_drop_expired_buckets(profile):
+    sketches = RollingSketches(profile)
+    start = 1_700_000_000
+    sketches.add_rows(pd.DataFrame({"Temperature": [50.0] * 10}), timestamp=start)
+    sketches.add_rows(
+        pd.DataFrame({"Temperature": [60.0] * 5}), timestamp=start + 2 * 3600
+    )
+    sketches.add_errors([3.0, -4.0], timestamp=start + 2 * 3600)
+
+    now = start + 2 * 3600 + 60
+    assert sketches.window("1h", now).features["Temperature"].count == 5
+    assert sketches.window("24h", now).features["Temperature"].count == 15
+    assert sketches.window("24h", now).rmse == pytest.approx(np.sqrt(12.5))
+
+    stats = window_drift(profile, sketches.window("1h", now))["Temperature"]
+    assert stats["mean_shift"] == pytest.approx(
+        10 / profile["Temperature"]["scaler_scale"], rel=0.05
+    )
+    assert stats["psi"] > 0.25
+
+    # Memory stays fixed: the ring reuses its slots
+    for hour in range(100):
+        sketches.add_rows(
+            pd.DataFrame({"Temperature": [50.0]}), timestamp=start + hour * 3600
+        )
+    assert len(sketches.rings["24h"].buckets) == 24
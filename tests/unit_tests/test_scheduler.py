@@ -0,0 +1,40 @@
+from monitoring.scheduler import AdaptiveScheduler
+
+
+def make_scheduler(**kwargs):
+    return AdaptiveScheduler(
+        300, min_interval=30, max_interval=3600, busy_rows=500, seed=0, **kwargs
+    )
+
+
+def test_backs_off_when_idle_within_bounds():
+    scheduler = make_scheduler(jitter=0.0)
+    intervals = [scheduler.next_interval() for _ in range(6)]
+    assert intervals == [600, 1200, 2400, 3600, 3600, 3600]
+
+
+def test_speeds_up_on_traffic_and_rising_drift():
+    scheduler = make_scheduler(jitter=0.0)
+    scheduler.observe_rows(800)
+    assert scheduler.next_interval() == 150
+
+    scheduler.observe_rows(10)
+    assert scheduler.next_interval() == 300
+
+    scheduler.observe_rows(10)
+    scheduler.observe_drift(0.2)
+    assert scheduler.next_interval() == 300
+    scheduler.observe_rows(10)
+    scheduler.observe_drift(0.5)
+    assert scheduler.next_interval() == 150
+    for _ in range(5):
+        scheduler.observe_rows(1000)
+        scheduler.next_interval()
+    assert scheduler.interval == 30
+
+
+def test_jitter_stays_within_share_and_bounds():
+    scheduler = make_scheduler(jitter=0.1)
+    for _ in range(50):
+        scheduler.observe_rows(10)
+        assert 270 <= scheduler.next_interval() <= 330
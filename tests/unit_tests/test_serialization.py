@@ -0,0 +1,31 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import mlflow.pyfunc
+from sklearn.ensemble import RandomForestRegressor
+
+from mlpipeline.serialization import save_sklearn_model, load_sklearn_model
+
+
+@pytest.mark.parametrize("serialization_format", ["pickle", "joblib"])
+def test_save_and_load_sklearn_model(tmp_path, serialization_format):
+    X = pd.DataFrame(np.random.rand(50, 3), columns=["A", "B", "C"])
+    model = RandomForestRegressor(n_estimators=5).fit(X, np.random.rand(50))
+    path = str(tmp_path / "model")
+
+    save_sklearn_model(model, path, serialization_format=serialization_format)
+    if serialization_format == "joblib":
+        assert os.path.exists(os.path.join(path, "artifacts", "model.joblib"))
+
+    loaded = load_sklearn_model(path)
+    assert isinstance(loaded, RandomForestRegressor)
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X))
+    # The API serves every format through pyfunc
+    served = mlflow.pyfunc.load_model(path)
+    np.testing.assert_allclose(served.predict(X), model.predict(X))
+
+
+def test_save_sklearn_model_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        save_sklearn_model(object(), str(tmp_path / "model"), "parquet")
@@ -0,0 +1,45 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+from mlpipeline.shared_data import SharedDataset
+
+
+def test_shared_dataset_round_trip(tmp_path):
+    X = pd.DataFrame(np.random.rand(20, 3), columns=["A", "B", "C"])
+    y = pd.Series(np.random.rand(20))
+
+    with SharedDataset.create(
+        features={"X_train": X},
+        targets={"y_train": y},
+        dtypes=("float32", "float64"),
+        directory=tmp_path,
+    ) as dataset:
+        # Pickling only ships paths, not the data
+        assert len(pickle.dumps(dataset)) < 1000
+
+        mapped = dataset.frame("X_train")
+        assert list(mapped.columns) == ["A", "B", "C"]
+        np.testing.assert_array_equal(mapped.to_numpy(), X.to_numpy())
+        assert dataset.frame("X_train", "float32").dtypes.eq(np.float32).all()
+
+        y_mapped = dataset.load("y_train")
+        assert not y_mapped.flags.writeable
+        np.testing.assert_array_equal(y_mapped, y.to_numpy())
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_shared_dataset_writes_only_requested_dtypes(tmp_path):
+    X = pd.DataFrame(np.random.rand(20, 3), columns=["A", "B", "C"])
+    y = pd.Series(np.random.rand(20))
+
+    with SharedDataset.create(
+        features={"X_train": X},
+        targets={"y_train": y},
+        dtypes=("float32",),
+        directory=tmp_path,
+    ) as dataset:
+        files = sorted(os.listdir(dataset.directory))
+        assert files == ["X_train.float32.npy", "y_train.float64.npy"]
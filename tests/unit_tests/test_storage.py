@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from mlpipeline.storage import (
+    LocalStorage,
+    SQLiteLogStore,
+    get_log_store,
+    get_storage,
+    read_csv,
+    write_csv,
+)
+
+
+def test_local_storage_round_trip(tmp_path):
+    storage = LocalStorage(tmp_path)
+    df = pd.DataFrame({"UNIXTime": [1, 2], "Radiation": [2.5, 600.0]})
+
+    write_csv(df, "bucket", "raw-data/data.csv", storage=storage)
+    assert (tmp_path / "bucket" / "raw-data" / "data.csv").exists()
+    pd.testing.assert_frame_equal(
+        read_csv("bucket", "raw-data/data.csv", storage=storage), df
+    )
+
+    etag = storage.etag("bucket", "raw-data/data.csv")
+    write_csv(df.iloc[:1], "bucket", "raw-data/data.csv", storage=storage)
+    assert storage.etag("bucket", "raw-data/data.csv") != etag
+
+    storage.copy("bucket", "raw-data/data.csv", "archive/data.csv")
+    storage.delete("bucket", "raw-data/data.csv")
+    assert len(read_csv("bucket", "archive/data.csv", storage=storage)) == 1
+    with pytest.raises(FileNotFoundError):
+        storage.etag("bucket", "raw-data/data.csv")
+
+
+def test_sqlite_log_store(tmp_path):
+    store = SQLiteLogStore(str(tmp_path / "logs" / "model_logs.db"))
+    store.insert(
+        [
+            {"UNIXTime": 1472793006, "Temperature": 55, "Radiation": 2.5},
+            {"UNIXTime": 1472793306, "Temperature": 56, "Radiation": 3.1},
+        ]
+    )
+
+    logs = store.fetch_range(["Temperature"])
+    assert list(logs.columns) == ["id", "Temperature"]
+    assert logs["id"].tolist() == [2, 1]  # newest first
+    assert logs["Temperature"].tolist() == [56, 55]
+    assert store.fetch_range(["Radiation"], after_id=1)["id"].tolist() == [2]
+    assert store.fetch_range(["Radiation"], before_id=2)["id"].tolist() == [1]
+    assert len(store.fetch_range(["Radiation"], limit=1)) == 1
+
+    store.clear()
+    assert store.fetch_range(["Radiation"]).empty
+
+
+def test_backends_selected_by_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_STORAGE_ROOT", str(tmp_path))
+    monkeypatch.setenv("PREDICTION_LOG_BACKEND", "sqlite")
+    monkeypatch.setenv("PREDICTION_LOG_SQLITE_PATH", str(tmp_path / "logs.db"))
+    assert isinstance(get_storage(), LocalStorage)
+    assert isinstance(get_log_store(), SQLiteLogStore)
+
+    monkeypatch.setenv("STORAGE_BACKEND", "gcs")
+    with pytest.raises(ValueError):
+        get_storage()
@@ -0,0 +1,33 @@
+import pandas as pd
+from prefect.logging import disable_run_logger
+
+from benchmarks.synthetic_data import RAW_COLUMNS, generate_chunks, write_csv
+from mlpipeline.data_preparation import feature_engineer
+
+
+def test_write_csv_matches_raw_schema(tmp_path):
+    path = write_csv(tmp_path / "raw.csv", 2500, chunk_size=1000)
+    df = pd.read_csv(path)
+    reference = pd.read_csv("data/training_data.csv", nrows=100)
+
+    assert list(df.columns) == RAW_COLUMNS
+    assert len(df) == 2500
+    assert (df.dtypes == reference.dtypes).all()
+    assert df["UNIXTime"].is_monotonic_increasing
+    assert df["Radiation"].min() > 1
+    assert df["TimeSunRise"].str.match(r"^0[56]:\d\d:00$").all()
+    assert df["TimeSunSet"].str.match(r"^1[78]:\d\d:00$").all()
+    # The rows go through feature engineering like the real data
+    with disable_run_logger():
+        engineered = feature_engineer.fn(df)
+    assert engineered["MinutesSinceSunrise"].notna().all()
+
+
+def test_generate_chunks_is_diurnal_and_reproducible():
+    first = pd.concat(generate_chunks(3000, chunk_size=1000, seed=1))
+    second = pd.concat(generate_chunks(3000, chunk_size=1000, seed=1))
+    pd.testing.assert_frame_equal(first, second)
+
+    hour = first["Time"].str[:2].astype(int)
+    assert first.loc[hour == 12, "Radiation"].mean() > 300
+    assert first.loc[hour < 5, "Radiation"].max() < 5
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from mlpipeline.training_cache import (
+    COMPRESSION_MODULES,
+    TRAINING_MODULES,
+    dataset_fingerprint,
+    code_version,
+    training_fingerprint,
+)
+
+
+def make_df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.random((20, 3)), columns=["A", "B", "Radiation"])
+
+
+def test_dataset_fingerprint_tracks_content():
+    df = make_df()
+    assert dataset_fingerprint(df) == dataset_fingerprint(df.copy())
+
+    changed = df.copy()
+    changed.iloc[3, 1] += 1e-9
+    assert dataset_fingerprint(changed) != dataset_fingerprint(df)
+    assert dataset_fingerprint(df.astype("float32")) != dataset_fingerprint(df)
+    assert dataset_fingerprint(df.rename(columns={"A": "Z"})) != dataset_fingerprint(df)
+
+
+def test_training_fingerprint_depends_on_every_input():
+    code = code_version()
+    base = training_fingerprint("data", "RandomForest", {"n_estimators": 10}, code)
+    assert base == training_fingerprint(
+        "data", "RandomForest", {"n_estimators": 10}, code
+    )
+    assert base != training_fingerprint(
+        "data", "RandomForest", {"n_estimators": 20}, code
+    )
+    assert base != training_fingerprint("data", "KNN", {"n_estimators": 10}, code)
+    assert base != training_fingerprint(
+        "other", "RandomForest", {"n_estimators": 10}, code
+    )
+    assert base != training_fingerprint(
+        "data", "RandomForest", {"n_estimators": 10}, "other-code"
+    )
+
+
+def test_code_version_covers_compression_and_serialization():
+    assert "serialization.py" in TRAINING_MODULES
+    assert set(TRAINING_MODULES) < set(COMPRESSION_MODULES)
+    assert "model_compression.py" in COMPRESSION_MODULES
+    assert code_version(COMPRESSION_MODULES) != code_version()